@@ -1,21 +1,62 @@
 '''Main bot file.'''
 
 # RLBot imports.
-from rlbot.agents.base_agent import BaseAgent, SimpleControllerState
+from rlbot.agents.base_agent import BaseAgent, SimpleControllerState, BOT_CONFIG_AGENT_HEADER
 from rlbot.utils.structures.game_data_struct import GameTickPacket
 from rlbot.utils.structures.quick_chats import QuickChats
 
 # Local file imports.
 import data
+from profiler import TickProfiler, FRAME_MS
+from render import RenderManager
+from replay import Recorder
 from utils import np, a3l, normalise, local, cap, team_sign, special_sauce
 from states import Idle, Kickoff, Catch, PickUp, Dribble, SimplePush, GetBoost, Dodge, DemoOpponent, GetBoostDesperate, orange_inside_goal
 
 class Calculator(BaseAgent):
 
+    # Profiling defaults, overridden by load_config.
+    tick_budget_ms = FRAME_MS
+    render_profile = False
+    render_debug = True
+    debug_render_rate = 20.0
+    profile_report = True
+    record_replay = None
+
+    @staticmethod
+    def create_agent_configurations(config):
+        params = config.get_header(BOT_CONFIG_AGENT_HEADER)
+        params.add_value('tick_budget_ms', float, default=FRAME_MS,
+                         description='State execute time in ms after which a warning is logged.')
+        params.add_value('render_profile', bool, default=False,
+                         description='Render tick time percentiles on screen.')
+        params.add_value('render_debug', bool, default=True,
+                         description='Render debug info on screen. Turn off for ranked matches to skip rendering altogether.')
+        params.add_value('debug_render_rate', float, default=20.0,
+                         description='Most times per second to redraw debug groups like the ball prediction.')
+        params.add_value('profile_report', bool, default=True,
+                         description='Log a tick time report when the match ends.')
+        params.add_value('record_replay', str, default=None,
+                         description='Record game data to this file for offline replay. {index} is replaced with the bot index.')
+
+    def load_config(self, config_header):
+        self.tick_budget_ms = config_header.getfloat('tick_budget_ms')
+        self.render_profile = config_header.getboolean('render_profile')
+        self.render_debug = config_header.getboolean('render_debug')
+        self.debug_render_rate = config_header.getfloat('debug_render_rate')
+        self.profile_report = config_header.getboolean('profile_report')
+        self.record_replay = config_header.get('record_replay')
+
+
     def initialize_agent(self):
         self.need_setup = True
         self.state = Idle()
 
+        # Times each phase of get_output.
+        self.profiler = TickProfiler(['process', 'check', 'execute', 'render'], budget_ms=self.tick_budget_ms, logger=self.logger)
+        self.reported = False
+        self.recorder = None
+
         # Fake kickoff related.
         self.fake_kickoff_works = False
         self.went_for_fake_ko = -1
@@ -60,50 +101,40 @@ class Calculator(BaseAgent):
 
 
     def get_output(self, packet: GameTickPacket) -> SimpleControllerState:
+        self.profiler.start()
+
         # Runs setup.
         if self.need_setup:
             field_info = self.get_field_info()
             data.setup(self, packet, field_info)
             self.need_setup = False
 
+            # Only sends render groups which changed. The renderer isn't ready until the first tick.
+            self.draw = RenderManager(self.renderer, self.render_debug)
+
+            if self.record_replay:
+                self.recorder = Recorder(self.record_replay.format(index=self.index), field_info, self.index)
+
+        # Records the raw game data for offline replay.
+        if self.recorder is not None:
+            self.recorder.record(packet, self.get_ball_prediction_struct())
+
         # Preprocessing.
         data.process(self, packet)
         self.ctrl = SimpleControllerState()
+        self.profiler.lap('process')
 
         # Handle states.
         self.checkState()
+        self.profiler.lap('check')
 
         # Execute state.
         if not self.state.expired:
             # Don't do anything if about to score.
             if len(self.opponents) > 0:
 
-                # Compare who is closer to enemy goal.
-                opponent_goal = orange_inside_goal * team_sign(self.team)
-
-                my_dist_to_goal = np.linalg.norm(self.player.pos - opponent_goal)
-                opp_dist_to_goal = np.linalg.norm(self.opponents[0].pos - opponent_goal)
-
-                # Finds closest opponent to enemy goal.
-                if len(self.opponents) > 1:
-                    for opponent in self.opponents:
-                        test_dist = np.linalg.norm(opponent.pos - opponent_goal)
-                        if opp_dist_to_goal > test_dist:
-                            opp_dist_to_goal = test_dist
-
-                opp_closer_to_goal = my_dist_to_goal > opp_dist_to_goal
-
-                # Check if ball is going in.
-                if self.team == 0:
-                    in_goal_predictions = self.ball.predict.pos[:,1][:120] > 5150
-                    # opponent_behind = self.opponents[0].pos[1] > self.ball.pos[1]
-                else:
-                    in_goal_predictions = self.ball.predict.pos[:,1][:120] < -5150
-                    # opponent_behind = self.opponents[0].pos[1] < self.ball.pos[1]
-
-                about_to_score = np.count_nonzero(in_goal_predictions) > 60 and not opp_closer_to_goal
-
-                if not about_to_score:
+                # Check if ball is going in with no opponent closer to goal.
+                if not self.analysis.about_to_score:
                     self.state.execute(self)
                     # TODO self.state.render(self)
                 else:
@@ -122,15 +153,51 @@ class Calculator(BaseAgent):
             if self.went_for_fake_ko != -1 and self.game_time - self.went_for_fake_ko < 20.0:
                 self.fake_kickoff_works = False
         self.enemy_goals = packet.teams[abs(self.team - 1)].score
+        self.profiler.lap('execute', label=self.state.__class__.__name__)
 
         # Render.
-        self.render(self.renderer)
+        self.render(self.draw)
+        self.profiler.lap('render')
+        self.profiler.end()
+
+        # Dump the tick profile once the match is over.
+        if self.m_ended and not self.reported:
+            self.report_profile()
+            self.stop_recording()
 
         return self.ctrl 
 
 
+    def report_profile(self):
+        if self.profile_report:
+            self.logger.info(f'Calc{self.index}\n{self.profiler.report()}')
+        self.reported = True
+
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.logger.info(f'Recorded {self.recorder.ticks} ticks.')
+            self.recorder = None
+
+
+    def retire(self):
+        if not self.reported:
+            self.report_profile()
+        self.stop_recording()
+
+
     def render(self, r):
-        r.begin_rendering()
-        r.draw_string_2d(150, 50+(50*self.index), 2, 2, f'Calc{self.index} state: {self.state.__class__.__name__}', r.team_color(self.team))
-        r.draw_polyline_3d(self.ball.predict.pos[:120:10], r.pink())
-        r.end_rendering()
\ No newline at end of file
+        # Only sent when the state changes.
+        if r.begin_rendering('state'):
+            r.draw_string_2d(150, 50+(50*self.index), 2, 2, f'Calc{self.index} state: {self.state.__class__.__name__}', r.team_color(self.team))
+            r.end_rendering()
+
+        # Debug groups are throttled to debug_render_rate.
+        if r.begin_rendering('prediction', rate=self.debug_render_rate, now=self.game_time):
+            r.draw_polyline_3d(self.ball.predict.pos[:120], r.pink())
+            r.end_rendering()
+
+        if self.render_profile and r.begin_rendering('profile', rate=self.debug_render_rate, now=self.game_time):
+            self.profiler.render(r, 150, 400+(120*self.index))
+            r.end_rendering()
\ No newline at end of file
@@ -0,0 +1,138 @@
+'''Per-tick analysis shared between states.'''
+
+import functools
+
+from intercept import Bounces, find_bounces, drive_times
+from states import blue_inside_goal, orange_inside_goal
+from utils import np, team_sign
+
+# -----------------------------------------------------------
+
+def tick_cached(method):
+    """Turns a method into a property which is calculated at most once per tick.
+
+    Arguments:
+        method {function} -- Calculates the value from the analysis.
+
+    Returns:
+        property -- Property which remembers the value until Analysis.reset.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def getter(self):
+        cache = self._cache
+        if name not in cache:
+            cache[name] = method(self)
+        return cache[name]
+
+    return property(getter)
+
+
+class Analysis:
+    """Values derived from the packet which several states and get_output need.
+
+    Nothing is calculated until it is first asked for, and then it is
+    reused for the rest of the tick. Call reset when a new packet arrives.
+
+    Attributes:
+        agent {Calculator} -- The agent being analysed for.
+    """
+    __slots__ = [
+        'agent',
+        '_cache'
+    ]
+
+    def __init__(self, agent):
+        self.agent  = agent
+        self._cache : dict = {}
+
+    def reset(self):
+        """Forgets everything calculated for the last tick."""
+        self._cache.clear()
+
+    # GOALS:
+
+    @tick_cached
+    def opponent_goal(self) -> np.ndarray:
+        return orange_inside_goal * team_sign(self.agent.team)
+
+    @tick_cached
+    def own_goal(self) -> np.ndarray:
+        return blue_inside_goal * team_sign(self.agent.team)
+
+    # DISTANCES:
+
+    @tick_cached
+    def player_to_ball(self) -> float:
+        return np.linalg.norm(self.agent.ball.pos - self.agent.player.pos)
+
+    @tick_cached
+    def ball_to_goal(self) -> float:
+        return np.linalg.norm(self.agent.ball.pos - self.opponent_goal)
+
+    @tick_cached
+    def player_to_goal(self) -> float:
+        return np.linalg.norm(self.agent.player.pos - self.opponent_goal)
+
+    @tick_cached
+    def ball_to_own_goal(self) -> float:
+        return np.linalg.norm(self.agent.ball.pos - self.own_goal)
+
+    # BOOST PADS:
+
+    @tick_cached
+    def player_to_pads(self) -> np.ndarray:
+        """Distance from the player to each boost pad."""
+        return self.agent.pads.distances(self.agent.player.pos)
+
+    @tick_cached
+    def pad_etas(self) -> np.ndarray:
+        """Estimated time for the player to drive to each boost pad."""
+        return drive_times(self.agent.player, self.agent.pads.pos)
+
+    # OPPONENTS:
+
+    @tick_cached
+    def opponents_to_goal(self) -> np.ndarray:
+        """Distance from each opponent to the opponent goal."""
+        return np.linalg.norm(self.agent.block.pos[self.agent.opponent_indices] - self.opponent_goal, axis=1)
+
+    @tick_cached
+    def closest_opponent_to_goal(self):
+        """The opponent closest to their goal, or None if there are no opponents."""
+        if len(self.agent.opponents) == 0:
+            return None
+        return self.agent.opponents[np.argmin(self.opponents_to_goal)]
+
+    @tick_cached
+    def opp_closer_to_goal(self) -> bool:
+        """Whether any opponent is closer to the opponent goal than the player."""
+        if len(self.agent.opponents) == 0:
+            return False
+        return self.player_to_goal > np.min(self.opponents_to_goal)
+
+    # BALL:
+
+    @tick_cached
+    def ball_rolling(self) -> bool:
+        """Whether the ball is on the ground and predicted to keep rolling for a while."""
+        small_z_vel = np.abs(self.agent.ball.predict.vel[:,2]) < 10
+        predicted_roll = self.agent.ball.predict.pos[:,2] < 100
+        return self.agent.ball.pos[2] < 100 and np.count_nonzero(small_z_vel & predicted_roll) > 60
+
+    @tick_cached
+    def goal_in_predictions(self) -> np.ndarray:
+        """Which of the next 120 ball predictions are inside the opponent goal."""
+        return self.agent.ball.predict.pos[:120,1] * team_sign(self.agent.team) > 5150
+
+    @tick_cached
+    def about_to_score(self) -> bool:
+        """Whether the ball is going in and no opponent is in a position to stop it."""
+        return np.count_nonzero(self.goal_in_predictions) > 60 and not self.opp_closer_to_goal
+
+    @tick_cached
+    def bounces(self) -> Bounces:
+        """Bounces in the ball prediction, scored for the player."""
+        pos, times = find_bounces(self.agent.ball.predict)
+        return Bounces(self.agent.game_time, pos, times, drive_times(self.agent.player, pos))
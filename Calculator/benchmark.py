@@ -0,0 +1,447 @@
+'''Microbenchmarks for the per-tick hot paths.
+
+Run with `python benchmark.py` from this folder. Each benchmark
+times the old way of doing something against the current one.
+'''
+
+import timeit
+
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+from rlbot.utils.rendering.rendering_manager import RenderingManager
+
+import data
+import kinematics
+import paths
+import routing
+from pads import PadIndex
+from render import RenderManager
+from simulator import Simulator
+from utils import np, BoostPad, PacketBlock, Prediction, a3p, a3r, a3v, orient_matrix, orient_matrices
+
+REPEATS = 1000
+
+# -----------------------------------------------------------
+
+# FAKE GAME DATA:
+
+def fake_ball_prediction() -> BallPrediction:
+    """Creates a ball prediction struct filled with random numbers.
+
+    Returns:
+        BallPrediction -- Struct with every slice filled in.
+    """
+    ball_prediction = BallPrediction()
+    ball_prediction.num_slices = len(ball_prediction.slices)
+    raw = np.frombuffer(ball_prediction.slices, dtype=np.float32)
+    raw[:] = np.random.uniform(-5000, 5000, raw.shape)
+    return ball_prediction
+
+
+def fake_packet(num_cars : int = 6, num_pads : int = 34) -> GameTickPacket:
+    """Creates a game tick packet with random physics for every car and the ball.
+
+    Arguments:
+        num_cars {int} -- Number of cars in the packet.
+        num_pads {int} -- Number of boost pads in the packet.
+
+    Returns:
+        GameTickPacket -- The filled packet.
+    """
+    packet = GameTickPacket()
+    packet.num_cars = num_cars
+    packet.num_boost = num_pads
+    view = data.packet_view(packet)
+    view['game_cars']['physics'][:num_cars] = np.random.uniform(-3000, 3000, (num_cars, 4, 3))
+    view['game_cars']['team'][:num_cars] = np.arange(num_cars) % 2
+    view['game_cars']['boost'][:num_cars] = np.random.randint(0, 100, num_cars)
+    view['game_ball']['physics'] = np.random.uniform(-3000, 3000, (4, 3))
+    view['game_boosts']['timer'][:num_pads] = np.random.uniform(0, 10, num_pads)
+    return packet
+
+
+def fake_field_info(num_pads : int = 34) -> FieldInfoPacket:
+    """Creates a field info packet with boost pads at random places, every fifth one large.
+
+    Arguments:
+        num_pads {int} -- Number of boost pads.
+
+    Returns:
+        FieldInfoPacket -- The filled packet.
+    """
+    field_info = FieldInfoPacket()
+    field_info.num_boosts = num_pads
+    for i in range(num_pads):
+        pad = field_info.boost_pads[i]
+        pad.location.x, pad.location.y, pad.location.z = np.random.uniform([-4000, -5000, 70], [4000, 5000, 70])
+        pad.is_full_boost = i % 5 == 0
+    return field_info
+
+def bouncing_ball_prediction() -> BallPrediction:
+    """Creates a ball prediction of a ball bouncing across the field, without spin or walls.
+
+    Returns:
+        BallPrediction -- Struct with every slice filled in.
+    """
+    ball_prediction = BallPrediction()
+    ball_prediction.num_slices = len(ball_prediction.slices)
+    raw = np.frombuffer(ball_prediction.slices, dtype=np.float32).reshape(ball_prediction.num_slices, -1)
+    pos = np.array([-2000.0, -3000.0, 600.0])
+    vel = np.array([500.0, 800.0, 700.0])
+    for i in range(ball_prediction.num_slices):
+        raw[i, 0:3] = pos
+        raw[i, 6:9] = vel
+        raw[i, 12] = i / 60
+        vel[2] -= 650 / 60
+        pos += vel / 60
+        if pos[2] < 93:
+            pos[2] = 186 - pos[2]
+            vel[2] *= -0.6
+    return ball_prediction
+
+
+class FakeRenderingManager(RenderingManager):
+    """A RenderingManager whose calls into the core do nothing."""
+
+    def __init__(self):
+        super().__init__()
+        self.native_constructor = lambda group_id: 1
+        self.native_destructor = lambda builder: None
+        self.native_finish_and_send = lambda builder: None
+        for name in ('line_3d', 'string_2d', 'string_3d', 'rect_2d', 'rect_3d'):
+            setattr(self, f'native_draw_{name}', lambda *args: None)
+
+# -----------------------------------------------------------
+
+# BENCHMARKS:
+
+def bench_ball_prediction():
+    """Per-tick ball prediction ingest in data.process."""
+    ball_prediction = fake_ball_prediction()
+
+    def before():
+        return Prediction(
+            np.array([[step.physics.location.x, step.physics.location.y, step.physics.location.z] for step in ball_prediction.slices]),
+            np.array([[step.physics.velocity.x, step.physics.velocity.y, step.physics.velocity.z] for step in ball_prediction.slices]),
+            np.array([[step.game_seconds] for step in ball_prediction.slices])
+        )
+
+    # The view is made once at setup, after that each tick only checks the struct.
+    cached = {'struct': None, 'predict': None}
+    def after():
+        if ball_prediction is not cached['struct']:
+            cached['struct'] = ball_prediction
+            cached['predict'] = a3p(ball_prediction)
+        return cached['predict']
+
+    old, new = before(), a3p(ball_prediction)
+    assert np.allclose(old.pos, new.pos) and np.allclose(old.vel, new.vel) and np.allclose(old.time, new.time)
+
+    return before, after
+
+
+def bench_packet_decode():
+    """Per-tick packet decoding of a 3v3 in data.process."""
+    packet = fake_packet()
+    block = PacketBlock(packet.num_cars, packet.num_boost)
+
+    def before():
+        for index in range(packet.num_cars):
+            car = packet.game_cars[index]
+            pos      = a3v(car.physics.location)
+            rot      = a3r(car.physics.rotation)
+            vel      = a3v(car.physics.velocity)
+            ang_vel  = a3v(car.physics.angular_velocity)
+            dead     = car.is_demolished
+            wheel_c  = car.has_wheel_contact
+            sonic    = car.is_super_sonic
+            jumped   = car.jumped
+            d_jumped = car.double_jumped
+            boost    = car.boost
+        ball_pos     = a3v(packet.game_ball.physics.location)
+        ball_rot     = a3r(packet.game_ball.physics.rotation)
+        ball_vel     = a3v(packet.game_ball.physics.velocity)
+        ball_ang_vel = a3v(packet.game_ball.physics.angular_velocity)
+        for index in range(packet.num_boost):
+            active = packet.game_boosts[index].is_active
+            timer  = packet.game_boosts[index].timer
+
+    view = data.packet_view(packet)
+    def after():
+        data.decode(block, view)
+
+    after()
+    assert np.allclose(block.vel[2], a3v(packet.game_cars[2].physics.velocity))
+    assert np.allclose(block.ball[1], a3r(packet.game_ball.physics.rotation))
+
+    return before, after
+
+
+def bench_orient_matrices():
+    """Orientation matrices for all cars of a 3v3."""
+    rotations = np.random.uniform(-np.pi, np.pi, (6, 3))
+    out = np.empty((6, 3, 3))
+
+    def before():
+        return [orient_matrix(rot) for rot in rotations]
+
+    def after():
+        return orient_matrices(rotations, out=out)
+
+    assert np.allclose(before(), after())
+
+    return before, after
+
+
+def bench_eta():
+    """Drive time estimates for 360 candidate targets."""
+    distances = np.random.uniform(0, 6000, 360)
+
+    # One scalar lookup per candidate, like the old point by point binary search.
+    def before():
+        return [float(kinematics.time_to_dist(d, 800, 50)) for d in distances]
+
+    def after():
+        return kinematics.time_to_dist(distances, 800, 50)
+
+    assert np.allclose(before(), after())
+
+    return before, after
+
+
+def random_bezier_paths(k : int, n : int = 50) -> np.ndarray:
+    """Samples random cubic Bezier curves across the field.
+
+    Arguments:
+        k {int} -- Number of paths.
+        n {int} -- Number of points along each path.
+
+    Returns:
+        np.ndarray -- Points along the paths, shape (k, n, 3).
+    """
+    control = np.random.uniform([-4000, -5000, 0], [4000, 5000, 0], (k, 4, 1, 3))
+    t = np.linspace(0, 1, n)[:, np.newaxis]
+    return (1-t)**3*control[:, 0] + 3*(1-t)**2*t*control[:, 1] + 3*(1-t)*t**2*control[:, 2] + t**3*control[:, 3]
+
+
+def step_profile(path : np.ndarray, v0 : float, boost : bool) -> np.ndarray:
+    """One point at a time, like the forward and backward loops in Test/Misc/paths.path_analysis.
+
+    Arguments:
+        path {np.ndarray} -- Points along the path, shape (n, 3).
+        v0 {float} -- Speed at the start.
+        boost {bool} -- Whether to boost.
+
+    Returns:
+        np.ndarray -- Speed at each point.
+    """
+    table = paths.BOOST if boost else paths.THROTTLE
+    max_vel = paths.max_speed(paths.curvature(path))
+    steps = np.linalg.norm(np.diff(path, axis=0), axis=1)
+
+    vel = np.empty(len(path))
+    vel[0] = v0
+    for i in range(len(steps)):
+        vel[i+1] = min(table.speed(table.phase(vel[i]) + steps[i]), max_vel[i+1])
+    for i in reversed(range(len(steps))):
+        vel[i] = min(vel[i], np.sqrt(vel[i+1]**2 + 2 * paths.BRAKE_ACCEL * steps[i]))
+    return vel
+
+
+def bench_path_profile():
+    """Velocity profiles of 32 candidate paths."""
+    candidates = random_bezier_paths(32)
+    v0 = np.random.uniform(0, 2300, 32)
+    boost = np.random.uniform(0, 1, 32) > 0.5
+
+    def before():
+        return [step_profile(path, v, b) for path, v, b in zip(candidates, v0, boost)]
+
+    def after():
+        return paths.profile(candidates, v0, boost)
+
+    assert np.allclose(before(), after().vel)
+
+    return before, after
+
+
+def bench_route():
+    """Route to a target with detours through 4 pads."""
+    pos = np.random.uniform([-3000, -4000, 17], [3000, 4000, 17])
+    angle = np.random.uniform(-np.pi, np.pi)
+    forward = np.array([np.cos(angle), np.sin(angle), 0])
+    vel = forward * np.random.uniform(0, 2000)
+    target = np.random.uniform([-3000, -4000, 93], [3000, 4000, 93])
+    # Pads along the way, so they all make it into the batch.
+    pads = pos + (target - pos) * np.random.uniform(0.2, 0.8, (4, 1)) + np.random.uniform(-300, 300, (4, 3)) * [1, 1, 0]
+    pad_boost = np.array([12, 12, 100, 100])
+
+    # Each candidate profiled on its own, the way a single path used to be analysed.
+    def before():
+        near = routing.nearby_pads(pos, target, pads)
+        candidates = routing.candidates(pos, forward, target, None, pads[near])
+        profiles = [paths.profile(path, np.dot(vel, forward), True) for path in candidates]
+        profiles = [profile if profile.time <= 50 / kinematics.BOOST_CONSUMPTION else paths.profile(path, np.dot(vel, forward), False)
+                    for path, profile in zip(candidates, profiles)]
+        credit = [0.0] * (len(candidates) - len(near)) + [routing.BOOST_VALUE * min(pad_boost[i], 50) / 100 for i in near]
+        scores = [(not profile.drivable, profile.time - c) for profile, c in zip(profiles, credit)]
+        return min(scores)[1]
+
+    def after():
+        return routing.route(pos, forward, vel, 50, target, None, pads, pad_boost)
+
+    chosen = after()
+    credit = routing.BOOST_VALUE * min(pad_boost[chosen.pad], 50) / 100 if chosen.pad >= 0 else 0.0
+    assert np.isclose(before(), chosen.time - credit)
+
+    return before, after
+
+
+def bench_nearest_pad():
+    """Nearest active pad out of 34."""
+    field_info = fake_field_info()
+    packet = fake_packet(num_pads=field_info.num_boosts)
+    block = PacketBlock(packet.num_cars, field_info.num_boosts)
+    data.decode(block, data.packet_view(packet))
+    block.pad_active[:] = np.random.uniform(0, 1, field_info.num_boosts) > 0.3
+    block.pad_active[0] = True
+    pads = PadIndex(field_info, block)
+    all_pads = [BoostPad(i, a3v(field_info.boost_pads[i].location), block) for i in range(field_info.num_boosts)]
+    pos = block.pos[0]
+
+    # Like GetBoostDesperate used to pick its pad.
+    def before():
+        closest_pad = all_pads[0]
+        closest_dist = float('inf')
+        for pad in all_pads:
+            if pad.active:
+                pad_distance = np.linalg.norm(pad.pos - pos)
+                if pad_distance < closest_dist:
+                    closest_pad = pad
+                    closest_dist = pad_distance
+        return closest_pad.index
+
+    def after():
+        return pads.nearest_active(pos)
+
+    assert before() == after()
+
+    return before, after
+
+
+def bench_render():
+    """Rendering state and ball prediction each tick."""
+    predict = a3p(bouncing_ball_prediction())
+    r = FakeRenderingManager()
+    draw = RenderManager(r)
+    ticks = iter(range(10**9))
+
+    # Like Calculator.render used to, every tick.
+    def before():
+        next(ticks)
+        r.begin_rendering()
+        r.draw_string_2d(150, 50, 2, 2, 'Calc0 state: Dribble', r.white())
+        r.draw_polyline_3d(predict.pos[:120:10], r.pink())
+        r.end_rendering()
+
+    # The state doesn't change, and the prediction is throttled to 20 per second of game time.
+    def after():
+        game_time = next(ticks) / 120
+        if draw.begin_rendering('state'):
+            draw.draw_string_2d(150, 50, 2, 2, 'Calc0 state: Dribble', draw.white())
+            draw.end_rendering()
+        if draw.begin_rendering('prediction', rate=20, now=game_time):
+            draw.draw_polyline_3d(predict.pos[:120], draw.pink())
+            draw.end_rendering()
+
+    after()
+    assert draw.sent == 2
+
+    return before, after
+
+
+def bench_render_polyline():
+    """Ball prediction polyline of all 360 slices."""
+    ball_prediction = bouncing_ball_prediction()
+    predict = a3p(ball_prediction)
+    r = FakeRenderingManager()
+    draw = RenderManager(r)
+    group = iter(range(10**9))
+
+    # Like Speedbots3 drew it, a3v on every slice.
+    def before():
+        r.begin_rendering()
+        r.draw_polyline_3d([a3v(step.physics.location) for step in ball_prediction.slices], r.pink())
+        r.end_rendering()
+
+    # Decimated, and always sent, as a new group each time.
+    def after():
+        draw.begin_rendering(str(next(group)))
+        draw.draw_polyline_3d(predict.pos, draw.pink())
+        draw.end_rendering()
+
+    return before, after
+
+
+def bench_simulate():
+    """One simulated tick of 64 cars."""
+    n = 64
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(-3000, 3000, (n, 3))
+    yaw = rng.uniform(-np.pi, np.pi, n)
+    speed = rng.uniform(-500, 2000, n)
+    throttle = rng.uniform(-1, 1, n)
+    steer = rng.uniform(-1, 1, n)
+    boost = rng.random(n) < 0.3
+    handbrake = rng.random(n) < 0.2
+
+    # A simulator for each car, stepped one after another.
+    singles = [Simulator(1, pos[i:i+1], yaw[i:i+1], speed[i:i+1]) for i in range(n)]
+    def before():
+        for i, sim in enumerate(singles):
+            sim.step(throttle[i:i+1], steer[i:i+1], boost[i:i+1], handbrake[i:i+1])
+
+    # All the cars stepped at once.
+    batch = Simulator(n, pos, yaw, speed)
+    def after():
+        batch.step(throttle, steer, boost, handbrake)
+
+    before()
+    after()
+    assert np.allclose(np.concatenate([sim.block.physics for sim in singles]), batch.block.physics)
+
+    return before, after
+
+
+BENCHMARKS = [
+    bench_ball_prediction,
+    bench_packet_decode,
+    bench_orient_matrices,
+    bench_eta,
+    bench_nearest_pad,
+    bench_path_profile,
+    bench_route,
+    bench_render,
+    bench_render_polyline,
+    bench_simulate,
+]
+
+# -----------------------------------------------------------
+
+def run(benchmark, repeats : int = REPEATS):
+    """Times a benchmark and prints the per-call cost before and after.
+
+    Arguments:
+        benchmark {function} -- Returns the before and after callables.
+        repeats {int} -- Number of calls to average over.
+    """
+    before, after = benchmark()
+    before_us = timeit.timeit(before, number=repeats) / repeats * 1E6
+    after_us = timeit.timeit(after, number=repeats) / repeats * 1E6
+    print(f'{benchmark.__doc__:<50} {before_us:10.2f} us {after_us:10.2f} us {before_us/after_us:8.1f}x')
+
+
+if __name__ == '__main__':
+    print(f'{"":<50} {"before":>13} {"after":>13} {"speedup":>9}')
+    for benchmark in BENCHMARKS:
+        run(benchmark)
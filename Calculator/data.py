@@ -1,10 +1,110 @@
 '''Rocket League data processing.'''
 
-from utils import np, Car, Ball, BoostPad, Prediction, a3l, a3r, a3v, orient_matrix, turn_r
+import ctypes
+
+from rlbot.utils.structures.game_data_struct import GameTickPacket, PlayerInfo, BallInfo, BoostPadState, Physics
+
+from analysis import Analysis
+from pads import PadIndex
+from utils import np, Car, Ball, BoostPad, PacketBlock, a3v, a3p, orient_matrices, turn_r
+
+# -----------------------------------------------------------
+
+# PACKET LAYOUT:
+
+def struct_dtype(struct, fields : dict) -> np.dtype:
+    """Creates a numpy dtype which picks fields out of a ctypes struct.
+
+    Arguments:
+        struct {type} -- The ctypes struct class.
+        fields {dict} -- Maps field names to their numpy format.
+
+    Returns:
+        np.dtype -- Structured dtype with the same offsets and size as the struct.
+    """
+    return np.dtype({
+        'names'     : list(fields),
+        'formats'   : list(fields.values()),
+        'offsets'   : [getattr(struct, name).offset for name in fields],
+        'itemsize'  : ctypes.sizeof(struct)
+    })
+
+
+# Location, rotation, velocity and angular velocity are all c_float.
+PHYSICS_FORMAT = (np.float32, (4, 3))
+assert ctypes.sizeof(Physics) == np.dtype(PHYSICS_FORMAT).itemsize
+
+MAX_CARS = GameTickPacket.game_cars.size // ctypes.sizeof(PlayerInfo)
+MAX_PADS = GameTickPacket.game_boosts.size // ctypes.sizeof(BoostPadState)
+
+CAR_DTYPE = struct_dtype(PlayerInfo, {
+    'physics'           : PHYSICS_FORMAT,
+    'is_demolished'     : np.bool_,
+    'has_wheel_contact' : np.bool_,
+    'is_super_sonic'    : np.bool_,
+    'jumped'            : np.bool_,
+    'double_jumped'     : np.bool_,
+    'team'              : np.uint8,
+    'boost'             : np.int32
+})
+
+PAD_DTYPE = struct_dtype(BoostPadState, {
+    'is_active'         : np.bool_,
+    'timer'             : np.float32
+})
+
+BALL_DTYPE = struct_dtype(BallInfo, {
+    'physics'           : PHYSICS_FORMAT
+})
+
+PACKET_DTYPE = struct_dtype(GameTickPacket, {
+    'game_cars'         : (CAR_DTYPE, MAX_CARS),
+    'game_boosts'       : (PAD_DTYPE, MAX_PADS),
+    'game_ball'         : BALL_DTYPE
+})
+
+
+def packet_view(packet : GameTickPacket) -> np.void:
+    """Creates a structured numpy view over the packet without copying.
+
+    Arguments:
+        packet {GameTickPacket} -- Information about the game.
+
+    Returns:
+        np.void -- View with the fields of PACKET_DTYPE.
+    """
+    return np.frombuffer(packet, dtype=PACKET_DTYPE)[0]
+
+
+def decode(block : PacketBlock, view : np.void):
+    """Decodes the packet into the block with one bulk copy per column.
+
+    Arguments:
+        block {PacketBlock} -- The block to decode into.
+        view {np.void} -- Packet view from packet_view.
+    """
+    num_cars = len(block.team)
+    num_pads = len(block.pad_active)
+    cars = view['game_cars'][:num_cars]
+    pads = view['game_boosts'][:num_pads]
+
+    block.physics[:]    = cars['physics']
+    block.dead[:]       = cars['is_demolished']
+    block.wheel_c[:]    = cars['has_wheel_contact']
+    block.sonic[:]      = cars['is_super_sonic']
+    block.jumped[:]     = cars['jumped']
+    block.d_jumped[:]   = cars['double_jumped']
+    block.boost[:]      = cars['boost']
+    block.team[:]       = cars['team']
+    block.ball[:]       = view['game_ball']['physics']
+    block.pad_active[:] = pads['is_active']
+    block.pad_timer[:]  = pads['timer']
+
+# -----------------------------------------------------------
 
 def setup(self, packet, field_info):
     """Sets up the variables and classes for the agent.
-    
+
     Arguments:
         self {Calculator} -- The agent.
         packet {GameTickPacket} -- Information about the game.
@@ -20,20 +120,33 @@ def setup(self, packet, field_info):
     self.m_ended    = packet.game_info.is_match_ended
     self.gravity    = packet.game_info.world_gravity_z
 
+    # Creates the block which the packet gets decoded into.
+    self.block = PacketBlock(packet.num_cars, field_info.num_boosts)
+    self.packet = None
+    self.packet_view = None
+
     # Creates Car objects for each car.
     self.teammates  = []
     self.opponents  = []
     for index in range(packet.num_cars):
         car = packet.game_cars[index]
         if index == self.index:
-            self.player = Car(self.index, self.team, self.name)
+            self.player = Car(self.index, self.team, self.name, self.block)
         elif car.team == self.team:
-            self.teammates.append(Car(index, car.team, car.name))
+            self.teammates.append(Car(index, car.team, car.name, self.block))
         else:
-            self.opponents.append(Car(index, car.team, car.name))
-    
+            self.opponents.append(Car(index, car.team, car.name, self.block))
+
+    # Indices for looking up teammates and opponents in the block.
+    self.teammate_indices = np.array([teammate.index for teammate in self.teammates], dtype=int)
+    self.opponent_indices = np.array([opponent.index for opponent in self.opponents], dtype=int)
+
     # Creates a Ball object.
-    self.ball = Ball()
+    self.ball = Ball(self.block)
+    self.ball_prediction = None
+
+    # Creates the per-tick analysis.
+    self.analysis = Analysis(self)
 
     # Creates Boostpad objects.
     self.l_pads = []
@@ -41,9 +154,12 @@ def setup(self, packet, field_info):
     for i in range(field_info.num_boosts):
         pad = field_info.boost_pads[i]
         pad_type = self.l_pads if pad.is_full_boost else self.s_pads
-        pad_obj = BoostPad(i, a3v(pad.location))
+        pad_obj = BoostPad(i, a3v(pad.location), self.block)
         pad_type.append(pad_obj)
 
+    # Indexes every pad at once for the boost queries.
+    self.pads = PadIndex(field_info, self.block)
+
 
 def process(self, packet):
     """Processes the gametick packet.
@@ -62,75 +178,29 @@ def process(self, packet):
     self.m_ended    = packet.game_info.is_match_ended
     self.gravity    = packet.game_info.world_gravity_z
 
-    # Processing player data.
-        # From packet:
-    self.player.pos      = a3v(packet.game_cars[self.player.index].physics.location)
-    self.player.rot      = a3r(packet.game_cars[self.player.index].physics.rotation)
-    self.player.vel      = a3v(packet.game_cars[self.player.index].physics.velocity)
-    self.player.ang_vel  = a3v(packet.game_cars[self.player.index].physics.angular_velocity)
-    self.player.dead     = packet.game_cars[self.player.index].is_demolished
-    self.player.wheel_c  = packet.game_cars[self.player.index].has_wheel_contact
-    self.player.sonic    = packet.game_cars[self.player.index].is_super_sonic
-    self.player.jumped   = packet.game_cars[self.player.index].jumped
-    self.player.d_jumped = packet.game_cars[self.player.index].double_jumped
-    self.player.boost    = packet.game_cars[self.player.index].boost
-        # Calculated:
-    self.player.orient_m = orient_matrix(self.player.rot)
-    self.player.turn_r   = turn_r(self.player.vel)
-
-    '''
-    # Processing teammates.
-    for teammate in self.teammates:
-        # From packet:
-        teammate.pos        = a3v(packet.game_cars[teammate.index].physics.location)
-        teammate.rot        = a3r(packet.game_cars[teammate.index].physics.rotation)
-        teammate.vel        = a3v(packet.game_cars[teammate.index].physics.velocity)
-        teammate.ang_vel    = a3v(packet.game_cars[teammate.index].physics.angular_velocity)
-        teammate.dead       = packet.game_cars[teammate.index].is_demolished
-        teammate.wheel_c    = packet.game_cars[teammate.index].has_wheel_contact
-        teammate.sonic      = packet.game_cars[teammate.index].is_super_sonic
-        teammate.jumped     = packet.game_cars[teammate.index].jumped
-        teammate.d_jumped   = packet.game_cars[teammate.index].double_jumped
-        teammate.boost      = packet.game_cars[teammate.index].boost
-        # Calculated:
-        #teammate.orient_m   = orient_matrix(teammate.rot)
-        #teammate.turn_r     = turn_r(teammate.vel)
-    '''
-
-    # Processing opponents.
-    for opponent in self.opponents:
-        # From packet:
-        opponent.pos        = a3v(packet.game_cars[opponent.index].physics.location)
-        #opponent.rot        = a3r(packet.game_cars[opponent.index].physics.rotation)
-        opponent.vel        = a3v(packet.game_cars[opponent.index].physics.velocity)
-        opponent.ang_vel    = a3v(packet.game_cars[opponent.index].physics.angular_velocity)
-        opponent.dead       = packet.game_cars[opponent.index].is_demolished
-        #opponent.wheel_c    = packet.game_cars[opponent.index].has_wheel_contact
-        #opponent.sonic      = packet.game_cars[opponent.index].is_super_sonic
-        #opponent.jumped     = packet.game_cars[opponent.index].jumped
-        #opponent.d_jumped   = packet.game_cars[opponent.index].double_jumped
-        #opponent.boost      = packet.game_cars[opponent.index].boost
-        # Calculated:
-        #opponent.orient_m   = orient_matrix(opponent.rot)
-        #opponent.turn_r     = turn_r(opponent.vel)
+    # Decoding cars, ball and boost pads into the block.
+    # The packet view only needs remaking if we get a new packet.
+    if packet is not self.packet:
+        self.packet = packet
+        self.packet_view = packet_view(packet)
+    decode(self.block, self.packet_view)
+
+    # Calculating orientation and turn radius for every car at once.
+    orient_matrices(self.block.rot, out=self.block.orient_m)
+    self.block.turn_r[:] = turn_r(self.block.vel)
 
     # Processing Ball data.
-    self.ball.pos       = a3v(packet.game_ball.physics.location)
-    self.ball.rot       = a3r(packet.game_ball.physics.rotation)
-    self.ball.vel       = a3v(packet.game_ball.physics.velocity)
-    self.ball.ang_vel   = a3v(packet.game_ball.physics.angular_velocity)
     self.ball.last_touch = packet.game_ball.latest_touch
 
     # Processing ball prediction.
+    # The prediction views the struct directly, so it only needs remaking if we get a new struct.
     ball_prediction = self.get_ball_prediction_struct()
-    self.ball.predict.pos = np.array([[step.physics.location.x, step.physics.location.y, step.physics.location.z] for step in ball_prediction.slices])
-    self.ball.predict.vel = np.array([[step.physics.velocity.x, step.physics.velocity.y, step.physics.velocity.z] for step in ball_prediction.slices])
-    self.ball.predict.time = np.array([[step.game_seconds] for step in ball_prediction.slices])
+    if ball_prediction is not self.ball_prediction:
+        self.ball_prediction = ball_prediction
+        self.ball.predict = a3p(ball_prediction)
 
     # Processing Boostpads.
-    self.active_pads = []
-    for pad in self.l_pads + self.s_pads:
-        pad.active = packet.game_boosts[pad.index].is_active
-        pad.timer = packet.game_boosts[pad.index].timer
-        if pad.active == True:
-            self.active_pads.append(pad)
\ No newline at end of file
+    self.active_pads = [pad for pad in self.l_pads + self.s_pads if pad.active]
+
+    # New packet, so the analysis of the last one is out of date.
+    self.analysis.reset()
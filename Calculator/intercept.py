@@ -0,0 +1,93 @@
+'''Bounce intercepts from the ball prediction.'''
+
+import kinematics
+from utils import np, a3l, turn_r
+
+# Bounces are where the z velocity jumps up by at least this much near the ground.
+BOUNCE_DZ_VEL = 700
+BOUNCE_MAX_Z = 100
+
+# Slowest speed used for the turning estimate, so a stationary car can still turn.
+MIN_TURN_SPEED = 500
+
+# -----------------------------------------------------------
+
+class Bounces:
+    """Bounces in the ball prediction, scored by how reachable they are for the player.
+
+    Attributes:
+        time {float} -- Game time of the packet these were found for.
+        pos {np.ndarray} -- Ball position at each bounce, shape (n, 3).
+        times {np.ndarray} -- Game time of each bounce, shape (n,).
+        etas {np.ndarray} -- Estimated time for the player to drive to each bounce.
+        slack {np.ndarray} -- Time to spare when arriving at each bounce. Negative if too late.
+        reachable {np.ndarray} -- Whether the player can make it to each bounce.
+        best {int} -- Index of the earliest reachable bounce, or -1 if there are none.
+    """
+    __slots__ = [
+        'time',
+        'pos',
+        'times',
+        'etas',
+        'slack',
+        'reachable',
+        'best'
+    ]
+
+    def __init__(self, time : float, pos : np.ndarray, times : np.ndarray, etas : np.ndarray):
+        self.time       : float         = time
+        self.pos        : np.ndarray    = pos
+        self.times      : np.ndarray    = times
+        self.etas       : np.ndarray    = etas
+        self.slack      : np.ndarray    = times - (time + etas)
+        self.reachable  : np.ndarray    = self.slack >= 0
+        self.best       : int           = int(np.argmax(self.reachable)) if np.any(self.reachable) else -1
+
+
+def find_bounces(predict) -> tuple:
+    """Looks for bounces in the ball prediction.
+
+    Arguments:
+        predict {Prediction} -- The ball prediction.
+
+    Returns:
+        tuple -- Bounce positions of shape (n, 3) and times of shape (n,).
+    """
+    z_pos = predict.pos[:,2]
+    z_vel = predict.vel[:,2]
+    # Compares change in z velocity between ticks and whether the ball is on the ground.
+    bounce_bool = (z_vel[:-1] < z_vel[1:] - BOUNCE_DZ_VEL) & (z_pos[:-1] < BOUNCE_MAX_Z)
+    return predict.pos[:-1][bounce_bool], predict.time[:-1, 0][bounce_bool]
+
+
+def drive_times(car, targets : np.ndarray) -> np.ndarray:
+    """Estimates the time for a car to drive to each target.
+
+    Turns to face the target first, then drives straight, boosting while boost lasts.
+
+    Arguments:
+        car {Car} -- The car driving.
+        targets {np.ndarray} -- Target positions of shape (n, 3).
+
+    Returns:
+        np.ndarray -- Estimated times of shape (n,).
+    """
+    to_targets = targets - car.pos
+    distances = np.sqrt(np.einsum('ij,ij->i', to_targets, to_targets))
+
+    # Angle between where the car is facing and each target, on the ground plane.
+    forward = car.orient_m[:2,0]
+    flat = to_targets[:,:2]
+    cos_angle = np.einsum('ij,j->i', flat, forward) / np.maximum(np.linalg.norm(flat, axis=1), 1E-6) / max(np.linalg.norm(forward), 1E-6)
+    angles = np.arccos(np.clip(cos_angle, -1, 1))
+
+    # Turning at full lock for the current speed.
+    speed = np.linalg.norm(car.vel)
+    turn_speed = max(speed, MIN_TURN_SPEED)
+    turn_times = angles * turn_r(a3l([turn_speed, 0, 0])) / turn_speed
+
+    # Speed which is kept towards the target after turning.
+    forward_vel = max(np.dot(car.vel, car.orient_m[:,0]), 0)
+    start_vel = forward_vel * np.maximum(cos_angle, 0)
+
+    return turn_times + kinematics.time_to_dist(distances, start_vel, car.boost)
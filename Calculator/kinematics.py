@@ -0,0 +1,232 @@
+'''Drive kinematics from measured acceleration tables.
+
+The tables in tables/ hold time, velocity and distance of a car
+accelerating from rest in a straight line, with and without boost.
+Every query works on scalars or whole arrays at once.
+'''
+
+import os
+
+import numpy as np
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+
+# Boost used per second while boosting.
+BOOST_CONSUMPTION = 33.3
+
+# -----------------------------------------------------------
+
+# TABLES:
+
+def load_table(name : str) -> np.ndarray:
+    """Loads an acceleration table, using a cached .npy copy if it is up to date.
+
+    Arguments:
+        name {str} -- Name of the table file in tables/, without extension.
+
+    Returns:
+        np.ndarray -- Table of shape (n, 3) with time, velocity and distance columns.
+    """
+    txt_path = os.path.join(TABLE_DIR, name + '.txt')
+    npy_path = os.path.join(TABLE_DIR, name + '.npy')
+    if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(txt_path):
+        return np.load(npy_path)
+
+    table = np.loadtxt(txt_path, delimiter=',')
+    try:
+        np.save(npy_path, table)
+    except OSError:
+        # Read-only install; the text file will just be parsed every time.
+        pass
+    return table
+
+
+def lookup(xp : np.ndarray, fp : np.ndarray, x) -> np.ndarray:
+    """Linearly interpolates a monotonic table column with a binary search.
+
+    Arguments:
+        xp {np.ndarray} -- Increasing column to search in.
+        fp {np.ndarray} -- Column to read from.
+        x {float or np.ndarray} -- Values to look up. Clamped to the range of xp.
+
+    Returns:
+        np.ndarray -- Interpolated values of fp.
+    """
+    x = np.clip(x, xp[0], xp[-1])
+    i = np.clip(np.searchsorted(xp, x, side='right'), 1, len(xp) - 1)
+    x0 = xp[i - 1]
+    f0 = fp[i - 1]
+    return f0 + (x - x0) * (fp[i] - f0) / (xp[i] - x0)
+
+
+class AccelerationTable:
+    """Straight line acceleration of a car, starting from any velocity.
+
+    Past the end of the table the car is assumed to keep its top velocity.
+    A car already faster than the top velocity keeps its own velocity.
+
+    Attributes:
+        time {np.ndarray} -- Time since starting from rest.
+        vel {np.ndarray} -- Velocity at each time.
+        dist {np.ndarray} -- Distance travelled at each time.
+        top_vel {float} -- Velocity at the end of the table.
+    """
+    __slots__ = [
+        'time',
+        'vel',
+        'dist',
+        'top_vel'
+    ]
+
+    def __init__(self, table : np.ndarray):
+        self.time       : np.ndarray    = np.ascontiguousarray(table[:, 0])
+        self.vel        : np.ndarray    = np.ascontiguousarray(table[:, 1])
+        self.dist       : np.ndarray    = np.ascontiguousarray(table[:, 2])
+        self.top_vel    : float         = self.vel[-1]
+
+    def _time_and_dist(self, v0):
+        """Time and distance in the table at which velocity v0 is reached."""
+        v0 = np.clip(v0, 0, self.top_vel)
+        return lookup(self.vel, self.time, v0), lookup(self.vel, self.dist, v0)
+
+    def _dist_at_time(self, t):
+        """Distance in the table at absolute table time t."""
+        return lookup(self.time, self.dist, t) + self.top_vel * np.maximum(t - self.time[-1], 0)
+
+    def vel_at_time(self, t, v0 = 0.0) -> np.ndarray:
+        """Velocity after accelerating for some time.
+
+        Arguments:
+            t {float or np.ndarray} -- Time spent accelerating.
+
+        Keyword Arguments:
+            v0 {float or np.ndarray} -- Starting velocity. (default: {0.0})
+
+        Returns:
+            np.ndarray -- Final velocity.
+        """
+        t0, _ = self._time_and_dist(v0)
+        return np.maximum(lookup(self.time, self.vel, t0 + t), v0)
+
+    def dist_in_time(self, t, v0 = 0.0) -> np.ndarray:
+        """Distance travelled while accelerating for some time.
+
+        Arguments:
+            t {float or np.ndarray} -- Time spent accelerating.
+
+        Keyword Arguments:
+            v0 {float or np.ndarray} -- Starting velocity. (default: {0.0})
+
+        Returns:
+            np.ndarray -- Distance travelled.
+        """
+        t0, d0 = self._time_and_dist(v0)
+        return np.where(v0 > self.top_vel, v0 * t, self._dist_at_time(t0 + t) - d0)
+
+    def time_to_dist(self, d, v0 = 0.0) -> np.ndarray:
+        """Time needed to travel a distance while accelerating.
+
+        Arguments:
+            d {float or np.ndarray} -- Distance to travel.
+
+        Keyword Arguments:
+            v0 {float or np.ndarray} -- Starting velocity. (default: {0.0})
+
+        Returns:
+            np.ndarray -- Time taken.
+        """
+        t0, d0 = self._time_and_dist(v0)
+        end = d0 + d
+        t = lookup(self.dist, self.time, end) + np.maximum(end - self.dist[-1], 0) / self.top_vel - t0
+        return np.where(v0 > self.top_vel, d / np.maximum(v0, 1.0), t)
+
+    def dist_to_vel(self, v, v0 = 0.0) -> np.ndarray:
+        """Distance needed to accelerate to a velocity.
+
+        Arguments:
+            v {float or np.ndarray} -- Velocity to reach.
+
+        Keyword Arguments:
+            v0 {float or np.ndarray} -- Starting velocity. (default: {0.0})
+
+        Returns:
+            np.ndarray -- Distance needed. Zero if already that fast, inf if unreachable.
+        """
+        _, d0 = self._time_and_dist(v0)
+        _, d1 = self._time_and_dist(v)
+        d = np.maximum(d1 - d0, 0)
+        # The tables end just short of the round top velocity, hence the tolerance.
+        return np.where(v > self.top_vel + 1.0, np.inf, np.where(v <= v0, 0.0, d))
+
+
+THROTTLE = AccelerationTable(load_table('acceleration'))
+BOOST = AccelerationTable(load_table('boost_acceleration'))
+
+# -----------------------------------------------------------
+
+# QUERIES:
+
+def time_to_dist(d, v0 = 0.0, boost = 100.0) -> np.ndarray:
+    """Estimates the time to drive a distance in a straight line, boosting while boost lasts.
+
+    Arguments:
+        d {float or np.ndarray} -- Distance to travel.
+
+    Keyword Arguments:
+        v0 {float or np.ndarray} -- Starting forward velocity. (default: {0.0})
+        boost {float or np.ndarray} -- Boost available. (default: {100.0})
+
+    Returns:
+        np.ndarray -- Estimated time taken.
+    """
+    boost_time = boost / BOOST_CONSUMPTION
+    boosting = BOOST.time_to_dist(d, v0)
+
+    # If boost runs out, the rest is done on throttle alone.
+    boost_dist = BOOST.dist_in_time(boost_time, v0)
+    boost_vel = BOOST.vel_at_time(boost_time, v0)
+    rest = boost_time + THROTTLE.time_to_dist(np.maximum(d - boost_dist, 0), boost_vel)
+
+    return np.where(boosting <= boost_time, boosting, rest)
+
+
+def vel_at_time(t, v0 = 0.0, boost = 100.0) -> np.ndarray:
+    """Estimates the velocity after driving straight for some time, boosting while boost lasts.
+
+    Arguments:
+        t {float or np.ndarray} -- Time spent driving.
+
+    Keyword Arguments:
+        v0 {float or np.ndarray} -- Starting forward velocity. (default: {0.0})
+        boost {float or np.ndarray} -- Boost available. (default: {100.0})
+
+    Returns:
+        np.ndarray -- Estimated velocity.
+    """
+    boost_time = boost / BOOST_CONSUMPTION
+    boosting = BOOST.vel_at_time(np.minimum(t, boost_time), v0)
+    rest = THROTTLE.vel_at_time(np.maximum(t - boost_time, 0), boosting)
+    return np.where(t <= boost_time, boosting, rest)
+
+
+def dist_to_vel(v, v0 = 0.0, boost = 100.0) -> np.ndarray:
+    """Estimates the distance needed to reach a velocity, boosting while boost lasts.
+
+    Arguments:
+        v {float or np.ndarray} -- Velocity to reach.
+
+    Keyword Arguments:
+        v0 {float or np.ndarray} -- Starting forward velocity. (default: {0.0})
+        boost {float or np.ndarray} -- Boost available. (default: {100.0})
+
+    Returns:
+        np.ndarray -- Estimated distance. inf if the velocity can't be reached.
+    """
+    boost_time = boost / BOOST_CONSUMPTION
+    boosting = BOOST.dist_to_vel(v, v0)
+
+    # Reached before the boost runs out?
+    boost_vel = BOOST.vel_at_time(boost_time, v0)
+    rest = BOOST.dist_in_time(boost_time, v0) + THROTTLE.dist_to_vel(v, boost_vel)
+
+    return np.where(v <= boost_vel, boosting, rest)
@@ -0,0 +1,125 @@
+'''Boost pad index.
+
+Pad positions and sizes are read once from the FieldInfoPacket into arrays.
+Whether each pad is active and its timer are views of the PacketBlock,
+which data.decode refreshes from packet.game_boosts every tick, so every
+query covers all the pads in one vectorised call.
+'''
+
+from utils import np, PacketBlock
+
+# Seconds for a pad to come back after being picked up.
+LARGE_RESPAWN = 10.0
+SMALL_RESPAWN = 4.0
+
+LARGE_BOOST = 100
+SMALL_BOOST = 12
+
+# -----------------------------------------------------------
+
+class PadIndex:
+    """Every boost pad on the field, indexed the same as in the packet.
+
+    Attributes:
+        pos {np.ndarray} -- Pad positions, shape (p, 3).
+        large {np.ndarray} -- Whether each pad is a large pad.
+        boost {np.ndarray} -- Boost each pad gives.
+        respawn {np.ndarray} -- Time each pad takes to come back.
+        active {np.ndarray} -- Whether each pad is active, viewed from the block.
+        timer {np.ndarray} -- Time since each inactive pad was picked up, viewed from the block.
+    """
+    __slots__ = [
+        'pos',
+        'large',
+        'boost',
+        'respawn',
+        'active',
+        'timer'
+    ]
+
+    def __init__(self, field_info, block : PacketBlock):
+        num_pads = field_info.num_boosts
+        pads = field_info.boost_pads
+        self.pos        : np.ndarray    = np.array([[pads[i].location.x, pads[i].location.y, pads[i].location.z] for i in range(num_pads)]).reshape(-1, 3)
+        self.large      : np.ndarray    = np.array([pads[i].is_full_boost for i in range(num_pads)], dtype=bool)
+        self.boost      : np.ndarray    = np.where(self.large, LARGE_BOOST, SMALL_BOOST)
+        self.respawn    : np.ndarray    = np.where(self.large, LARGE_RESPAWN, SMALL_RESPAWN)
+        self.active     : np.ndarray    = block.pad_active
+        self.timer      : np.ndarray    = block.pad_timer
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def _mask(self, large : bool = None) -> np.ndarray:
+        """Which pads are of the asked for size. None for both."""
+        if large is None:
+            return np.ones(len(self), dtype=bool)
+        return self.large == large
+
+    def respawn_in(self) -> np.ndarray:
+        """Time until each pad is active. Zero for active pads."""
+        return np.where(self.active, 0.0, np.maximum(self.respawn - self.timer, 0.0))
+
+    def distances(self, pos : np.ndarray) -> np.ndarray:
+        """Distance from pos to each pad."""
+        to_pads = self.pos - pos
+        return np.sqrt(np.einsum('ij,ij->i', to_pads, to_pads))
+
+    def nearest_active(self, pos : np.ndarray, large : bool = None) -> int:
+        """Finds the closest pad which is active right now.
+
+        Arguments:
+            pos {np.ndarray} -- Position to measure from.
+
+        Keyword Arguments:
+            large {bool} -- Only large pads if True, only small if False, any if None. (default: {None})
+
+        Returns:
+            int -- Index of the pad, -1 if there are none.
+        """
+        distances = np.where(self.active & self._mask(large), self.distances(pos), np.inf)
+        i = int(np.argmin(distances)) if len(self) > 0 else -1
+        return i if i >= 0 and np.isfinite(distances[i]) else -1
+
+    def nearest_on_arrival(self, etas : np.ndarray, large : bool = None, allowed : np.ndarray = None) -> int:
+        """Finds the pad soonest reached which will be active by the time it is reached.
+
+        Arguments:
+            etas {np.ndarray} -- Time to get to each pad, shape (p,).
+
+        Keyword Arguments:
+            large {bool} -- Only large pads if True, only small if False, any if None. (default: {None})
+            allowed {np.ndarray} -- Extra mask of pads to consider, shape (p,). (default: {None})
+
+        Returns:
+            int -- Index of the pad, -1 if there are none.
+        """
+        ok = self._mask(large) & (self.respawn_in() <= etas)
+        if allowed is not None:
+            ok &= allowed
+        if not np.any(ok):
+            return -1
+        return int(np.argmin(np.where(ok, etas, np.inf)))
+
+    def in_corridor(self, start : np.ndarray, end : np.ndarray, width : float, active : bool = True) -> np.ndarray:
+        """Finds the pads near the straight line from start to end, on the ground plane.
+
+        Arguments:
+            start {np.ndarray} -- Start of the line.
+            end {np.ndarray} -- End of the line.
+            width {float} -- Furthest a pad can be from the line.
+
+        Keyword Arguments:
+            active {bool} -- Whether to only include active pads. (default: {True})
+
+        Returns:
+            np.ndarray -- Indices of the pads, ordered from start to end.
+        """
+        line = (end - start)[:2]
+        along = np.clip(np.dot(self.pos[:, :2] - start[:2], line) / max(np.dot(line, line), 1E-6), 0, 1)
+        off_line = np.linalg.norm(self.pos[:, :2] - (start[:2] + along[:, np.newaxis] * line), axis=1)
+        inside = off_line <= width
+        if active:
+            inside &= self.active
+        indices = np.flatnonzero(inside)
+        return indices[np.argsort(along[indices], kind='stable')]
@@ -0,0 +1,178 @@
+'''Velocity profiles along ground paths.
+
+A path is sampled as points of shape (..., n, 3), so many candidate paths
+can be profiled at once. Each point gets the fastest speed allowed by the
+curvature there, by accelerating from the start and by braking for what
+comes next.
+
+Both passes are done without stepping through the points. Accelerating
+along a path can be measured in distance: from the acceleration tables,
+a car at speed v is as fast as one that accelerated from rest for
+phase(v) units. Covering d more units can at best take it to
+phase(v) + d, so speed limits only ever pull this down and the forward
+pass is a cumulative minimum of phase minus distance. Braking is the same
+with v**2 / (2 * BRAKE_ACCEL) as the phase, taken from the end backwards.
+'''
+
+import kinematics
+from utils import np
+
+MAX_SPEED = 2300
+BRAKE_ACCEL = 3500
+
+# Tightest curvature a car can drive at each speed, sorted by curvature.
+CURVATURES = np.array([0.00088, 0.0011, 0.001375, 0.00235, 0.00396, 0.0069])
+CURVATURE_SPEEDS = np.array([2300, 1750, 1500, 1000, 500, 0.0])
+# Curvature which can't be driven at any speed.
+MAX_CURVATURE = CURVATURES[-1]
+
+# Past the end of an acceleration table speed only creeps up this slowly with distance,
+# so a car faster than the table keeps its speed instead of accelerating.
+COAST_SLOPE = 1E6
+
+# -----------------------------------------------------------
+
+# TABLES:
+
+class PhaseTable:
+    """Distance a car needs to accelerate from rest to each speed, and the inverse.
+
+    Attributes:
+        vel {np.ndarray} -- Increasing speeds.
+        dist {np.ndarray} -- Distance needed to reach each speed from rest.
+    """
+    __slots__ = [
+        'vel',
+        'dist'
+    ]
+
+    def __init__(self, table : kinematics.AccelerationTable):
+        top = max(table.top_vel, MAX_SPEED) + 1.0
+        self.vel    : np.ndarray    = np.append(table.vel, top)
+        self.dist   : np.ndarray    = np.append(table.dist, table.dist[-1] + (top - table.top_vel) * COAST_SLOPE)
+
+    def phase(self, v) -> np.ndarray:
+        """Distance needed to reach speed v from rest."""
+        return kinematics.lookup(self.vel, self.dist, v)
+
+    def speed(self, phase) -> np.ndarray:
+        """Speed after accelerating from rest for some distance."""
+        return kinematics.lookup(self.dist, self.vel, phase)
+
+
+THROTTLE = PhaseTable(kinematics.THROTTLE)
+BOOST = PhaseTable(kinematics.BOOST)
+
+# -----------------------------------------------------------
+
+# PROFILES:
+
+class PathProfile:
+    """Speed and timing along one or many paths.
+
+    Attributes:
+        dist {np.ndarray} -- Distance along the path at each point, shape (..., n).
+        curvature {np.ndarray} -- Curvature at each point.
+        max_vel {np.ndarray} -- Fastest speed the curvature allows at each point.
+        vel {np.ndarray} -- Speed at each point.
+        times {np.ndarray} -- Time taken to get to each point.
+        time {np.ndarray} -- Time taken to drive each path, shape (...).
+        drivable {np.ndarray} -- Whether each path never turns tighter than a car can.
+    """
+    __slots__ = [
+        'dist',
+        'curvature',
+        'max_vel',
+        'vel',
+        'times',
+        'time',
+        'drivable'
+    ]
+
+    def __init__(self, dist : np.ndarray, curvature : np.ndarray, max_vel : np.ndarray, vel : np.ndarray):
+        self.dist       : np.ndarray    = dist
+        self.curvature  : np.ndarray    = curvature
+        self.max_vel    : np.ndarray    = max_vel
+        self.vel        : np.ndarray    = vel
+
+        # Average speed over each step. A step with no speed at either end is never finished.
+        steps = np.diff(dist, axis=-1)
+        speeds = vel[..., :-1] + vel[..., 1:]
+        step_times = np.where(speeds > 0, 2 * steps / np.maximum(speeds, 1E-6), np.where(steps > 0, np.inf, 0.0))
+        self.times      : np.ndarray    = np.concatenate((np.zeros(dist.shape[:-1] + (1,)), np.cumsum(step_times, axis=-1)), axis=-1)
+        self.time       : np.ndarray    = self.times[..., -1]
+        self.drivable   : np.ndarray    = np.all(curvature < MAX_CURVATURE, axis=-1)
+
+
+def curvature(paths : np.ndarray) -> np.ndarray:
+    """Calculates the curvature of paths on the ground, ignoring z.
+
+    Arguments:
+        paths {np.ndarray} -- Points along the paths, shape (..., n, 3).
+
+    Returns:
+        np.ndarray -- Unsigned curvature at each point, shape (..., n).
+    """
+    dx, dy = np.moveaxis(np.gradient(paths[..., :2], axis=-2), -1, 0)
+    ddx, ddy = np.moveaxis(np.gradient(np.stack((dx, dy), axis=-1), axis=-2), -1, 0)
+    return np.abs(ddx * dy - dx * ddy) / np.maximum(dx * dx + dy * dy, 1E-9)**1.5
+
+
+def max_speed(k : np.ndarray) -> np.ndarray:
+    """Calculates the fastest speed at which some curvature can be driven.
+
+    Arguments:
+        k {np.ndarray} -- Curvature.
+
+    Returns:
+        np.ndarray -- Fastest speed. Zero where the curvature is too tight at any speed.
+    """
+    return np.interp(k, CURVATURES, CURVATURE_SPEEDS)
+
+
+def _forward(dist : np.ndarray, max_vel : np.ndarray, v0, table : PhaseTable) -> np.ndarray:
+    """Fastest speed at each point accelerating from v0, within max_vel."""
+    limit = table.phase(max_vel) - dist
+    limit[..., 0] = table.phase(v0)
+    return np.minimum(table.speed(np.minimum.accumulate(limit, axis=-1) + dist), max_vel)
+
+
+def profile(paths : np.ndarray, v0 = 0.0, boost = False, end_vel = np.inf) -> PathProfile:
+    """Works out how fast paths can be driven.
+
+    Arguments:
+        paths {np.ndarray} -- Points along the paths, shape (n, 3) or (..., n, 3).
+
+    Keyword Arguments:
+        v0 {float or np.ndarray} -- Speed at the start of each path. (default: {0.0})
+        boost {bool or np.ndarray} -- Whether to boost along each path. (default: {False})
+        end_vel {float or np.ndarray} -- Fastest speed allowed at the end of each path. (default: {np.inf})
+
+    Returns:
+        PathProfile -- Speeds and times along the paths.
+    """
+    paths = np.asarray(paths, dtype=float)
+    steps = np.linalg.norm(np.diff(paths, axis=-2), axis=-1)
+    dist = np.concatenate((np.zeros(steps.shape[:-1] + (1,)), np.cumsum(steps, axis=-1)), axis=-1)
+
+    k = curvature(paths)
+    max_vel = max_speed(k)
+    v0 = np.asarray(v0, dtype=float)
+    max_vel[..., 0] = v0
+    max_vel[..., -1] = np.minimum(max_vel[..., -1], end_vel)
+
+    # Forward pass, accelerating.
+    if np.all(boost):
+        vel = _forward(dist, max_vel, v0, BOOST)
+    elif not np.any(boost):
+        vel = _forward(dist, max_vel, v0, THROTTLE)
+    else:
+        boost = np.asarray(boost)[..., np.newaxis]
+        vel = np.where(boost, _forward(dist, max_vel, v0, BOOST), _forward(dist, max_vel, v0, THROTTLE))
+
+    # Backward pass, braking.
+    phase = vel**2 / (2 * BRAKE_ACCEL) + dist
+    phase = np.minimum.accumulate(phase[..., ::-1], axis=-1)[..., ::-1]
+    vel = np.minimum(np.sqrt(2 * BRAKE_ACCEL * np.maximum(phase - dist, 0)), vel)
+
+    return PathProfile(dist, k, max_vel, vel)
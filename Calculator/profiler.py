@@ -0,0 +1,142 @@
+'''Per-tick latency profiling.'''
+
+from time import perf_counter_ns
+
+import numpy as np
+
+# One frame at 120 ticks per second, in milliseconds.
+FRAME_MS = 1000.0 / 120.0
+
+# -----------------------------------------------------------
+
+class TickProfiler:
+    """Times the phases of each tick and keeps rolling percentiles.
+
+    Phase times go into a fixed-size ring buffer, so memory use stays
+    the same however long the match goes on for.
+
+    Usage per tick:
+        profiler.start()
+        ...
+        profiler.lap('process')
+        ...
+        profiler.lap('execute', label=state_name)
+        profiler.end()
+
+    Attributes:
+        phases {list} -- Names of the timed phases, in order.
+        budget_ms {float} -- Phase time in ms over which a labelled lap gets logged.
+        logger {Logger} -- Where budget overruns get logged. None to not log.
+        samples {np.ndarray} -- Ring buffer of phase times in ns, shape (size, len(phases) + 1). The last column is the whole tick.
+        ticks {int} -- Number of ticks recorded so far.
+        overruns {int} -- Number of labelled laps which went over budget.
+    """
+    __slots__ = [
+        'phases',
+        'budget_ms',
+        'logger',
+        'samples',
+        'ticks',
+        'overruns',
+        '_columns',
+        '_row',
+        '_tick_start',
+        '_lap_start'
+    ]
+
+    def __init__(self, phases : list, size : int = 1200, budget_ms : float = FRAME_MS, logger = None):
+        self.phases     : list          = list(phases)
+        self.budget_ms  : float         = budget_ms
+        self.logger                     = logger
+        self.samples    : np.ndarray    = np.zeros((size, len(self.phases) + 1), dtype=np.int64)
+        self.ticks      : int           = 0
+        self.overruns   : int           = 0
+        self._columns   : dict          = {phase: i for i, phase in enumerate(self.phases)}
+        self._row       : np.ndarray    = self.samples[0]
+        self._tick_start: int           = 0
+        self._lap_start : int           = 0
+
+    def start(self):
+        """Starts timing a new tick."""
+        self._row = self.samples[self.ticks % len(self.samples)]
+        self._row[:] = 0
+        self._tick_start = self._lap_start = perf_counter_ns()
+
+    def lap(self, phase : str, label : str = None) -> int:
+        """Records the time since the last lap (or the start) under a phase.
+
+        Arguments:
+            phase {str} -- Name of the phase which just finished.
+
+        Keyword Arguments:
+            label {str} -- If given, a lap over budget is logged with this label. (default: {None})
+
+        Returns:
+            int -- Time the phase took in ns.
+        """
+        now = perf_counter_ns()
+        elapsed = now - self._lap_start
+        self._lap_start = now
+        self._row[self._columns[phase]] += elapsed
+
+        if label is not None and elapsed > self.budget_ms * 1E6:
+            self.overruns += 1
+            if self.logger is not None:
+                self.logger.warning(f'{label} {phase} took {elapsed / 1E6:.2f} ms, budget is {self.budget_ms:.2f} ms')
+
+        return elapsed
+
+    def skip(self):
+        """Restarts the lap timer without recording anything."""
+        self._lap_start = perf_counter_ns()
+
+    def end(self):
+        """Finishes timing the tick."""
+        self._row[-1] = perf_counter_ns() - self._tick_start
+        self.ticks += 1
+
+    def percentiles(self, q : list = (50, 90, 99)) -> np.ndarray:
+        """Calculates percentiles of the recorded ticks.
+
+        Keyword Arguments:
+            q {list} -- Percentiles to calculate. (default: {(50, 90, 99)})
+
+        Returns:
+            np.ndarray -- Times in ms of shape (len(phases) + 1, len(q)). The last row is the whole tick.
+        """
+        recorded = self.samples[:min(self.ticks, len(self.samples))]
+        if len(recorded) == 0:
+            return np.zeros((self.samples.shape[1], len(q)))
+        return np.percentile(recorded, q, axis=0).T / 1E6
+
+    def report(self, q : list = (50, 90, 99)) -> str:
+        """Creates a table of the percentiles.
+
+        Keyword Arguments:
+            q {list} -- Percentiles to include. (default: {(50, 90, 99)})
+
+        Returns:
+            str -- The report.
+        """
+        header = f'{"phase":<10}' + ''.join(f'{f"p{p}":>9}' for p in q)
+        lines = [f'Tick profile over the last {min(self.ticks, len(self.samples))} of {self.ticks} ticks (ms):', header]
+        for name, row in zip(self.phases + ['total'], self.percentiles(q)):
+            lines.append(f'{name:<10}' + ''.join(f'{t:9.3f}' for t in row))
+        lines.append(f'{self.overruns} laps over the {self.budget_ms:.2f} ms budget.')
+        return '\n'.join(lines)
+
+    def render(self, r, x : int, y : int, q : list = (50, 99)):
+        """Draws the percentiles on screen. Call between begin_rendering and end_rendering.
+
+        Arguments:
+            r {RenderingManager} -- The renderer.
+            x {int} -- Left edge of the text in pixels.
+            y {int} -- Top edge of the text in pixels.
+
+        Keyword Arguments:
+            q {list} -- Percentiles to show. (default: {(50, 99)})
+        """
+        for i, (name, row) in enumerate(zip(self.phases + ['total'], self.percentiles(q))):
+            times = ' '.join(f'p{p} {t:.2f}' for p, t in zip(q, row))
+            colour = r.red() if row[-1] > self.budget_ms else r.white()
+            r.draw_string_2d(x, y + 20 * i, 1, 1, f'{name}: {times}', colour)
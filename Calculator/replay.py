@@ -0,0 +1,232 @@
+'''Recording and offline replay of game data.
+
+A recording is a gzipped stream of raw ctypes structs: a header,
+the field info once, then the packet and ball prediction of every tick.
+Replaying feeds a recording to Calculator.get_output without the game,
+which gives repeatable throughput and latency numbers.
+
+Run with `python replay.py <recording>` from this folder.
+'''
+
+import argparse
+import ctypes
+import gzip
+import struct
+from time import perf_counter_ns
+
+from rlbot.agents.base_agent import SimpleControllerState
+from rlbot.utils.rendering.rendering_manager import DummyRenderer, RenderingManager
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+
+from utils import np
+
+MAGIC = b'RLREPLAY'
+VERSION = 1
+
+# Magic, version, recording bot's index, and the sizes of the three structs.
+HEADER = struct.Struct('<8sIiIII')
+STRUCT_SIZES = (ctypes.sizeof(FieldInfoPacket), ctypes.sizeof(GameTickPacket), ctypes.sizeof(BallPrediction))
+
+# Controller fields saved for regression checks, in this order.
+CONTROLS = ['throttle', 'steer', 'pitch', 'yaw', 'roll', 'jump', 'boost', 'handbrake', 'use_item']
+
+# -----------------------------------------------------------
+
+# RECORDING:
+
+class Recorder:
+    """Writes game data to a recording file every tick.
+
+    Attributes:
+        file {GzipFile} -- The recording being written.
+        ticks {int} -- Number of ticks written so far.
+    """
+    __slots__ = [
+        'file',
+        'ticks'
+    ]
+
+    def __init__(self, path : str, field_info : FieldInfoPacket, index : int = -1):
+        self.file   : gzip.GzipFile = gzip.open(path, 'wb', compresslevel=1)
+        self.ticks  : int           = 0
+        self.file.write(HEADER.pack(MAGIC, VERSION, index, *STRUCT_SIZES))
+        self.file.write(field_info)
+
+    def record(self, packet : GameTickPacket, ball_prediction : BallPrediction):
+        """Writes one tick of game data.
+
+        Arguments:
+            packet {GameTickPacket} -- Information about the game.
+            ball_prediction {BallPrediction} -- The ball prediction for this tick.
+        """
+        self.file.write(packet)
+        self.file.write(ball_prediction)
+        self.ticks += 1
+
+    def close(self):
+        """Finishes the recording."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Recording:
+    """Reads a recording back one tick at a time.
+
+    The same packet and ball prediction structs are refilled every tick, just like in a real match.
+
+    Attributes:
+        index {int} -- Index of the bot which made the recording, or -1.
+        field_info {FieldInfoPacket} -- Information about the game field.
+        packet {GameTickPacket} -- Packet of the current tick.
+        ball_prediction {BallPrediction} -- Ball prediction of the current tick.
+    """
+    __slots__ = [
+        'file',
+        'index',
+        'field_info',
+        'packet',
+        'ball_prediction'
+    ]
+
+    def __init__(self, path : str):
+        self.file = gzip.open(path, 'rb')
+        magic, version, self.index, *sizes = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} recording.')
+        if tuple(sizes) != STRUCT_SIZES:
+            raise ValueError(f'{path} was recorded with different struct sizes {tuple(sizes)}, expected {STRUCT_SIZES}.')
+
+        self.field_info         : FieldInfoPacket   = FieldInfoPacket()
+        self.packet             : GameTickPacket    = GameTickPacket()
+        self.ball_prediction    : BallPrediction    = BallPrediction()
+        self.file.readinto(self.field_info)
+
+    def __iter__(self):
+        """Refills the packet and ball prediction with each recorded tick.
+
+        Yields:
+            GameTickPacket -- The refilled packet.
+        """
+        packet_size = ctypes.sizeof(self.packet)
+        while self.file.readinto(self.packet) == packet_size:
+            self.file.readinto(self.ball_prediction)
+            yield self.packet
+        self.file.close()
+
+# -----------------------------------------------------------
+
+# REPLAY:
+
+def controls_to_array(ctrl : SimpleControllerState) -> np.ndarray:
+    """Converts controller state to an array for comparing runs.
+
+    Arguments:
+        ctrl {SimpleControllerState} -- The controls.
+
+    Returns:
+        np.ndarray -- The fields of CONTROLS as floats.
+    """
+    return np.array([float(getattr(ctrl, name)) for name in CONTROLS])
+
+
+def make_agent(recording : Recording, index : int):
+    """Creates a Calculator which runs without the game.
+
+    Arguments:
+        recording {Recording} -- Where the agent gets field info and ball prediction from.
+        index {int} -- Index of the car the agent controls.
+
+    Returns:
+        Calculator -- The agent, already initialised.
+    """
+    from Calculator import Calculator
+
+    car = recording.packet.game_cars[index]
+    agent = Calculator(car.name, car.team, index)
+    agent._register_field_info(lambda: recording.field_info)
+    agent._register_ball_prediction_struct(lambda: recording.ball_prediction)
+    agent._register_quick_chat(lambda *args, **kwargs: None)
+    agent._set_renderer(DummyRenderer(RenderingManager()))
+    agent.initialize_agent()
+    return agent
+
+
+def replay(path : str, indices : list = None) -> tuple:
+    """Feeds a recording to Calculators and times every get_output.
+
+    Arguments:
+        path {str} -- Path to the recording.
+
+    Keyword Arguments:
+        indices {list} -- Car indices to run a Calculator for. Defaults to the recording bot. (default: {None})
+
+    Returns:
+        tuple -- Latencies in ns of shape (ticks, agents) and controls of shape (ticks, agents, len(CONTROLS)).
+    """
+    recording = Recording(path)
+    agents = None
+    latencies = []
+    controls = []
+
+    for packet in recording:
+        # The cars are only known after the first packet.
+        if agents is None:
+            if indices is None:
+                indices = [recording.index]
+            agents = [make_agent(recording, index) for index in indices]
+
+        tick_latencies = []
+        tick_controls = []
+        for agent in agents:
+            start = perf_counter_ns()
+            ctrl = agent.get_output(packet)
+            tick_latencies.append(perf_counter_ns() - start)
+            tick_controls.append(controls_to_array(ctrl))
+
+        latencies.append(tick_latencies)
+        controls.append(tick_controls)
+
+    for agent in agents or []:
+        agent.retire()
+
+    return np.array(latencies, dtype=np.int64), np.array(controls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays a recording through Calculator without the game.')
+    parser.add_argument('recording', help='Path to the recording.')
+    parser.add_argument('--index', type=int, nargs='+', help='Car indices to run Calculator for.')
+    parser.add_argument('--save', help='Save the controls to this .npy file.')
+    parser.add_argument('--check', help='Compare the controls against this .npy file.')
+    args = parser.parse_args()
+
+    latencies, controls = replay(args.recording, args.index)
+    if len(latencies) == 0:
+        print('The recording has no ticks.')
+        return
+
+    p50, p90, p99 = np.percentile(latencies, (50, 90, 99)) / 1E6
+    print(f'{len(latencies)} ticks, {latencies.shape[1]} agents')
+    print(f'{len(latencies) / (latencies.sum() / 1E9):.0f} ticks/s')
+    print(f'get_output latency (ms): p50 {p50:.3f}  p90 {p90:.3f}  p99 {p99:.3f}  max {latencies.max() / 1E6:.3f}')
+
+    if args.save:
+        np.save(args.save, controls)
+    if args.check:
+        expected = np.load(args.check)
+        if expected.shape != controls.shape:
+            raise SystemExit(f'Controls have shape {controls.shape}, expected {expected.shape}.')
+        mismatches = np.any(~np.isclose(controls, expected), axis=(1, 2))
+        if np.any(mismatches):
+            raise SystemExit(f'Controls differ on {np.count_nonzero(mismatches)} ticks, first on tick {np.argmax(mismatches)}.')
+        print('Controls match.')
+
+
+if __name__ == '__main__':
+    main()
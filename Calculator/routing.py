@@ -0,0 +1,216 @@
+'''Ground routes from the car to a target.
+
+Candidate paths are quadratic Beziers and cubic Hermite curves from the
+car's position and heading to the target, plus two-piece Hermite detours
+through boost pads near the way. All of them are sampled into one
+(K, N, 3) array, profiled together with paths.profile, and the fastest
+drivable one is chosen. Boost picked up on a detour is counted as time
+saved, so a pad only wins when it is worth the extra driving.
+
+This is a library for now: no state drives along its routes yet.
+'''
+
+import kinematics
+import paths
+from utils import np, normalise
+
+# Points along each candidate. Odd, so a detour splits evenly around its pad.
+SAMPLES = 41
+
+# Handle lengths of the quadratic Beziers, as fractions of the distance to the target.
+BEZIER_HANDLES = np.array([0.1, 0.25, 0.4, 0.6])
+# Start and end tangent lengths of the Hermite curves, as fractions of the distance.
+HERMITE_SCALES = np.array([0.3, 0.7, 1.2])
+
+# Pads further than this from the straight line to the target aren't considered for a detour.
+DETOUR_RANGE = 1000
+MAX_DETOURS = 8
+
+# Seconds a full tank of boost is worth when deciding on a detour.
+BOOST_VALUE = 1.0
+
+# -----------------------------------------------------------
+
+# CURVES:
+
+def bezier_quadratic(p0 : np.ndarray, p1 : np.ndarray, p2 : np.ndarray, t : np.ndarray) -> np.ndarray:
+    """Samples quadratic Bezier curves.
+
+    Arguments:
+        p0, p1, p2 {np.ndarray} -- Control points, shape (..., 3).
+        t {np.ndarray} -- Parameters to sample at, shape (n,).
+
+    Returns:
+        np.ndarray -- Points along the curves, shape (..., n, 3).
+    """
+    t = t[:, np.newaxis]
+    p0, p1, p2 = (p[..., np.newaxis, :] for p in (p0, p1, p2))
+    return (1-t)**2*p0 + 2*(1-t)*t*p1 + t**2*p2
+
+
+def hermite(p0 : np.ndarray, m0 : np.ndarray, p1 : np.ndarray, m1 : np.ndarray, t : np.ndarray) -> np.ndarray:
+    """Samples cubic Hermite curves.
+
+    Arguments:
+        p0, p1 {np.ndarray} -- Start and end points, shape (..., 3).
+        m0, m1 {np.ndarray} -- Start and end tangents, shape (..., 3).
+        t {np.ndarray} -- Parameters to sample at, shape (n,).
+
+    Returns:
+        np.ndarray -- Points along the curves, shape (..., n, 3).
+    """
+    t = t[:, np.newaxis]
+    p0, m0, p1, m1 = (p[..., np.newaxis, :] for p in (p0, m0, p1, m1))
+    return (2*t**3 - 3*t**2 + 1)*p0 + (t**3 - 2*t**2 + t)*m0 + (-2*t**3 + 3*t**2)*p1 + (t**3 - t**2)*m1
+
+# -----------------------------------------------------------
+
+# ROUTES:
+
+class Route:
+    """The chosen route to a target.
+
+    Attributes:
+        path {np.ndarray} -- Points along the route, shape (n, 3).
+        vel {np.ndarray} -- Speed at each point.
+        times {np.ndarray} -- Time taken to get to each point.
+        time {float} -- Time taken to drive the route.
+        pad {int} -- Index of the pad the route goes through, -1 if none.
+        drivable {bool} -- Whether the route never turns tighter than a car can.
+        candidates {int} -- Number of candidates it was chosen from.
+    """
+    __slots__ = [
+        'path',
+        'vel',
+        'times',
+        'time',
+        'pad',
+        'drivable',
+        'candidates'
+    ]
+
+    def __init__(self, path : np.ndarray, profile : paths.PathProfile, i : int, pad : int):
+        self.path       : np.ndarray    = path[i]
+        self.vel        : np.ndarray    = profile.vel[i]
+        self.times      : np.ndarray    = profile.times[i]
+        self.time       : float         = float(profile.time[i])
+        self.pad        : int           = pad
+        self.drivable   : bool          = bool(profile.drivable[i])
+        self.candidates : int           = len(path)
+
+
+def candidates(pos : np.ndarray, forward : np.ndarray, target : np.ndarray, target_dir : np.ndarray = None, pads : np.ndarray = None) -> np.ndarray:
+    """Samples every candidate path from the car to the target.
+
+    Arguments:
+        pos {np.ndarray} -- Position of the car.
+        forward {np.ndarray} -- Forward direction of the car.
+        target {np.ndarray} -- Position to get to.
+
+    Keyword Arguments:
+        target_dir {np.ndarray} -- Direction to face at the target, or None for any. (default: {None})
+        pads {np.ndarray} -- Positions of pads to try a detour through, shape (p, 3). (default: {None})
+
+    Returns:
+        np.ndarray -- Points along the candidates, shape (k, SAMPLES, 3). Detours come last, in the order of pads.
+    """
+    forward = normalise(forward * [1, 1, 0])
+    to_target = (target - pos) * [1, 1, 0]
+    distance = np.linalg.norm(to_target)
+    end_dir = normalise(to_target) if target_dir is None else normalise(target_dir * [1, 1, 0])
+    t = np.linspace(0, 1, SAMPLES)
+
+    # Beziers leave along the car's heading and arrive however they like.
+    handles = pos + forward * (BEZIER_HANDLES[:, np.newaxis] * distance)
+    beziers = bezier_quadratic(pos, handles, target, t)
+
+    # Hermites leave along the car's heading and arrive facing end_dir.
+    start, end = np.meshgrid(HERMITE_SCALES, HERMITE_SCALES)
+    start = forward * (start.reshape(-1, 1) * distance)
+    end = end_dir * (end.reshape(-1, 1) * distance)
+    hermites = hermite(pos, start, target, end, t)
+
+    if pads is None or len(pads) == 0:
+        return np.concatenate((beziers, hermites))
+
+    # Detours pass through the pad heading between where they came from and where they go next.
+    # Both halves share the tangent at the pad and the parameter step, so the join is smooth.
+    half = SAMPLES // 2
+    to_pad = (pads - pos) * [1, 1, 0]
+    from_pad = (target - pads) * [1, 1, 0]
+    d0 = np.linalg.norm(to_pad, axis=1, keepdims=True)
+    d1 = np.linalg.norm(from_pad, axis=1, keepdims=True)
+    via_dir = to_pad / np.maximum(d0, 1E-6) + from_pad / np.maximum(d1, 1E-6)
+    via_dir /= np.maximum(np.linalg.norm(via_dir, axis=1, keepdims=True), 1E-6)
+    via = via_dir * (d0 + d1) / 2
+    first = hermite(pos, forward * d0, pads, via, np.linspace(0, 1, half + 1)[:-1])
+    second = hermite(pads, via, target, end_dir * d1, np.linspace(0, 1, half + 1))
+    detours = np.concatenate((first, second), axis=1)
+
+    return np.concatenate((beziers, hermites, detours))
+
+
+def nearby_pads(pos : np.ndarray, target : np.ndarray, pads : np.ndarray) -> np.ndarray:
+    """Finds the pads closest to the straight line from pos to target.
+
+    Arguments:
+        pos {np.ndarray} -- Start of the line.
+        target {np.ndarray} -- End of the line.
+        pads {np.ndarray} -- Pad positions, shape (p, 3).
+
+    Returns:
+        np.ndarray -- Indices of up to MAX_DETOURS pads within DETOUR_RANGE of the line, closest first.
+    """
+    if len(pads) == 0:
+        return np.zeros(0, dtype=int)
+    line = (target - pos)[:2]
+    t = np.clip(np.dot(pads[:, :2] - pos[:2], line) / max(np.dot(line, line), 1E-6), 0, 1)
+    off_line = np.linalg.norm(pads[:, :2] - (pos[:2] + t[:, np.newaxis] * line), axis=1)
+    order = np.argsort(off_line)[:MAX_DETOURS]
+    return order[off_line[order] <= DETOUR_RANGE]
+
+
+def route(pos : np.ndarray, forward : np.ndarray, vel : np.ndarray, boost : float, target : np.ndarray,
+          target_dir : np.ndarray = None, pads : np.ndarray = None, pad_boost : np.ndarray = None) -> Route:
+    """Picks the fastest drivable route to a target.
+
+    Arguments:
+        pos {np.ndarray} -- Position of the car.
+        forward {np.ndarray} -- Forward direction of the car.
+        vel {np.ndarray} -- Velocity of the car.
+        boost {float} -- Boost the car has.
+        target {np.ndarray} -- Position to get to.
+
+    Keyword Arguments:
+        target_dir {np.ndarray} -- Direction to face at the target, or None for any. (default: {None})
+        pads {np.ndarray} -- Positions of active pads which could be picked up on the way, shape (p, 3). (default: {None})
+        pad_boost {np.ndarray} -- Boost each of those pads gives. Required with pads. (default: {None})
+
+    Returns:
+        Route -- The fastest drivable candidate, or the fastest of all if none are drivable.
+    """
+    if pads is not None and pad_boost is None:
+        raise ValueError('pad_boost is needed to route through pads.')
+    near = nearby_pads(pos, target, pads) if pads is not None else np.zeros(0, dtype=int)
+    path = candidates(pos, forward, target, target_dir, pads[near] if len(near) > 0 else None)
+    v0 = max(np.dot(vel, normalise(forward)), 0.0)
+
+    # Candidates are only profiled boosting if the boost lasts the whole way, like kinematics.time_to_dist.
+    profile = paths.profile(path, v0, boost > 0)
+    if boost > 0:
+        covered = profile.time <= boost / kinematics.BOOST_CONSUMPTION
+        if not np.all(covered):
+            profile = paths.profile(path, v0, covered)
+
+    # Boost picked up on a detour makes up for some of the time it takes.
+    pad = np.full(len(path), -1)
+    pad[len(path) - len(near):] = near
+    credit = np.zeros(len(path))
+    if len(near) > 0:
+        gained = np.minimum(pad_boost[near], 100 - boost)
+        credit[len(path) - len(near):] = BOOST_VALUE * gained / 100
+
+    score = profile.time - credit
+    i = int(np.argmin(np.where(profile.drivable, score, np.inf))) if np.any(profile.drivable) else int(np.argmin(score))
+    return Route(path, profile, i, int(pad[i]))
+
@@ -0,0 +1,251 @@
+'''Headless ground driving simulator.
+
+A stand-in for the game to try controllers on, stepping many cars at once
+at 120 Hz on flat ground. Speeding up follows the acceleration tables in
+kinematics, with throttle scaled like speed_controller assumes, braking
+and coasting use speed_controller's decelerations, and turning follows
+the turn radius fit in utils.turn_r. There is no jumping, no walls, no
+ball and no collisions, so results are only as good as those fits.
+
+Cars live in a PacketBlock like the one data.decode fills, so utils.Car
+views and the controllers in states work on simulated cars unchanged.
+'''
+
+import kinematics
+from utils import np, PacketBlock, Car, orient_matrices, turn_r
+
+DT = 1 / 120
+
+# Height of a car's centre of mass when resting on the ground.
+GROUND_HEIGHT = 17.01
+
+# Accelerations in uu/s^2, from speed_controller.
+BRAKE_ACCEL = 3500
+COAST_ACCEL = 525
+
+MAX_SPEED = 2300
+# Top speed reachable without boost, and the top speed going backwards.
+MAX_THROTTLE_SPEED = 1410
+
+# Throttle and steer below this count as none.
+DEADZONE = 0.01
+
+# The handbrake tightens turns by this factor, and lets the car slide:
+# sideways velocity only decays at this rate per second instead of straight away.
+HANDBRAKE_TURN = 1.5
+HANDBRAKE_GRIP = 4.0
+
+# -----------------------------------------------------------
+
+# CONTROLS:
+
+def controls(ctrls : list) -> tuple:
+    """Converts controller states to arrays for Simulator.step.
+
+    Arguments:
+        ctrls {list} -- A SimpleControllerState or PlayerInput for each car.
+
+    Returns:
+        tuple -- Arrays of throttle, steer, boost and handbrake.
+    """
+    throttle = np.array([ctrl.throttle for ctrl in ctrls], dtype=float)
+    steer = np.array([ctrl.steer for ctrl in ctrls], dtype=float)
+    boost = np.array([ctrl.boost for ctrl in ctrls], dtype=bool)
+    handbrake = np.array([ctrl.handbrake for ctrl in ctrls], dtype=bool)
+    return throttle, steer, boost, handbrake
+
+
+def throttle_accel(speed : np.ndarray) -> np.ndarray:
+    """Acceleration at full throttle from the acceleration table, for speeds going forwards.
+
+    Arguments:
+        speed {np.ndarray} -- Forward speeds.
+
+    Returns:
+        np.ndarray -- Acceleration over the next tick.
+    """
+    return (kinematics.THROTTLE.vel_at_time(DT, speed) - speed) / DT
+
+
+def boost_accel(speed : np.ndarray) -> np.ndarray:
+    """Acceleration at full throttle while boosting, from the boost acceleration table.
+
+    Past the end of the table, where the car is nearly at top speed, it keeps the table's last acceleration.
+
+    Arguments:
+        speed {np.ndarray} -- Forward speeds.
+
+    Returns:
+        np.ndarray -- Acceleration over the next tick.
+    """
+    table = kinematics.BOOST
+    accel = (table.vel_at_time(DT, speed) - speed) / DT
+    last = (table.vel[-1] - table.vel[-2]) / (table.time[-1] - table.time[-2])
+    return np.where(speed < table.top_vel, accel, last)
+
+# -----------------------------------------------------------
+
+# SIMULATOR:
+
+class SimAgent:
+    """Stands in for the agent when running a controller on a simulated car.
+
+    Attributes:
+        player {Car} -- The car, viewing the simulator's block.
+        sim {Simulator} -- The simulator.
+        dt {float} -- Time step.
+    """
+    __slots__ = [
+        'player',
+        'sim',
+        'dt'
+    ]
+
+    def __init__(self, player : Car, sim):
+        self.player : Car       = player
+        self.sim                = sim
+        self.dt     : float     = DT
+
+    @property
+    def game_time(self) -> float:
+        return self.sim.time
+
+
+class Simulator:
+    """Steps the ground driving of many cars at once.
+
+    Attributes:
+        block {PacketBlock} -- Car state, like data.decode fills it.
+        time {float} -- Simulated time in seconds.
+        ticks {int} -- Number of ticks stepped.
+    """
+    __slots__ = [
+        'block',
+        'time',
+        'ticks'
+    ]
+
+    def __init__(self, num_cars : int, pos : np.ndarray = None, yaw : np.ndarray = None, speed : np.ndarray = None, boost : np.ndarray = None):
+        """Places the cars on the ground.
+
+        Arguments:
+            num_cars {int} -- Number of cars.
+
+        Keyword Arguments:
+            pos {np.ndarray} -- Positions, shape (num_cars, 3). Height is ignored. (default: {None})
+            yaw {np.ndarray} -- Headings. (default: {None})
+            speed {np.ndarray} -- Forward speeds. (default: {None})
+            boost {np.ndarray} -- Boost amounts. (default: {None})
+        """
+        self.block  : PacketBlock   = PacketBlock(num_cars, 0)
+        self.time   : float         = 0.0
+        self.ticks  : int           = 0
+
+        block = self.block
+        if pos is not None:
+            block.pos[:] = pos
+        block.pos[:, 2] = GROUND_HEIGHT
+        if yaw is not None:
+            block.rot[:, 1] = yaw
+        orient_matrices(block.rot, out=block.orient_m)
+        if speed is not None:
+            block.vel[:] = block.orient_m[:, :, 0] * np.reshape(speed, (-1, 1))
+        block.boost[:] = 33 if boost is None else boost
+        block.wheel_c[:] = True
+        block.turn_r[:] = turn_r(block.vel)
+
+    def __len__(self) -> int:
+        return len(self.block.pos)
+
+    def cars(self) -> list:
+        """Car views of every simulated car."""
+        return [Car(i, 0, f'sim{i}', self.block) for i in range(len(self))]
+
+    def agents(self) -> list:
+        """Agent stand-ins for every simulated car, to pass to controllers."""
+        return [SimAgent(car, self) for car in self.cars()]
+
+    def step(self, throttle, steer, boost, handbrake):
+        """Moves every car on by one tick.
+
+        Arguments:
+            throttle {np.ndarray} -- Throttle of each car, -1 to 1.
+            steer {np.ndarray} -- Steer of each car, -1 to 1. Positive turns right.
+            boost {np.ndarray} -- Whether each car is boosting.
+            handbrake {np.ndarray} -- Whether each car is holding the handbrake.
+        """
+        block = self.block
+        throttle = np.clip(throttle, -1.0, 1.0)
+        steer = np.clip(steer, -1.0, 1.0)
+        boosting = np.asarray(boost, dtype=bool) & (block.boost > 0)
+        handbrake = np.asarray(handbrake, dtype=bool)
+
+        forward = block.orient_m[:, :, 0]
+        right = block.orient_m[:, :, 1]
+        forward_vel = np.einsum('ij,ij->i', block.vel, forward)
+        side_vel = np.einsum('ij,ij->i', block.vel, right)
+
+        # Driving in the direction of the throttle speeds up, against it brakes.
+        # Boost always pushes forwards, on top of full throttle.
+        direction = np.sign(forward_vel)
+        speed = np.abs(forward_vel)
+        pushing = np.abs(throttle) > DEADZONE
+        with_motion = pushing & ((direction == 0) | (np.sign(throttle) == direction))
+        accel = np.where(with_motion, np.abs(throttle) * throttle_accel(speed), 0.0) * np.where(direction == 0, np.sign(throttle), direction)
+        accel = np.where(pushing & ~with_motion, -direction * BRAKE_ACCEL, accel)
+        accel = np.where(~pushing, -direction * np.minimum(COAST_ACCEL, speed / DT), accel)
+        forwards = forward_vel >= 0
+        accel = np.where(boosting & forwards, boost_accel(speed), accel)
+        accel = np.where(boosting & ~forwards, BRAKE_ACCEL, accel)
+
+        new_forward_vel = forward_vel + accel * DT
+        # Braking and coasting stop at zero instead of reversing.
+        stopped = ~with_motion & ~boosting & (np.sign(new_forward_vel) != direction)
+        new_forward_vel = np.where(stopped, 0.0, new_forward_vel)
+        top = np.where(boosting | (new_forward_vel > MAX_THROTTLE_SPEED), MAX_SPEED, MAX_THROTTLE_SPEED)
+        new_forward_vel = np.clip(new_forward_vel, -MAX_THROTTLE_SPEED, np.maximum(top, forward_vel))
+        new_forward_vel = np.minimum(new_forward_vel, MAX_SPEED)
+
+        # Turning follows the turn radius for the car's speed, tighter with the handbrake.
+        curvature = steer / turn_r(block.vel)
+        curvature = np.where(handbrake, curvature * HANDBRAKE_TURN, curvature)
+        yaw_rate = curvature * new_forward_vel
+
+        # Sideways velocity is gone straight away unless sliding on the handbrake.
+        grip = np.where(handbrake, np.exp(-HANDBRAKE_GRIP * DT), 0.0)
+        new_side_vel = side_vel * grip
+
+        block.vel[:] = forward * new_forward_vel[:, np.newaxis] + right * new_side_vel[:, np.newaxis]
+        block.vel[:, 2] = 0.0
+        block.pos += block.vel * DT
+        block.ang_vel[:, 2] = yaw_rate
+        block.rot[:, 1] = (block.rot[:, 1] + yaw_rate * DT + np.pi) % (2 * np.pi) - np.pi
+
+        block.boost[:] = np.maximum(block.boost - boosting * kinematics.BOOST_CONSUMPTION * DT, 0.0)
+        orient_matrices(block.rot, out=block.orient_m)
+        block.sonic[:] = np.linalg.norm(block.vel, axis=1) >= 2200
+        block.turn_r[:] = turn_r(block.vel)
+
+        self.time += DT
+        self.ticks += 1
+
+    def step_controls(self, ctrls : list):
+        """Moves every car on by one tick, with a SimpleControllerState or PlayerInput for each car."""
+        self.step(*controls(ctrls))
+
+    def rollout(self, controller, ticks : int, *args) -> np.ndarray:
+        """Runs a controller on every car for a number of ticks.
+
+        Arguments:
+            controller {function} -- Called as controller(agent, *args) for each car, returns its controls.
+            ticks {int} -- Number of ticks to run for.
+
+        Returns:
+            np.ndarray -- Positions of the cars after each tick, shape (ticks, num_cars, 3).
+        """
+        agents = self.agents()
+        path = np.empty((ticks, len(self), 3))
+        for tick in range(ticks):
+            self.step_controls([controller(agent, *args) for agent in agents])
+            path[tick] = self.block.pos
+        return path
@@ -2,6 +2,7 @@
 
 from rlbot.agents.base_agent import SimpleControllerState
 
+import kinematics
 from utils import np, a3l, local, world, angle_between_vectors, normalise, cap, aerial_input_generate, team_sign, linear_predict, special_sauce #circular_predict 
 
 blue_inside_goal = a3l([0, -5120, 0])
@@ -140,18 +141,8 @@ class Catch(BaseState):
     
     @staticmethod
     def available(agent):
-        bounces, times = Catch.get_bounces(agent)
-        if len(bounces) > 0:
-            # If there are some bounces, calculate the distance to them.
-            vectors = bounces - agent.player.pos
-            distances = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
-                
-            # Check if the bounces are reachable (rough estimate).
-            good_time = distances/1000 <= np.squeeze(times)
-            return np.count_nonzero(good_time) > 0
-
-        else:
-            return False
+        # Check if any of the bounces are reachable.
+        return agent.analysis.bounces.best != -1
 
     def execute(self, agent):
 
@@ -161,23 +152,18 @@ class Catch(BaseState):
         
         # Looks for bounce target.
         elif self.target_time is None:
-            bounces, times = Catch.get_bounces(agent)
+            bounces = agent.analysis.bounces
 
-            if len(bounces) == 0:
+            if bounces.best == -1:
                 self.expired = True
 
             else:
-                # Calculate the distance and estimate the time required to get there.
-                vectors = bounces - agent.player.pos
-                distances = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
-                good_time = distances/1000 <= np.squeeze(times)
-            
-                # Select the first good position and time.
-                bounce = bounces[good_time][0] * a3l([1,1,0])
+                # Select the first reachable position and time.
+                bounce = bounces.pos[bounces.best] * a3l([1,1,0])
                 direction = normalise(agent.player.pos * a3l([1,1,0]) - bounce)
 
                 self.target_pos = bounce + direction*30
-                self.target_time = times[good_time][0]
+                self.target_time = bounces.times[bounces.best]
 
                 if bounce[1] * team_sign(agent.team) > 3500:
                     self.target_pos += 80 * normalise(bounce - orange_inside_goal*team_sign(agent.team))
@@ -199,18 +185,6 @@ class Catch(BaseState):
         super().execute(agent)
 
 
-    @staticmethod
-    def get_bounces(agent):
-        # Looks for bounces in the ball predicion.
-        z_pos = agent.ball.predict.pos[:,2]
-        z_vel = agent.ball.predict.vel[:,2]
-        # Compares change in z velocity between ticks and whether the ball is on the ground.
-        bounce_bool = (z_vel[:-1] < z_vel[1:] - 700) & (z_pos[:-1] < 100)
-        bounces = agent.ball.predict.pos[:-1][bounce_bool]
-        times = agent.ball.predict.time[:-1][bounce_bool]
-        return bounces, times
-
-
 
 class PickUp(BaseState):
     
@@ -221,31 +195,13 @@ class PickUp(BaseState):
     @staticmethod
     def available(agent):
         # Based on ball prediction and current position.
-        small_z_vel = np.abs(agent.ball.predict.vel[:,2]) < 10
-        predicted_roll = agent.ball.predict.pos[:,2] < 100
-        on_ground = agent.ball.pos[2] < 100 and np.count_nonzero(small_z_vel & predicted_roll) > 60
-
-        # Calculates some angles to determine where to place the offset.
-        opponent_goal = orange_inside_goal * team_sign(agent.team)
-        distance_to_goal = np.linalg.norm(agent.ball.pos - opponent_goal)
-        distance_to_ball = np.linalg.norm(agent.ball.pos - agent.player.pos)
-        good_distance = distance_to_goal > 3000 and distance_to_ball < 600
+        analysis = agent.analysis
+        good_distance = analysis.ball_to_goal > 3000 and analysis.player_to_ball < 600
 
         if len(agent.opponents) > 0:
-            my_dist_to_goal = np.linalg.norm(agent.player.pos - opponent_goal)
-            opp_dist_to_goal = np.linalg.norm(agent.opponents[0].pos - opponent_goal)
-
-            if len(agent.opponents) > 1:
-                for opponent in agent.opponents:
-                    test_dist = np.linalg.norm(opponent.pos - opponent_goal)
-                    if opp_dist_to_goal > test_dist:
-                        opp_dist_to_goal = test_dist
-
-            opp_closer_to_goal = my_dist_to_goal > opp_dist_to_goal
+            return analysis.ball_rolling and good_distance and analysis.opp_closer_to_goal
 
-            return on_ground and good_distance and opp_closer_to_goal
-
-        return on_ground and good_distance
+        return analysis.ball_rolling and good_distance
 
     def execute(self, agent):
 
@@ -257,16 +213,14 @@ class PickUp(BaseState):
         if agent.ball.pos[2] > 100:
             self.expired = True
 
-        opponent_goal = orange_inside_goal * team_sign(agent.team)
+        opponent_goal = agent.analysis.opponent_goal
         
         # Checks if not close to goal.
-        distance_to_goal = np.linalg.norm(agent.ball.pos - opponent_goal)
-        distance_to_ball = np.linalg.norm(agent.ball.pos - agent.player.pos)
-        if distance_to_ball > 700 or distance_to_goal < 3000:
+        if agent.analysis.player_to_ball > 700 or agent.analysis.ball_to_goal < 3000:
             self.expired = True
 
         # Goes for the ball instead if conditions are met.
-        close_to_own_goal = np.linalg.norm(agent.ball.pos - blue_inside_goal*team_sign(agent.team)) < 1800
+        close_to_own_goal = agent.analysis.ball_to_own_goal < 1800
         too_slow = np.dot(agent.ball.vel, normalise(agent.player.vel)) < 700
         wrong_side = abs(agent.player.pos[1]) + 200 < abs(agent.ball.pos[1])
 
@@ -308,7 +262,7 @@ class Dribble(BaseState):
 
     @staticmethod
     def available(agent):
-        return agent.ball.pos[2] > 100 and np.linalg.norm(agent.ball.pos - agent.player.pos) < 300
+        return agent.ball.pos[2] > 100 and agent.analysis.player_to_ball < 300
 
     def execute(self, agent):
 
@@ -364,14 +318,11 @@ class Dribble(BaseState):
 
             me = agent.player
             me_prediction = linear_predict(me.pos, me.vel, agent.game_time, 2)
-            op = agent.opponents[0]
-                
-            # Find closest opponent if more than one.
-            if len(agent.opponents) > 1:
-                for opponent in agent.opponents:
-                    if np.linalg.norm(op.pos - me.pos) > np.linalg.norm(opponent.pos - me.pos):
-                        op = opponent
-            
+
+            # Find closest opponent.
+            distances = np.linalg.norm(agent.block.pos[agent.opponent_indices] - me.pos, axis=1)
+            op = agent.opponents[np.argmin(distances)]
+
             op_prediction = linear_predict(op.pos, op.vel, agent.game_time, 2)
 
             vectors = me_prediction.pos - op_prediction.pos
@@ -457,7 +408,8 @@ class Dodge(BaseState):
 
     def __init__(self, target_pos):
         super().__init__()
-        self.target_pos = target_pos
+        # Copied because positions from the packet are views which update every tick.
+        self.target_pos = np.copy(target_pos)
         self.timer = 0.0
 
     def execute(self, agent):
@@ -530,54 +482,45 @@ class GetBoost(BaseState):
         super().__init__()
         self.target_pad = None
 
+    @staticmethod
+    def pick_pad(agent) -> int:
+        """Picks the large pad reached soonest out of those which will be up by then,
+        and are either close or closer than the ball by a margin. -1 if there are none."""
+        distances = agent.analysis.player_to_pads
+        # Closer than 500 uu, or closer than ball by 700 uu.
+        close = (distances < 500) | (distances + 700 < agent.analysis.player_to_ball)
+        return agent.pads.nearest_on_arrival(agent.analysis.pad_etas, large=True, allowed=close)
+
     @staticmethod
     def available(agent):
-        if agent.player.boost < 30:
-            ball_distance = np.linalg.norm(agent.ball.pos - agent.player.pos)
-            for pad in agent.l_pads:
-                if pad.active:
-                    pad_distance = np.linalg.norm(pad.pos - agent.player.pos)
-                    # Closer than 500 uu.
-                    if pad_distance < 500:
-                        return True
-                    # Closer than ball bt 700 uu.
-                    elif pad_distance + 700 < ball_distance:
-                        return True
-
-        return False
+        return agent.player.boost < 30 and GetBoost.pick_pad(agent) >= 0
 
     def execute(self, agent):
 
         # Pick a pad.
         if self.target_pad is None:
-            ball_distance = np.linalg.norm(agent.ball.pos - agent.player.pos)
-            for pad in agent.l_pads:
-                if pad.active:
-                    pad_distance = np.linalg.norm(pad.pos - agent.player.pos)
-                    # Closer than 500 uu.
-                    if pad_distance < 500:
-                        self.target_pad = pad
-                        break
-                    # Closer than ball bt 700 uu.
-                    elif pad_distance + 700 < ball_distance:
-                        self.target_pad = pad
-                        break
+            pad = GetBoost.pick_pad(agent)
+            if pad >= 0:
+                self.target_pad = pad
                             
         # If still nothing, expire.
         if self.target_pad is None:
             self.expired = True
 
         else:
-            if agent.player.boost >= 80 or not self.target_pad.active:
+            pad_pos = agent.pads.pos[self.target_pad]
+
+            # Expire if full enough, or the pad won't be back in time.
+            if agent.player.boost >= 80 or agent.pads.respawn_in()[self.target_pad] > agent.analysis.pad_etas[self.target_pad]:
                 self.expired = True
             
             # Dodge when far away.
-            if agent.player.pos[2] < 20 and np.linalg.norm(self.target_pad.pos - agent.player.pos) > 1500 \
-                and (800 < np.dot(normalise(self.target_pad.pos - agent.player.pos), agent.player.vel) < 1500):
+            if agent.player.pos[2] < 20 and np.linalg.norm(pad_pos - agent.player.pos) > 1500 \
+                and (800 < np.dot(normalise(pad_pos - agent.player.pos), agent.player.vel) < 1500):
                 self.expired = True
-                agent.state = Dodge(self.target_pad.pos)
+                agent.state = Dodge(pad_pos)
 
-            agent.ctrl = simple(agent, self.target_pad.pos)
+            agent.ctrl = simple(agent, pad_pos)
         super().execute(agent)
 
 
@@ -587,31 +530,38 @@ class GetBoostDesperate(BaseState):
     def __init__(self):
         super().__init__()
         self.target_pad = None
+        self.waiting = False
 
     def execute(self, agent):
         
-        # Pick closest large pad.
+        # Pick the large pad reached soonest which will be up by then,
+        # or failing that the one which comes back soonest, and wait for it.
         if self.target_pad is None:
-            closest_pad = agent.l_pads[0]
-            closest_dist = float('inf')
-            for pad in agent.l_pads:
-                if pad.active:
-                    pad_distance = np.linalg.norm(pad.pos - agent.player.pos)
-                    if pad_distance < closest_dist:
-                        closest_pad = pad
-                        closest_dist = pad_distance
-            self.target_pad = closest_pad
+            pad = agent.pads.nearest_on_arrival(agent.analysis.pad_etas, large=True)
+            if pad < 0:
+                pad = int(np.argmin(np.where(agent.pads.large, agent.pads.respawn_in(), np.inf)))
+                self.waiting = True
+            self.target_pad = pad
+
+        pad_pos = agent.pads.pos[self.target_pad]
         
-        if agent.player.boost >= 80 or not self.target_pad.active:
+        # Stop waiting once the pad will be up by the time we get there.
+        respawn_in = agent.pads.respawn_in()[self.target_pad]
+        eta = agent.analysis.pad_etas[self.target_pad]
+        if respawn_in <= eta:
+            self.waiting = False
+
+        # Expire if full enough, or the pad won't be back in time, unless waiting for it.
+        if agent.player.boost >= 80 or (not self.waiting and respawn_in > eta):
             self.expired = True
         
         # Dodge when far away.
-        if agent.player.pos[2] < 20 and np.linalg.norm(self.target_pad.pos - agent.player.pos) > 1500 \
-            and (800 < np.dot(normalise(self.target_pad.pos - agent.player.pos), agent.player.vel) < 1500):
+        if agent.player.pos[2] < 20 and np.linalg.norm(pad_pos - agent.player.pos) > 1500 \
+            and (800 < np.dot(normalise(pad_pos - agent.player.pos), agent.player.vel) < 1500):
             self.expired = True
-            agent.state = Dodge(self.target_pad.pos)
+            agent.state = Dodge(pad_pos)
 
-        agent.ctrl = simple(agent, self.target_pad.pos)
+        agent.ctrl = simple(agent, pad_pos)
         super().execute(agent)
 
 
@@ -641,24 +591,16 @@ class DemoOpponent(BaseState):
 
         # Pick closest opponent to opponent's goal as target.
         if self.target is None:
-            opponent_goal = team_sign(agent.team) * orange_inside_goal
-            closest = agent.opponents[0]
-            closest_distance = np.linalg.norm(closest.pos - opponent_goal)
-            for opponent in agent.opponents[1::]:
-                distance = np.linalg.norm(opponent.pos - opponent_goal)
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest = opponent
-            self.target = closest
-
-        player_to_target = self.target.pos - agent.player.pos
-        distance_to_target = np.linalg.norm(player_to_target)
-        velocity_at_target = np.dot(player_to_target, normalise(agent.player.vel))
-        if velocity_at_target == 0:
-            time_left = 3
-        else:
-            speed = np.linalg.norm(agent.player.vel)
-            time_left = cap(distance_to_target / speed, 2/60, 3)
+            self.target = agent.analysis.closest_opponent_to_goal
+
+        # Estimates the time to drive to every opponent at once.
+        distances = np.linalg.norm(agent.block.pos[agent.opponent_indices] - agent.player.pos, axis=1)
+        forward_vel = np.dot(agent.player.vel, agent.player.orient_m[:,0])
+        etas = kinematics.time_to_dist(distances, forward_vel, agent.player.boost)
+
+        target_i = agent.opponents.index(self.target)
+        distance_to_target = distances[target_i]
+        time_left = cap(etas[target_i], 2/60, 3)
 
         # Predict target's movement.
         # z_ang_vel = self.target.ang_vel[2]
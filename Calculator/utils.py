@@ -1,8 +1,11 @@
 '''Utilities (functions and classes) for Rocket League.'''
 
 from rlbot.utils.game_state_util import Vector3, Rotator
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction, Slice
+from rlbot.utils.structures.game_data_struct import Physics
 
 import numpy as np
+import ctypes
 
 from dataclasses import dataclass
 
@@ -10,11 +13,79 @@ from dataclasses import dataclass
 
 # CLASSES:
 
+class PacketBlock:
+    """Structure-of-arrays block which the packet gets decoded into.
+
+    Car, Ball and BoostPad objects are lightweight views into this block,
+    so decoding the packet is a few bulk copies instead of reading every field.
+    Car data is indexed by the car's index in the packet.
+
+    Attributes:
+        physics {np.ndarray} -- Car physics, shape (num_cars, 4, 3).
+        pos {np.ndarray} -- Car positions, shape (num_cars, 3).
+        rot {np.ndarray} -- Car rotations (pitch, yaw, roll), shape (num_cars, 3).
+        vel {np.ndarray} -- Car velocities, shape (num_cars, 3).
+        ang_vel {np.ndarray} -- Car angular velocities, shape (num_cars, 3).
+        dead {np.ndarray} -- Whether each car has been demolished.
+        wheel_c {np.ndarray} -- Whether each car has all four wheels touching a surface.
+        sonic {np.ndarray} -- Whether each car is supersonic.
+        jumped {np.ndarray} -- Whether each car has jumped.
+        d_jumped {np.ndarray} -- Whether each car has double jumped.
+        boost {np.ndarray} -- Amount of boost for each car.
+        team {np.ndarray} -- Team of each car.
+        orient_m {np.ndarray} -- Car orientation matrices, shape (num_cars, 3, 3).
+        turn_r {np.ndarray} -- Turn radius of each car.
+        ball {np.ndarray} -- Ball physics, shape (4, 3).
+        pad_active {np.ndarray} -- Whether each boost pad is active.
+        pad_timer {np.ndarray} -- Time since each inactive boost pad was picked up.
+    """
+    __slots__ = [
+        'physics',
+        'pos',
+        'rot',
+        'vel',
+        'ang_vel',
+        'dead',
+        'wheel_c',
+        'sonic',
+        'jumped',
+        'd_jumped',
+        'boost',
+        'team',
+        'orient_m',
+        'turn_r',
+        'ball',
+        'pad_active',
+        'pad_timer'
+    ]
+
+    def __init__(self, num_cars : int, num_pads : int):
+        self.physics    : np.ndarray    = np.zeros((num_cars, 4, 3))
+        self.pos        : np.ndarray    = self.physics[:, 0]
+        self.rot        : np.ndarray    = self.physics[:, 1]
+        self.vel        : np.ndarray    = self.physics[:, 2]
+        self.ang_vel    : np.ndarray    = self.physics[:, 3]
+        self.dead       : np.ndarray    = np.zeros(num_cars, dtype=bool)
+        self.wheel_c    : np.ndarray    = np.zeros(num_cars, dtype=bool)
+        self.sonic      : np.ndarray    = np.zeros(num_cars, dtype=bool)
+        self.jumped     : np.ndarray    = np.zeros(num_cars, dtype=bool)
+        self.d_jumped   : np.ndarray    = np.zeros(num_cars, dtype=bool)
+        self.boost      : np.ndarray    = np.zeros(num_cars)
+        self.team       : np.ndarray    = np.zeros(num_cars, dtype=int)
+        self.orient_m   : np.ndarray    = np.tile(np.identity(3), (num_cars, 1, 1))
+        self.turn_r     : np.ndarray    = np.zeros(num_cars)
+        self.ball       : np.ndarray    = np.zeros((4, 3))
+        self.pad_active : np.ndarray    = np.ones(num_pads, dtype=bool)
+        self.pad_timer  : np.ndarray    = np.zeros(num_pads)
+
 class Car:
     """Houses the processed data from the packet for the cars.
 
+    Packet data is viewed from the PacketBlock, so it updates in place every tick.
+
     Attributes:
         index {int} -- The car's index in the packet.
+        block {PacketBlock} -- The block holding the decoded packet.
         pos {np.ndarray} -- Position vector.
         rot {np.ndarray} -- Rotation (pitch, yaw, roll).
         vel {np.ndarray} -- Velocity vector.
@@ -34,45 +105,63 @@ class Car:
     """
     __slots__ = [
         'index',
+        'block',
         'pos',
         'rot',
         'vel',
         'ang_vel',
-        'dead',
-        'wheel_c',
-        'sonic',
-        'jumped',
-        'd_jumped',
         'name',
         'team',
-        'boost',
         'orient_m',
-        'turn_r',
         'predict'   
     ]
 
-    def __init__(self, index : int, team : int, name : str):
+    def __init__(self, index : int, team : int, name : str, block : PacketBlock):
         self.index      : int           = index
-        self.pos        : np.ndarray    = np.zeros(3)
-        self.rot        : np.ndarray    = np.zeros(3)
-        self.vel        : np.ndarray    = np.zeros(3)
-        self.ang_vel    : np.ndarray    = np.zeros(3)
-        self.dead       : bool          = False
-        self.wheel_c    : bool          = False
-        self.sonic      : bool          = False
-        self.jumped     : bool          = False
-        self.d_jumped   : bool          = False
+        self.block      : PacketBlock   = block
+        self.pos        : np.ndarray    = block.pos[index]
+        self.rot        : np.ndarray    = block.rot[index]
+        self.vel        : np.ndarray    = block.vel[index]
+        self.ang_vel    : np.ndarray    = block.ang_vel[index]
         self.name       : str           = name
         self.team       : int           = team
-        self.boost      : float         = 0.0
         
-        self.orient_m   : np.ndarray    = np.identity(3)
-        self.turn_r     : float         = 0.0
+        self.orient_m   : np.ndarray    = block.orient_m[index]
         self.predict    : Prediction    = None
 
+    @property
+    def dead(self) -> bool:
+        return self.block.dead[self.index]
+
+    @property
+    def wheel_c(self) -> bool:
+        return self.block.wheel_c[self.index]
+
+    @property
+    def sonic(self) -> bool:
+        return self.block.sonic[self.index]
+
+    @property
+    def jumped(self) -> bool:
+        return self.block.jumped[self.index]
+
+    @property
+    def d_jumped(self) -> bool:
+        return self.block.d_jumped[self.index]
+
+    @property
+    def boost(self) -> float:
+        return self.block.boost[self.index]
+
+    @property
+    def turn_r(self) -> float:
+        return self.block.turn_r[self.index]
+
 class Ball:
     """Houses the processed data from the packet for the ball.
 
+    Packet data is viewed from the PacketBlock, so it updates in place every tick.
+
     Attributes:
         pos {np.ndarray} -- Position vector.
         rot {np.ndarray} -- Rotation (pitch, yaw, roll). 
@@ -90,35 +179,44 @@ class Ball:
         'last_touch'
     ]
 
-    def __init__(self):
-        self.pos        : np.ndarray    = np.zeros(3)
-        self.rot        : np.ndarray    = np.zeros(3)
-        self.vel        : np.ndarray    = np.zeros(3)
-        self.ang_vel    : np.ndarray    = np.zeros(3)
+    def __init__(self, block : PacketBlock):
+        self.pos        : np.ndarray    = block.ball[0]
+        self.rot        : np.ndarray    = block.ball[1]
+        self.vel        : np.ndarray    = block.ball[2]
+        self.ang_vel    : np.ndarray    = block.ball[3]
         self.predict    : Prediction    = Prediction(np.zeros((360,3)),np.zeros((360,3)),np.zeros((360,1)))
         self.last_touch                 = None
 
 class BoostPad:
     """Houses the processed data from the packet fot the boost pads.
 
+    Packet data is viewed from the PacketBlock, so it updates in place every tick.
+
     Attributes:
         index {int} -- The pad's index.
+        block {PacketBlock} -- The block holding the decoded packet.
         pos {np.ndarray} -- Position vector.
         active {bool} -- Whether the boost pad is active and can be collected.
-        timer {float} -- How long until the boost pad is active again.
+        timer {float} -- Time since the boost pad was picked up, if inactive.
     """
     __slots__ = [
         'index',
-        'pos',
-        'active',
-        'timer'
+        'block',
+        'pos'
     ]
 
-    def __init__(self, index : int, pos : np.ndarray):
+    def __init__(self, index : int, pos : np.ndarray, block : PacketBlock):
         self.index      : int           = index
+        self.block      : PacketBlock   = block
         self.pos        : np.ndarray    = pos
-        self.active     : bool          = True
-        self.timer      : float         = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.block.pad_active[self.index]
+
+    @property
+    def timer(self) -> float:
+        return self.block.pad_timer[self.index]
 
 @dataclass
 class Prediction:
@@ -172,6 +270,33 @@ def a3v(V : Vector3) -> np.ndarray:
     return np.array([V.x, V.y, V.z])
 
 
+# Layout of a ball prediction slice in floats (every field of the struct is a c_float).
+FLOAT_SIZE  : int = ctypes.sizeof(ctypes.c_float)
+SLICE_WIDTH : int = ctypes.sizeof(Slice) // FLOAT_SIZE
+SLICE_POS   : int = (Slice.physics.offset + Physics.location.offset) // FLOAT_SIZE
+SLICE_VEL   : int = (Slice.physics.offset + Physics.velocity.offset) // FLOAT_SIZE
+SLICE_TIME  : int = Slice.game_seconds.offset // FLOAT_SIZE
+
+def a3p(P : BallPrediction) -> Prediction:
+    """Creates a Prediction which views the ball prediction struct without copying.
+
+    The arrays share memory with the struct, so they update whenever
+    the struct is refilled and only need to be created once.
+
+    Arguments:
+        P {BallPrediction} -- Ball prediction struct from the framework.
+
+    Returns:
+        Prediction -- Prediction with (n, 3) pos and vel, and (n, 1) time arrays.
+    """
+    slices = np.frombuffer(P.slices, dtype=np.float32).reshape(-1, SLICE_WIDTH)
+    return Prediction(
+        slices[:, SLICE_POS:SLICE_POS+3],
+        slices[:, SLICE_VEL:SLICE_VEL+3],
+        slices[:, SLICE_TIME:SLICE_TIME+1]
+    )
+
+
 # -----------------------------------------------------------
 
 # USEFUL UTILITY FUNCTIONS:
@@ -270,6 +395,44 @@ def orient_matrix(R : np.ndarray) -> np.ndarray:
     return A
 
 
+def orient_matrices(R : np.ndarray, out : np.ndarray = None) -> np.ndarray:
+    """Converts many Euler angles to orientation matrices in one go.
+
+    Arguments:
+        R {np.ndarray} -- Pitch, yaw, and roll of shape (n, 3).
+
+    Keyword Arguments:
+        out {np.ndarray} -- Array of shape (n, 3, 3) to write into. (default: {None})
+
+    Returns:
+        np.ndarray -- Orientation matrices of shape (n, 3, 3).
+    """
+    if out is None:
+        out = np.empty((len(R), 3, 3))
+
+    C = np.cos(R)
+    S = np.sin(R)
+    CP, CY, CR = C[:, 0], C[:, 1], C[:, 2]
+    SP, SY, SR = S[:, 0], S[:, 1], S[:, 2]
+
+    # front direction
+    out[:, 0, 0] = CP * CY
+    out[:, 1, 0] = CP * SY
+    out[:, 2, 0] = SP
+
+    # right direction (should be left but for some reason it is weird)
+    out[:, 0, 1] = CY * SP * SR - CR * SY
+    out[:, 1, 1] = SY * SP * SR + CR * CY
+    out[:, 2, 1] = -CP * SR
+
+    # up direction
+    out[:, 0, 2] = -CR * CY * SP - SR * SY
+    out[:, 1, 2] = -CR * SY * SP + SR * CY
+    out[:, 2, 2] = CP * CR
+
+    return out
+
+
 def local(A : np.ndarray, p0 : np.ndarray, p1 : np.ndarray) -> np.ndarray:
     """Transforms world coordinates into local coordinates.
     
@@ -364,12 +527,12 @@ def turn_r(v : np.ndarray) -> float:
     """Calculates the minimum turning radius for given velocity.
 
     Arguments:
-        v {np.ndarray} -- A velocity vector.
+        v {np.ndarray} -- A velocity vector, or velocities of shape (n, 3).
 
     Returns:
-        float -- The smallest radius possible for the given velocity.
+        float -- The smallest radius possible for the given velocity (or an array of them).
     """
-    s = np.linalg.norm(v)
+    s = np.linalg.norm(v, axis=-1)
     return -6.901E-11 * s**4 + 2.1815E-07 * s**3 - 5.4437E-06 * s**2 + 0.12496671 * s + 157
 
 
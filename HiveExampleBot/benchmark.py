@@ -0,0 +1,319 @@
+'''Benchmarks for the hivemind's per-tick overheads.
+
+Run with `python benchmark.py` from this folder. Packet waiting is
+measured against a fake game which ticks at 120 Hz on the wall clock,
+comparing the old sleep-and-poll loop with PacketSource. The runtime is
+measured against the same fake game with rendering slower than a tick,
+comparing one loop doing everything with HivemindRuntime. Startup is
+measured with drones reporting in at random times, comparing the old
+fixed sleep with Handshake. Quitting is measured with a game which stops
+ticking first, like a paused or finished match.
+'''
+
+import queue
+import threading
+import time
+from time import perf_counter
+
+import numpy as np
+
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+from packet_source import PacketSource
+from runtime import Handshake, HivemindRuntime
+
+# Seconds to run each packet waiting benchmark for.
+DURATION = 3.0
+TICK_RATE = 120
+
+# Time spent planning and rendering each tick in the runtime benchmark, in seconds.
+# Rendering is mostly spent in the core, which lets go of the GIL, so it is slept.
+PLAN_TIME = 0.001
+RENDER_CPU_TIME = 0.0005
+RENDER_WAIT_TIME = 0.012
+
+# Drones in the fake match, and the latest time one of them reports in, in seconds.
+DRONES = 3
+REPORT_WITHIN = 0.3
+# Startup sleep of the old hivemind, in seconds.
+OLD_SLEEP = 3.0
+
+# Seconds the fake game ticks for before stopping, and how long after that the hivemind is told to quit.
+STOP_AFTER = 0.5
+QUIT_AFTER = 0.5
+# Longest to wait for the hivemind to quit before calling it stuck, in seconds.
+QUIT_TIMEOUT = 5.0
+
+# -----------------------------------------------------------
+
+# FAKE GAME:
+
+class FakeGame:
+    """Stands in for the GameInterface, with a new packet every 1/120 s.
+
+    Attributes:
+        start {float} -- perf_counter time of tick zero.
+        fresh {bool} -- Whether it offers fresh_live_data_packet.
+    """
+
+    def __init__(self, fresh : bool):
+        self.start = perf_counter()
+        self.input_latencies = []
+        if fresh:
+            self.fresh_live_data_packet = self._fresh_live_data_packet
+
+    def tick(self) -> int:
+        """The latest tick so far."""
+        return int((perf_counter() - self.start) * TICK_RATE)
+
+    def tick_time(self, packet : GameTickPacket) -> float:
+        """perf_counter time at which the packet's tick came out."""
+        return self.start + round(packet.game_info.seconds_elapsed * TICK_RATE) / TICK_RATE
+
+    def update_live_data_packet(self, packet : GameTickPacket):
+        packet.game_info.seconds_elapsed = self.tick() / TICK_RATE
+
+    def _fresh_live_data_packet(self, packet : GameTickPacket, timeout_millis : int, key : int):
+        # Blocks until there is a tick newer than the packet, like the core does.
+        last = round(packet.game_info.seconds_elapsed * TICK_RATE)
+        wake = min(self.start + (last + 1) / TICK_RATE, perf_counter() + timeout_millis / 1000)
+        time.sleep(max(wake - perf_counter(), 0))
+        self.update_live_data_packet(packet)
+
+    def update_ball_prediction(self, ball_prediction):
+        pass
+
+    def update_player_input(self, seconds_elapsed : float, index : int):
+        # Stands in for PlayerInput: the game time of the packet the input was planned from.
+        tick_time = self.start + round(seconds_elapsed * TICK_RATE) / TICK_RATE
+        self.input_latencies.append(perf_counter() - tick_time)
+
+# -----------------------------------------------------------
+
+# PACKET WAITING:
+
+def old_loop(game : FakeGame, packet : GameTickPacket):
+    """Yields each new packet like the hivemind loop used to, polling every millisecond."""
+    while True:
+        previous_packet_time = packet.game_info.seconds_elapsed
+        game.update_live_data_packet(packet)
+        if previous_packet_time == packet.game_info.seconds_elapsed:
+            time.sleep(0.001)
+            continue
+        yield packet
+
+
+def source_loop(game : FakeGame, packet : GameTickPacket):
+    """Yields each new packet from a PacketSource."""
+    source = PacketSource(game, packet)
+    while True:
+        yield source.wait()
+
+
+def measure(loop, fresh : bool = False) -> tuple:
+    """Runs a packet waiting loop against the fake game for DURATION seconds.
+
+    Arguments:
+        loop {function} -- Makes a generator of packets from the game and a packet.
+
+    Keyword Arguments:
+        fresh {bool} -- Whether the fake game offers fresh packets. (default: {False})
+
+    Returns:
+        tuple -- CPU use as a fraction of one core, latencies in ms, ticks missed.
+    """
+    game = FakeGame(fresh)
+    packet = GameTickPacket()
+    latencies = []
+    ticks = []
+
+    wall_start = perf_counter()
+    cpu_start = time.process_time()
+    for packet in loop(game, packet):
+        latencies.append(perf_counter() - game.tick_time(packet))
+        ticks.append(round(packet.game_info.seconds_elapsed * TICK_RATE))
+        if perf_counter() - wall_start > DURATION:
+            break
+    cpu = (time.process_time() - cpu_start) / (perf_counter() - wall_start)
+
+    missed = int(np.sum(np.diff(ticks) - 1))
+    return cpu, np.array(latencies) * 1000, missed
+
+
+def bench_packet_wait():
+    """Waiting for packets."""
+    print(f'{"Waiting for packets.":<40} {"cpu":>6} {"mean ms":>8} {"p99 ms":>8} {"missed":>7}')
+    for name, loop, fresh in [
+        ('polling every 1 ms (before)', old_loop, False),
+        ('PacketSource, adaptive polling', source_loop, False),
+        ('PacketSource, fresh packets', source_loop, True),
+    ]:
+        cpu, latency, missed = measure(loop, fresh)
+        print(f'  {name:<38} {cpu:6.1%} {np.mean(latency):8.3f} {np.percentile(latency, 99):8.3f} {missed:7d}')
+
+
+# -----------------------------------------------------------
+
+# RUNTIME:
+
+def spin(seconds : float):
+    """Keeps the CPU busy for a while, holding the GIL."""
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        pass
+
+
+def plan(packet, ball_prediction) -> dict:
+    spin(PLAN_TIME)
+    return {0: packet.game_info.seconds_elapsed}
+
+
+def render(packet, ball_prediction):
+    spin(RENDER_CPU_TIME)
+    time.sleep(RENDER_WAIT_TIME)
+
+
+def sequential(game : FakeGame):
+    """Plans, sends inputs and renders one after another, like the hivemind loop used to."""
+    source = PacketSource(game)
+    ball_prediction = None
+    end = perf_counter() + DURATION
+    while perf_counter() < end:
+        packet = source.wait()
+        for index, controls in plan(packet, ball_prediction).items():
+            game.update_player_input(controls, index)
+        render(packet, ball_prediction)
+
+
+def pipelined(game : FakeGame):
+    """Runs the stages as coroutines with HivemindRuntime."""
+    quit_event = threading.Event()
+    threading.Timer(DURATION, quit_event.set).start()
+    HivemindRuntime(game, queue.Queue(), quit_event, plan, render).run()
+
+
+def bench_runtime():
+    """Sending inputs while rendering takes longer than a tick."""
+    print(f'{"Inputs with slow rendering.":<40} {"inputs":>6} {"mean ms":>8} {"p99 ms":>8}')
+    for name, loop in [
+        ('one loop (before)', sequential),
+        ('HivemindRuntime', pipelined),
+    ]:
+        game = FakeGame(fresh=True)
+        loop(game)
+        latency = np.array(game.input_latencies) * 1000
+        print(f'  {name:<38} {len(latency):6d} {np.mean(latency):8.3f} {np.percentile(latency, 99):8.3f}')
+
+
+# -----------------------------------------------------------
+
+# STARTUP:
+
+class FakeMatch(FakeGame):
+    """A fake game with DRONES drones on blue, a copy of them on orange, and a human."""
+
+    def update_live_data_packet(self, packet : GameTickPacket):
+        super().update_live_data_packet(packet)
+        names = ['Hive'] + [f'Hive ({i + 2})' for i in range(DRONES - 1)]
+        cars = [(name, True, 0) for name in names] + [(name, True, 1) for name in names] + [('Human', False, 0)]
+        packet.num_cars = len(cars)
+        for car, (name, is_bot, team) in zip(packet.game_cars, cars):
+            car.name, car.is_bot, car.team = name, is_bot, team
+
+
+class Metadata:
+    def __init__(self, index : int):
+        self.index = index
+
+
+def report_in(metadata_queue : queue.Queue, seed : int):
+    """Has each drone send its metadata at a random time within REPORT_WITHIN."""
+    delays = np.random.default_rng(seed).uniform(0, REPORT_WITHIN, DRONES)
+    for index, delay in enumerate(delays):
+        threading.Timer(delay, metadata_queue.put, [Metadata(index)]).start()
+
+
+def old_startup(game : FakeGame, metadata_queue : queue.Queue) -> set:
+    """Sleeps, then takes whatever metadata came in, like the hivemind used to."""
+    time.sleep(OLD_SLEEP)
+    indices = set()
+    while True:
+        try:
+            indices.add(metadata_queue.get(timeout=0.1).index)
+        except queue.Empty:
+            return indices
+
+
+def handshake_startup(game : FakeGame, metadata_queue : queue.Queue) -> set:
+    """Waits for the drones expected from the packet."""
+    return Handshake(game, metadata_queue).wait()
+
+
+def bench_startup():
+    """Time from the hivemind starting to its first inputs."""
+    print(f'{"Starting up.":<40} {"drones":>6} {"first input ms":>15}')
+    for name, startup in [
+        ('sleeping 3 s (before)', old_startup),
+        ('Handshake', handshake_startup),
+    ]:
+        game = FakeMatch(fresh=True)
+        metadata_queue = queue.Queue()
+        quit_event = threading.Event()
+        started_ns = time.perf_counter_ns()
+        report_in(metadata_queue, seed=0)
+        indices = startup(game, metadata_queue)
+
+        def plan_once(packet, ball_prediction) -> dict:
+            quit_event.set()
+            return {index: packet.game_info.seconds_elapsed for index in indices}
+
+        runtime = HivemindRuntime(game, metadata_queue, quit_event, plan_once, started_ns=started_ns)
+        runtime.run()
+        print(f'  {name:<38} {len(indices):6d} {runtime.first_input_ms:15.1f}')
+
+
+# -----------------------------------------------------------
+
+# QUITTING:
+
+class StoppedGame(FakeGame):
+    """A fake game which stops ticking after STOP_AFTER seconds."""
+
+    def tick(self) -> int:
+        return min(super().tick(), int(STOP_AFTER * TICK_RATE))
+
+
+def bench_quit():
+    """Time from the quit event to the runtime returning, after the game stopped ticking."""
+    print(f'{"Quitting with no new ticks.":<40} {"quit ms":>8}')
+    for name, fresh in [
+        ('polling', False),
+        ('fresh packets', True),
+    ]:
+        game = StoppedGame(fresh=fresh)
+        quit_event = threading.Event()
+        runtime = HivemindRuntime(game, queue.Queue(), quit_event, plan)
+        thread = threading.Thread(target=runtime.run, daemon=True)
+        thread.start()
+        time.sleep(STOP_AFTER + QUIT_AFTER)
+        quit_at = perf_counter()
+        quit_event.set()
+        thread.join(QUIT_TIMEOUT)
+        if thread.is_alive():
+            print(f'  {name:<38} {"stuck":>8}')
+        else:
+            print(f'  {name:<38} {(perf_counter() - quit_at) * 1000:8.1f}')
+
+
+BENCHMARKS = [
+    bench_packet_wait,
+    bench_runtime,
+    bench_startup,
+    bench_quit,
+]
+
+# -----------------------------------------------------------
+
+if __name__ == '__main__':
+    for benchmark in BENCHMARKS:
+        benchmark()
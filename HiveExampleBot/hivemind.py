@@ -1,18 +1,19 @@
 '''The Hivemind'''
 
-import queue
-import time
+import ctypes
 import numpy as np
 
-from rlbot.botmanager.agent_metadata import AgentMetadata
 from rlbot.botmanager.bot_helper_process import BotHelperProcess
 from rlbot.utils.logging_utils import get_logger
 from rlbot.utils.structures.bot_input_struct import PlayerInput
-from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket, PlayerInfo
 from rlbot.utils.structures.ball_prediction_struct import BallPrediction
 from rlbot.utils.structures.game_interface import GameInterface
 from rlbot.utils.game_state_util import Vector3, Rotator
 
+from profiler import TickProfiler
+from runtime import Handshake, HivemindRuntime
+
 PI = np.pi
 
 # -----------------------------------------------------------
@@ -63,22 +64,6 @@ class ExampleHivemind(BotHelperProcess):
         self.running_indices = set()
 
 
-    def try_receive_agent_metadata(self):
-        """Adds all drones with the correct key to our set of running indices."""
-        while True:  # Will exit on queue.Empty
-            try:
-                # Adds drone indices to running_indices set.
-                single_agent_metadata: AgentMetadata = self.metadata_queue.get(
-                    timeout=0.1)
-                self.running_indices.add(single_agent_metadata.index)
-
-            except queue.Empty:
-                return
-
-            except Exception as ex:
-                self.logger.error(ex)
-
-
     def start(self):
         """Runs once, sets up the hivemind and its agents."""
         # Prints an activation message into the console.
@@ -88,14 +73,16 @@ class ExampleHivemind(BotHelperProcess):
         # Loads game interface.
         self.game_interface.load_interface()
 
-        # Wait a moment for all agents to have a chance to start up and send metadata.
-        self.logger.info("Snoozing for 3 seconds; give me a moment.")
-        # Increase this number if you're having issues
-        # with bots not being added to the hivemind.
-        time.sleep(3)
-        self.try_receive_agent_metadata()
+        # Waits for the drones to send their metadata, but only until every bot on
+        # our team with our name has, or STARTUP_DEADLINE seconds at most.
+        # Set options['drones'] in hive_example.py to say how many to wait for instead.
+        handshake = Handshake(self.game_interface, self.metadata_queue, self.quit_event, count=self.options.get('drones'))
+        self.running_indices = handshake.wait()
+        self.started_ns = handshake.started_ns
+        if handshake.missing:
+            self.logger.warning(f"Starting without drones {sorted(handshake.missing)}. They'll join if they report in.")
 
-        self.logger.info("Finished sleeping. Ready to go!")
+        self.logger.info(f"{len(self.running_indices)} drones ready after {handshake.ready_ms:.0f} ms. Ready to go!")
 
         # This is how you access field info.
         # First create the initialise the object...
@@ -128,253 +115,323 @@ class ExampleHivemind(BotHelperProcess):
 
 
     def game_loop(self):
-        """The main game loop. This is where your hivemind code goes."""
-
-        # Creating packet and ball prediction objects which will be updated every tick.
-        packet = GameTickPacket()
-        ball_prediction = BallPrediction()
-
-        # Nicknames the renderer to shorten code.
-        draw = self.game_interface.renderer
-
-        # MAIN LOOP:
-        while True:
-
-            previous_packet_time = packet.game_info.seconds_elapsed
+        """Runs the hivemind until the quit event is set."""
+
+        # Runs ingest, planning, sending inputs and rendering as separate coroutines.
+        # Rendering happens on its own thread after the inputs are sent,
+        # and skips ticks if it falls behind, so it never delays the drones.
+        self.runtime = HivemindRuntime(
+            self.game_interface, self.metadata_queue, self.quit_event,
+            plan=self.plan, render=self.render, on_drone=self.add_drone,
+            key=min(drone.index for drone in self.drones), logger=self.logger,
+            started_ns=self.started_ns)
+
+        # A numpy view of the cars in the packet. It shares memory with the packet,
+        # so it stays up to date without reading every field of every car ourselves.
+        self.cars = np.frombuffer(self.runtime.packet.game_cars, dtype=CAR_DTYPE)
+        self.drone_indices = [drone.index for drone in self.drones]
+
+        # Times each part of planning so you can see if a tick takes longer than a frame.
+        # Strategy laps that go over the budget (1/120 s by default) get logged.
+        self.profiler = TickProfiler(['process', 'strategy'], logger=self.logger)
+        self.reported = False
+
+        # Numbers of predicted ball positions which pass each check, for rendering.
+        self.good_height = 0
+        self.good_distance = 0
+
+        # What the renderer draws. Planning makes a new one every tick.
+        self.frame = None
+
+        self.runtime.run()
+
+
+    def add_drone(self, index: int):
+        """Adds a drone which reported in after startup."""
+        if index in self.running_indices:
+            return
+        self.running_indices.add(index)
+        self.drones.append(Drone(index, self.runtime.packet.game_cars[index].team))
+        self.drone_indices.append(index)
+        self.logger.info(f"Drone {index} joined late.")
+
+
+    def plan(self, packet: GameTickPacket, ball_prediction: BallPrediction) -> dict:
+        """Works out the drones' controls for a tick. This is where your hivemind code goes.
+
+        Arguments:
+            packet {GameTickPacket} -- The newest packet.
+            ball_prediction {BallPrediction} -- The newest ball prediction.
+
+        Returns:
+            dict -- PlayerInput for each drone index.
+        """
+        profiler = self.profiler
+        profiler.start()
+
+        # PRE-PROCESSING:
+
+        # Processing ball data.
+        self.ball.pos = a3v(packet.game_ball.physics.location)
+
+        # Processing drone data.
+        # Copies the physics of all drones in one go and gives each drone views into the copy.
+        physics = self.cars['physics'][self.drone_indices]
+        boosts = self.cars['boost'][self.drone_indices]
+        # Orientation matrices for every drone are also worked out in one go.
+        orient_ms = orient_matrices(physics[:, 1])
+        for i, drone in enumerate(self.drones):
+            drone.pos = physics[i, 0]
+            drone.rot = physics[i, 1]
+            drone.vel = physics[i, 2]
+            drone.boost = boosts[i]
+            drone.orient_m = orient_ms[i]
+
+            # Reset ctrl every tick.
+            # PlayerInput is practically identical to SimpleControllerState.
+            drone.ctrl = PlayerInput()
+
+        profiler.lap('process')
+
+        # Game time.
+        game_time = packet.game_info.seconds_elapsed
+
+        # Example Team Pinches (2 bots only)
+        # There's nothing stopping you from doing it with more :) Give it a shot!
+        if len(self.drones) == 2:
+
+            # Sorts the drones left to right. (More understandable code below)
+            #right_to_left_drones = sorted(self.drones, key=lambda drone: drone.pos[0]*team_sign(drone.team))
+
+            # Finds the right and left drones.
+            sign = team_sign(self.team)
+            if self.drones[0].pos[0]*sign <= self.drones[1].pos[0]*sign:
+                right = self.drones[0]
+                left = self.drones[1]
+            else:
+                right = self.drones[1]
+                left = self.drones[0]
+
+            # Bots get boost and go to wait positions.
+            if self.state == State.SETUP:
+
+                # Guide positions.
+                right_boost = a3l([-3072.0, -4096.0, 71.1])*sign
+                right_wait = a3l([-1792.0, -4184.0, 71.1])*sign
+                # Making use of symmetry
+                left_boost = right_boost * a3l([-1, 1, 1])
+                left_wait = right_wait * a3l([-1, 1, 1])
+
+                # First get boost and then go to wait position.
+                if right.boost < 100:
+                    slow_to_pos(right, right_boost)
+                else:
+                    slow_to_pos(right, right_wait)
 
-            # Updating the game packet from the game.
-            self.game_interface.update_live_data_packet(packet)
+                if left.boost < 100:
+                    slow_to_pos(left, left_boost)
+                else:
+                    slow_to_pos(left, left_wait)
+
+                # If both bots are in wait position, switch to WAIT state.
+                if np.linalg.norm(right.pos-right_wait) + np.linalg.norm(left.pos-left_wait) < 200:
+                    self.state = State.WAIT
+
+            # Bots try to face the ball, waiting for perfect moment to team pinch.
+            elif self.state == State.WAIT:
+
+                # Each drone should try to face the ball.
+                for drone in self.drones:
+                    turn_to_pos(drone, self.ball.pos, game_time)
+
+                # Filters out all the predictions where the ball is too far off the ground.
+                # Result is a list of tuples of positions and time.
+                filtered_prediction = [(a3v(step.physics.location), step.game_seconds)
+                                    for step in ball_prediction.slices if step.physics.location.z < 100]
+                self.good_height = len(filtered_prediction)
+                self.good_distance = 0
+
+                if len(filtered_prediction) > 0:
+                    # Turns the prediction into a numpy array for fast vectorized calculations.
+                    filtered_prediction = np.array(filtered_prediction)
+
+                    # Gets the vectors from the drones to the ball prediction.
+                    positions = np.vstack(filtered_prediction[:, 0])
+                    right_to_prediction = positions - right.pos
+                    left_to_prediction = positions - left.pos
+
+                    # Calculates the distances.
+                    # Cool blog post about einsum: http://ajcr.net/Basic-guide-to-einsum/
+                    right_distances = np.sqrt(
+                        np.einsum('ij,ij->i', right_to_prediction, right_to_prediction))
+                    left_distances = np.sqrt(
+                        np.einsum('ij,ij->i', left_to_prediction, left_to_prediction))
+
+                    # Filters out the predictions which are too close or too far.
+                    good_distances = (CLOSEST <= right_distances) & (FARTHEST >= right_distances) & (
+                        CLOSEST <= left_distances) & (FARTHEST >= left_distances)
+                    valid_targets = filtered_prediction[good_distances]
+                    self.good_distance = len(valid_targets)
+
+                    if len(valid_targets) > 0:
+                        # Getting the remaining distances after filter.
+                        right_distances = right_distances[good_distances]
+                        left_distances = left_distances[good_distances]
+
+                        # Getting time estimates to go that distance. (Assuming boosting, and going in a straight line.)
+                        # https://www.geogebra.org/m/nnsat4pj
+                        right_times = right_distances**0.55 / 41.53
+                        right_times[right_distances > 2177.25] = 1/2300 * \
+                            right_distances[right_distances > 2177.25] + 0.70337
+                        right_times += game_time + TIME_BUFFER
+
+                        left_times = left_distances**0.55 / 41.53
+                        left_times[left_distances > 2177.25] = 1/2300 * \
+                            left_distances[left_distances > 2177.25] + 0.70337
+                        left_times += game_time + TIME_BUFFER
+
+                        # Filters out the predictions which we can't get to.
+                        good_times = (valid_targets[:, 1] > right_times) & (
+                            valid_targets[:, 1] > left_times)
+                        valid_targets = valid_targets[good_times]
+
+                        # To avoid flukes or anomalies, check that the ball is valid for at least 10 steps.
+                        # Not exact because there could be more bounce spots but good enough to avoid flukes.
+                        if len(valid_targets) > 10:
+                            # Select first valid target.
+                            self.pinch_target = valid_targets[0]
+                            # Reset drone's going attribute.
+                            right.going = False
+                            left.going = False
+                            # Set the state to PINCH.
+                            self.state = State.PINCH
+
+            # Accelerates towards the ball to try and pinch it.
+            elif self.state == State.PINCH:
+
+                # Checks if the ball has been hit recently.
+                if packet.game_ball.latest_touch.time_seconds + 0.1 > game_time:
+                    self.pinch_target = None
+                    self.state = State.SETUP
+
+                elif self.pinch_target is not None:
+                    if not right.going:
+                        # Get the distance to the target.
+                        right_distance = np.linalg.norm(
+                            self.pinch_target[0] - right.pos)
+                        # Get a time estimate
+                        right_time = right_distance**0.55 / \
+                            41.53 if right_distance <= 2177.25 else 1/2300 * right_distance + 0.70337
+
+                        # Waits until time is right to go. Otherwise turns to face the target position.
+                        if game_time + right_time + TIME_ERROR >= self.pinch_target[1]:
+                            right.going = True
+                        else:
+                            turn_to_pos(
+                                right, self.pinch_target[0], game_time)
 
-            # Checking if packet is old. If yes, sleep and skip running the code.
-            if previous_packet_time == packet.game_info.seconds_elapsed:
-                time.sleep(0.001)
-                continue
-                
-            # Begins rendering at the start of the loop; makes life easier.
-            # https://discordapp.com/channels/348658686962696195/446761380654219264/610879527089864737
-            draw.begin_rendering(f'Hivemind{self.team}')
+                    else:
+                        fast_to_pos(right, self.pinch_target[0])
+
+                    # Same for left.
+                    if not left.going:
+                        left_distance = np.linalg.norm(
+                            self.pinch_target[0] - left.pos)
+                        left_time = left_distance**0.55 / \
+                            41.53 if left_distance <= 2177.25 else 1/2300 * left_distance + 0.70337
+                        if game_time + left_time + TIME_ERROR >= self.pinch_target[1]:
+                            left.going = True
+                        else:
+                            turn_to_pos(
+                                left, self.pinch_target[0], game_time)
+                    else:
+                        fast_to_pos(left, self.pinch_target[0])
 
-            # PRE-PROCESSING:
+        profiler.lap('strategy', label=self.state)
+        profiler.end()
 
-            # Updates the ball prediction.
-            self.game_interface.update_ball_prediction(ball_prediction)
+        # Logs a report of tick times when the match ends.
+        if packet.game_info.is_match_ended and not self.reported:
+            self.logger.info(profiler.report())
+            self.logger.info(self.runtime.report())
+            self.reported = True
 
-            # Processing ball data.
-            self.ball.pos = a3v(packet.game_ball.physics.location)
+        # Rendering runs on another thread while the next tick is planned,
+        # so it gets a copy of what it draws instead of reading the hivemind.
+        self.frame = Frame(self)
 
-            # Processing drone data.
-            for drone in self.drones:
-                drone.pos = a3v(packet.game_cars[drone.index].physics.location)
-                drone.rot = a3r(packet.game_cars[drone.index].physics.rotation)
-                drone.vel = a3v(packet.game_cars[drone.index].physics.velocity)
-                drone.boost = packet.game_cars[drone.index].boost
-                drone.orient_m = orient_matrix(drone.rot)
+        # The runtime sends these to the drones.
+        return {drone.index: drone.ctrl for drone in self.drones}
 
-                # Reset ctrl every tick.
-                # PlayerInput is practically identical to SimpleControllerState.
-                drone.ctrl = PlayerInput()
 
-            # Game time.
-            game_time = packet.game_info.seconds_elapsed
+    def render(self, packet: GameTickPacket, ball_prediction: BallPrediction):
+        """Draws debug rendering. Runs on its own thread, behind planning.
 
-            # Example Team Pinches (2 bots only)
-            # There's nothing stopping you from doing it with more :) Give it a shot!
-            if len(self.drones) == 2:
+        Planning carries on while this runs, so it only reads its arguments
+        and the Frame planning left, never the hivemind or its drones.
 
-                # Sorts the drones left to right. (More understandable code below)
-                #right_to_left_drones = sorted(self.drones, key=lambda drone: drone.pos[0]*team_sign(drone.team))
+        Arguments:
+            packet {GameTickPacket} -- Copy of the packet which was planned for.
+            ball_prediction {BallPrediction} -- Copy of its ball prediction.
+        """
+        frame = self.frame
+        if frame is None:
+            return
 
-                # Finds the right and left drones.
-                sign = team_sign(self.team)
-                if self.drones[0].pos[0]*sign <= self.drones[1].pos[0]*sign:
-                    right = self.drones[0]
-                    left = self.drones[1]
-                else:
-                    right = self.drones[1]
-                    left = self.drones[0]
-
-                # Bots get boost and go to wait positions.
-                if self.state == State.SETUP:
-
-                    # Guide positions.
-                    right_boost = a3l([-3072.0, -4096.0, 71.1])*sign
-                    right_wait = a3l([-1792.0, -4184.0, 71.1])*sign
-                    # Making use of symmetry
-                    left_boost = right_boost * a3l([-1, 1, 1])
-                    left_wait = right_wait * a3l([-1, 1, 1])
-
-                    # First get boost and then go to wait position.
-                    if right.boost < 100:
-                        slow_to_pos(right, right_boost)
-                    else:
-                        slow_to_pos(right, right_wait)
+        # Nicknames the renderer to shorten code.
+        draw = self.game_interface.renderer
+        draw.begin_rendering(f'Hivemind{frame.team}')
 
-                    if left.boost < 100:
-                        slow_to_pos(left, left_boost)
-                    else:
-                        slow_to_pos(left, left_wait)
-
-                    # If both bots are in wait position, switch to WAIT state.
-                    if np.linalg.norm(right.pos-right_wait) + np.linalg.norm(left.pos-left_wait) < 200:
-                        self.state = State.WAIT
-
-                # Bots try to face the ball, waiting for perfect moment to team pinch.
-                elif self.state == State.WAIT:
-
-                    # Each drone should try to face the ball.
-                    for drone in self.drones:
-                        turn_to_pos(drone, self.ball.pos, game_time)
-
-                    # Filters out all the predictions where the ball is too far off the ground.
-                    # Result is a list of tuples of positions and time.
-                    filtered_prediction = [(a3v(step.physics.location), step.game_seconds)
-                                        for step in ball_prediction.slices if step.physics.location.z < 100]
-
-                    if len(filtered_prediction) > 0:
-                        # Turns the prediction into a numpy array for fast vectorized calculations.
-                        filtered_prediction = np.array(filtered_prediction)
-
-                        # Gets the vectors from the drones to the ball prediction.
-                        positions = np.vstack(filtered_prediction[:, 0])
-                        right_to_prediction = positions - right.pos
-                        left_to_prediction = positions - left.pos
-
-                        # Calculates the distances.
-                        # Cool blog post about einsum: http://ajcr.net/Basic-guide-to-einsum/
-                        right_distances = np.sqrt(
-                            np.einsum('ij,ij->i', right_to_prediction, right_to_prediction))
-                        left_distances = np.sqrt(
-                            np.einsum('ij,ij->i', left_to_prediction, left_to_prediction))
-
-                        # Filters out the predictions which are too close or too far.
-                        good_distances = (CLOSEST <= right_distances) & (FARTHEST >= right_distances) & (
-                            CLOSEST <= left_distances) & (FARTHEST >= left_distances)
-                        valid_targets = filtered_prediction[good_distances]
-
-                        if len(valid_targets) > 0:
-                            # Getting the remaining distances after filter.
-                            right_distances = right_distances[good_distances]
-                            left_distances = left_distances[good_distances]
-
-                            # Getting time estimates to go that distance. (Assuming boosting, and going in a straight line.)
-                            # https://www.geogebra.org/m/nnsat4pj
-                            right_times = right_distances**0.55 / 41.53
-                            right_times[right_distances > 2177.25] = 1/2300 * \
-                                right_distances[right_distances > 2177.25] + 0.70337
-                            right_times += game_time + TIME_BUFFER
-
-                            left_times = left_distances**0.55 / 41.53
-                            left_times[left_distances > 2177.25] = 1/2300 * \
-                                left_distances[left_distances > 2177.25] + 0.70337
-                            left_times += game_time + TIME_BUFFER
-
-                            # Filters out the predictions which we can't get to.
-                            good_times = (valid_targets[:, 1] > right_times) & (
-                                valid_targets[:, 1] > left_times)
-                            valid_targets = valid_targets[good_times]
-
-                            # To avoid flukes or anomalies, check that the ball is valid for at least 10 steps.
-                            # Not exact because there could be more bounce spots but good enough to avoid flukes.
-                            if len(valid_targets) > 10:
-                                # Select first valid target.
-                                self.pinch_target = valid_targets[0]
-                                # Reset drone's going attribute.
-                                right.going = False
-                                left.going = False
-                                # Set the state to PINCH.
-                                self.state = State.PINCH
-
-                    # Rendering number of positions viable after each condition.
-                    draw.draw_string_2d(
-                        10, 70, 2, 2, f'Good height: {len(filtered_prediction)}', draw.white())
-                    draw.draw_string_2d(
-                        10, 100, 2, 2, f'Good distance: {len(valid_targets)}', draw.white())
-                    # Render circles to show distances.
-                    draw.draw_polyline_3d(make_circle(
-                        CLOSEST, right.pos, 20), draw.cyan())
-                    draw.draw_polyline_3d(make_circle(
-                        CLOSEST, left.pos, 20), draw.cyan())
+        if len(frame.drones) == 2:
+            if frame.state == State.WAIT:
+                # Rendering number of positions viable after each condition.
+                draw.draw_string_2d(
+                    10, 70, 2, 2, f'Good height: {frame.good_height}', draw.white())
+                draw.draw_string_2d(
+                    10, 100, 2, 2, f'Good distance: {frame.good_distance}', draw.white())
+                # Render circles to show distances.
+                for drone in frame.drones:
                     draw.draw_polyline_3d(make_circle(
-                        FARTHEST, right.pos, 30), draw.pink())
+                        CLOSEST, drone.pos, 20), draw.cyan())
                     draw.draw_polyline_3d(make_circle(
-                        FARTHEST, left.pos, 30), draw.pink())
-
-                # Accelerates towards the ball to try and pinch it.
-                elif self.state == State.PINCH:
-
-                    # Checks if the ball has been hit recently.
-                    if packet.game_ball.latest_touch.time_seconds + 0.1 > game_time:
-                        self.pinch_target = None
-                        self.state = State.SETUP
-
-                    elif self.pinch_target is not None:
-                        if not right.going:
-                            # Get the distance to the target.
-                            right_distance = np.linalg.norm(
-                                self.pinch_target[0] - right.pos)
-                            # Get a time estimate
-                            right_time = right_distance**0.55 / \
-                                41.53 if right_distance <= 2177.25 else 1/2300 * right_distance + 0.70337
-
-                            # Waits until time is right to go. Otherwise turns to face the target position.
-                            if game_time + right_time + TIME_ERROR >= self.pinch_target[1]:
-                                right.going = True
-                            else:
-                                turn_to_pos(
-                                    right, self.pinch_target[0], game_time)
+                        FARTHEST, drone.pos, 30), draw.pink())
 
-                        else:
-                            fast_to_pos(right, self.pinch_target[0])
-
-                        # Same for left.
-                        if not left.going:
-                            left_distance = np.linalg.norm(
-                                self.pinch_target[0] - left.pos)
-                            left_time = left_distance**0.55 / \
-                                41.53 if left_distance <= 2177.25 else 1/2300 * left_distance + 0.70337
-                            if game_time + left_time + TIME_ERROR >= self.pinch_target[1]:
-                                left.going = True
-                            else:
-                                turn_to_pos(
-                                    left, self.pinch_target[0], game_time)
-                        else:
-                            fast_to_pos(left, self.pinch_target[0])
-
-                        # Some rendering.
-                        draw.draw_string_2d(
-                            10, 70, 2, 2, f'Right going: {right.going}', draw.white())
-                        draw.draw_string_2d(
-                            10, 100, 2, 2, f'Left going: {left.going}', draw.white())
-
-            # More or less than 2 HiveBots.
-            else:
+            elif frame.state == State.PINCH and frame.pinch_target is not None:
+                # Finds the right and left drones like planning does.
+                sign = team_sign(frame.team)
+                right, left = sorted(frame.drones, key=lambda drone: drone.pos[0]*sign)
                 draw.draw_string_2d(
-                    10, 10, 2, 2, 'This example version has only been coded for 2 HiveBots.', draw.red())
+                    10, 70, 2, 2, f'Right going: {right.going}', draw.white())
+                draw.draw_string_2d(
+                    10, 100, 2, 2, f'Left going: {left.going}', draw.white())
 
+        # More or less than 2 HiveBots.
+        else:
+            draw.draw_string_2d(
+                10, 10, 2, 2, 'This example version has only been coded for 2 HiveBots.', draw.red())
 
-            # Use this to send the drone inputs to the drones.
-            for drone in self.drones:
-                self.game_interface.update_player_input(
-                    drone.ctrl, drone.index)
+        # Some example rendering:
+        draw.draw_string_2d(10, 10, 3, 3, f'{frame.state}', draw.pink())
+        # Renders ball prediction
+        path = [step.physics.location for step in ball_prediction.slices[::10]]
+        draw.draw_polyline_3d(path, draw.pink())
 
-            # Some example rendering:
-            draw.draw_string_2d(10, 10, 3, 3, f'{self.state}', draw.pink())
-            # Renders ball prediction
-            path = [step.physics.location for step in ball_prediction.slices[::10]]
-            draw.draw_polyline_3d(path, draw.pink())
+        # Renders drone indices.
+        for drone in frame.drones:
+            draw.draw_string_3d(drone.pos, 1, 1, str(
+                drone.index), draw.white())
 
-            # Renders drone indices.
-            for drone in self.drones:
-                draw.draw_string_3d(drone.pos, 1, 1, str(
-                    drone.index), draw.white())
+        # Team pinch info.
+        pinch_target = frame.pinch_target
+        if pinch_target is not None:
+            draw.draw_rect_3d(
+                pinch_target[0], 10, 10, True, draw.red())
 
-            # Team pinch info.
-            if self.pinch_target is not None:
-                draw.draw_rect_3d(
-                    self.pinch_target[0], 10, 10, True, draw.red())
+        # Tick time percentiles, from the samples planning copied.
+        self.profiler.render(draw, 10, 400, samples=frame.tick_samples)
 
-            # Ending rendering.
-            draw.end_rendering()
+        # Ending rendering.
+        draw.end_rendering()
 
 # -----------------------------------------------------------
 
@@ -502,6 +559,59 @@ class Ball:
         self.pos: np.ndarray = np.zeros(3)
 
 
+class Frame:
+    """A copy of what the renderer draws, taken at the end of planning.
+
+    Attributes:
+        team {int} -- 0 if blue, else 1.
+        state {str} -- The hivemind's state.
+        good_height {int} -- Predicted ball positions low enough to pinch.
+        good_distance {int} -- Of those, the ones in range of both drones.
+        pinch_target {np.ndarray} -- Position and time of the pinch, or None.
+        drones {list} -- A FrameDrone for each drone.
+        tick_samples {np.ndarray} -- The profiler's samples of the ticks so far.
+    """
+    __slots__ = [
+        'team',
+        'state',
+        'good_height',
+        'good_distance',
+        'pinch_target',
+        'drones',
+        'tick_samples'
+    ]
+
+    def __init__(self, hivemind):
+        self.team: int = hivemind.team
+        self.state: str = hivemind.state
+        self.good_height: int = hivemind.good_height
+        self.good_distance: int = hivemind.good_distance
+        pinch_target = hivemind.pinch_target
+        self.pinch_target: np.ndarray = None if pinch_target is None else pinch_target.copy()
+        self.drones: list = [FrameDrone(drone) for drone in hivemind.drones]
+        self.tick_samples: np.ndarray = hivemind.profiler.copy_samples()
+
+
+class FrameDrone:
+    """A copy of what the renderer draws for a drone.
+
+    Attributes:
+        index {int} -- The car's index in the packet.
+        pos {np.ndarray} -- Position vector.
+        going {bool} -- True if going for the pinch.
+    """
+    __slots__ = [
+        'index',
+        'pos',
+        'going'
+    ]
+
+    def __init__(self, drone):
+        self.index: int = drone.index
+        self.pos: np.ndarray = drone.pos.copy()
+        self.going: bool = drone.going
+
+
 # An example state enum.
 # Since you are using a hivemind it is as if
 # all of your bots knew each other's state.
@@ -549,6 +659,17 @@ def a3v(V: Vector3) -> np.ndarray:
     """
     return np.array([V.x, V.y, V.z])
 
+
+# Numpy layout of a car in the packet. Only the fields we use are named;
+# the offsets come straight from the ctypes struct so they always match.
+# Physics is location, rotation, velocity and angular velocity, all floats.
+CAR_DTYPE = np.dtype({
+    'names': ['physics', 'boost'],
+    'formats': [(np.float32, (4, 3)), np.int32],
+    'offsets': [PlayerInfo.physics.offset, PlayerInfo.boost.offset],
+    'itemsize': ctypes.sizeof(PlayerInfo)
+})
+
 # -----------------------------------------------------------
 
 # LINEAR ALGEBRA:
@@ -594,6 +715,45 @@ def orient_matrix(R: np.ndarray) -> np.ndarray:
     return A
 
 
+def orient_matrices(R: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Converts many Euler angles to orientation matrices at once.
+    Same maths as orient_matrix, but each line works on a whole column of cars.
+
+    Arguments:
+        R {np.ndarray} -- Pitch, yaw, and roll of shape (n, 3).
+
+    Keyword Arguments:
+        out {np.ndarray} -- Array of shape (n, 3, 3) to write into. (default: {None})
+
+    Returns:
+        np.ndarray -- Orientation matrices of shape (n, 3, 3).
+    """
+    if out is None:
+        out = np.empty((len(R), 3, 3))
+
+    C = np.cos(R)
+    S = np.sin(R)
+    CP, CY, CR = C[:, 0], C[:, 1], C[:, 2]
+    SP, SY, SR = S[:, 0], S[:, 1], S[:, 2]
+
+    # front direction
+    out[:, 0, 0] = CP * CY
+    out[:, 1, 0] = CP * SY
+    out[:, 2, 0] = SP
+
+    # right direction
+    out[:, 0, 1] = CY * SP * SR - CR * SY
+    out[:, 1, 1] = SY * SP * SR + CR * CY
+    out[:, 2, 1] = -CP * SR
+
+    # up direction
+    out[:, 0, 2] = -CR * CY * SP - SR * SY
+    out[:, 1, 2] = -CR * SY * SP + SR * CY
+    out[:, 2, 2] = CP * CR
+
+    return out
+
+
 def local(A: np.ndarray, p0: np.ndarray, p1: np.ndarray) -> np.ndarray:
     """Transforms world coordinates into local coordinates.
 
@@ -1,10 +1,6 @@
 '''The Hivemind'''
 # This is a clean version of hivemind.py so it is easier to start your hivemind bot.
 
-import queue
-import time
-
-from rlbot.botmanager.agent_metadata import AgentMetadata
 from rlbot.botmanager.bot_helper_process import BotHelperProcess
 from rlbot.utils.logging_utils import get_logger
 from rlbot.utils.structures.bot_input_struct import PlayerInput
@@ -12,6 +8,8 @@ from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPac
 from rlbot.utils.structures.ball_prediction_struct import BallPrediction
 from rlbot.utils.structures.game_interface import GameInterface
 
+from runtime import Handshake, HivemindRuntime
+
 class ExampleHivemind(BotHelperProcess):
 
     # Some terminology:
@@ -34,22 +32,6 @@ class ExampleHivemind(BotHelperProcess):
         self.running_indices = set()
 
 
-    def try_receive_agent_metadata(self):
-        """Adds all drones with the correct key to our set of running indices."""
-        while True:  # Will exit on queue.Empty
-            try:
-                # Adds drone indices to running_indices set.
-                single_agent_metadata: AgentMetadata = self.metadata_queue.get(
-                    timeout=0.1)
-                self.running_indices.add(single_agent_metadata.index)
-
-            except queue.Empty:
-                return
-
-            except Exception as ex:
-                self.logger.error(ex)
-
-
     def start(self):
         """Runs once, sets up the hivemind and its agents."""
         # Prints an activation message into the console.
@@ -59,14 +41,16 @@ class ExampleHivemind(BotHelperProcess):
         # Loads game interface.
         self.game_interface.load_interface()
 
-        # Wait a moment for all agents to have a chance to start up and send metadata.
-        self.logger.info("Snoozing for 3 seconds; give me a moment.")
-        # Increase this number if you're having issues
-        # with bots not being added to the hivemind.
-        time.sleep(3)
-        self.try_receive_agent_metadata()
+        # Waits for the drones to send their metadata, but only until every bot on
+        # our team with our name has, or STARTUP_DEADLINE seconds at most.
+        # Set options['drones'] in hive_example.py to say how many to wait for instead.
+        handshake = Handshake(self.game_interface, self.metadata_queue, self.quit_event, count=self.options.get('drones'))
+        self.running_indices = handshake.wait()
+        self.started_ns = handshake.started_ns
+        if handshake.missing:
+            self.logger.warning(f"Starting without drones {sorted(handshake.missing)}. They'll join if they report in.")
 
-        self.logger.info("Finished sleeping. Ready to go!")
+        self.logger.info(f"{len(self.running_indices)} drones ready after {handshake.ready_ms:.0f} ms. Ready to go!")
 
         # This is how you access field info.
         # First create the initialise the object...
@@ -94,38 +78,55 @@ class ExampleHivemind(BotHelperProcess):
 
 
     def game_loop(self):
-        """The main game loop. This is where your hivemind code goes."""
+        """Runs the hivemind until the quit event is set."""
 
-        # Creating packet and ball prediction objects which will be updated every tick.
-        packet = GameTickPacket()
-        ball_prediction = BallPrediction()
+        # Runs ingest, planning, sending inputs and rendering as separate coroutines.
+        # Rendering happens on its own thread after the inputs are sent,
+        # and skips ticks if it falls behind, so it never delays the drones.
+        self.runtime = HivemindRuntime(
+            self.game_interface, self.metadata_queue, self.quit_event,
+            plan=self.plan, render=self.render, on_drone=self.add_drone,
+            key=min(drone.index for drone in self.drones), logger=self.logger,
+            started_ns=self.started_ns)
+        self.runtime.run()
 
-        # Nicknames the renderer to shorten code.
-        draw = self.game_interface.renderer
 
-        # MAIN LOOP:
-        while True:
+    def add_drone(self, index: int):
+        """Adds a drone which reported in after startup."""
+        if index in self.running_indices:
+            return
+        self.running_indices.add(index)
+        self.drones.append(Drone(index))
+        self.logger.info(f"Drone {index} joined late.")
+
+
+    def plan(self, packet: GameTickPacket, ball_prediction: BallPrediction) -> dict:
+        """Works out the drones' controls for a tick. This is where your hivemind code goes."""
+
+        for drone in self.drones:
+            drone.ctrl = PlayerInput()
 
-            previous_packet_time = packet.game_info.seconds_elapsed
+        # YOUR CODE GOES HERE:
 
-            # Updating the game packet from the game.
-            self.game_interface.update_live_data_packet(packet)
+        # The runtime sends these to the drones.
+        return {drone.index: drone.ctrl for drone in self.drones}
 
-            # Checking if packet is old. If yes, sleep and skip running the code.
-            if previous_packet_time == packet.game_info.seconds_elapsed:
-                time.sleep(0.001)
-                continue
 
-            for drone in self.drones:
-                self.ctrl = PlayerInput()
+    def render(self, packet: GameTickPacket, ball_prediction: BallPrediction):
+        """Draws debug rendering. Runs on its own thread, behind planning.
+
+        Planning carries on while this runs, so only read the arguments here.
+        Anything else you want to draw, copy at the end of plan and read the copy.
+        """
+
+        # Nicknames the renderer to shorten code.
+        draw = self.game_interface.renderer
+        draw.begin_rendering('Hivemind')
 
-            # YOUR CODE GOES HERE:
-            print('Hivemind is running')
+        # YOUR RENDERING GOES HERE:
+        draw.draw_string_2d(10, 10, 2, 2, 'Hivemind is running', draw.white())
 
-            # Use this to send the drone inputs to the drones.
-            for drone in self.drones:
-                self.game_interface.update_player_input(
-                    drone.ctrl, drone.index)
+        draw.end_rendering()
 
 
 # Clean drone class.
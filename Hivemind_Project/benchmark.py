@@ -0,0 +1,223 @@
+"""Microbenchmarks for the per-tick hot paths.
+
+Run with `python benchmark.py` from this folder. Each benchmark
+times the old way of doing something against the current one.
+"""
+import itertools
+import timeit
+
+import numpy as np
+
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+
+from rlutilities.linear_algebra import vec3
+
+from util.arena import collide_spheres
+from util.assignment import solve
+from util.goal_detector import FutureGoal, GoalDetector, find_future_goal, find_future_goals, prediction_view, GOAL_THRESHOLD, SLICE_WIDTH
+from util.intercept import DroneStates, find_intercepts, can_make, MAX_HEIGHT
+from util.landing import predict_landings, landing_orientations, GRAVITY, MAX_SPEED, SPHERE_RADIUS, DT, NUM_STEPS, SKIP_STEPS
+
+REPEATS = 100
+
+# Landings predicted step by step and batched, both over util.arena, may differ by this much
+# when they land on the same step.
+LANDING_TOLERANCE = 1
+
+
+def random_airborne_cars(n: int):
+    """Positions and velocities of cars in the air somewhere in the arena."""
+    position = np.random.uniform([-3500, -4500, 100], [3500, 4500, 1900], (n, 3))
+    velocity = np.random.uniform(-1, 1, (n, 3))
+    velocity *= np.random.uniform(0, MAX_SPEED, (n, 1)) / np.linalg.norm(velocity, axis=1, keepdims=True)
+    return position, velocity
+
+
+def step_landing(position: np.ndarray, velocity: np.ndarray):
+    """One car at a time, the way Recovery used to do it, but with util.arena standing in for Field.collide.
+
+    This only checks the batched search against a step by step one over the same arena model.
+    It says nothing about how well that model matches rlutilities' Field.collide.
+    """
+    position = position.copy()
+    velocity = velocity.copy()
+    for i in range(NUM_STEPS):
+        velocity += GRAVITY * DT
+        speed = np.linalg.norm(velocity)
+        if speed > MAX_SPEED:
+            velocity = velocity / speed * MAX_SPEED
+        position += velocity * DT
+
+        if i < SKIP_STEPS:
+            continue
+
+        touching, normal = collide_spheres(position, SPHERE_RADIUS)
+        if touching:
+            return position, normal, (i + 1) * DT
+    return position, np.zeros(3), NUM_STEPS * DT
+
+
+def bench_landing():
+    """Landing prediction for three airborne drones."""
+    position, velocity = random_airborne_cars(3)
+
+    def before():
+        return [step_landing(p, v) for p, v in zip(position, velocity)]
+
+    def after():
+        landings = predict_landings(position, velocity)
+        return landings, landing_orientations(landings)
+
+    # Check a larger sample against the step by step loop over the same arena model.
+    many_position, many_velocity = random_airborne_cars(500)
+    landings = predict_landings(many_position, many_velocity)
+    for i, (p, v) in enumerate(zip(many_position, many_velocity)):
+        old_position, old_normal, old_time = step_landing(p, v)
+        assert landings.landed[i] == np.any(old_normal != 0)
+        # The step by step loop caps speed each step while the batched one follows the capped dive exactly,
+        # so a sphere skimming a surface can touch a step sooner or later in one than the other.
+        steps_apart = round(abs(old_time - landings.time[i]) / DT)
+        assert steps_apart <= 1
+        assert np.linalg.norm(old_position - landings.position[i]) < LANDING_TOLERANCE + steps_apart * MAX_SPEED * DT
+
+    return before, after
+
+
+def random_ball_prediction(time: float) -> np.ndarray:
+    """Slices of a ball rolling and bouncing across the field, like goal_detector.prediction_view gives."""
+    slices = np.zeros((360, 13), dtype=np.float32)
+    t = np.arange(360) / 60
+    slices[:, 0] = np.random.uniform(-3000, 3000) + np.random.uniform(-500, 500) * t
+    slices[:, 1] = np.random.uniform(-4000, 4000) + np.random.uniform(-1500, 1500) * t
+    slices[:, 2] = 93 + np.abs(np.sin(t * 2)) * np.random.uniform(0, 500)
+    slices[:, 12] = time + t
+    return slices
+
+
+def bench_intercepts():
+    """Soonest intercepts of three drones."""
+    time = 10.0
+    slices = random_ball_prediction(time)
+    angles = np.random.uniform(-np.pi, np.pi, 3)
+    drones = DroneStates(
+        np.random.uniform([-3000, -4000, 17], [3000, 4000, 17], (3, 3)),
+        np.random.uniform([-1500, -1500, 0], [1500, 1500, 0], (3, 3)),
+        np.stack((np.cos(angles), np.sin(angles), np.zeros(3)), axis=1),
+        np.random.uniform(0, 100, 3),
+    )
+
+    # One drone and one slice at a time until one can be made.
+    def before():
+        firsts = []
+        for i in range(len(drones)):
+            first = -1
+            for s, step in enumerate(slices):
+                if step[2] <= MAX_HEIGHT and can_make(drones[i:i + 1], step[None, None, 0:3].astype(float), step[None, None, 12].astype(float), time)[0, 0]:
+                    first = s
+                    break
+            firsts.append(first)
+        return firsts
+
+    def after():
+        return find_intercepts(drones, slices, time)
+
+    assert np.array_equal(before(), after().slice)
+
+    return before, after
+
+
+def bench_assignment():
+    """Assignment of five drones to six tasks."""
+    cost = np.random.uniform(0, 5, (5, 6))
+    rows = np.arange(5)
+
+    # Every way of giving each drone a different task.
+    def before():
+        return min(itertools.permutations(range(6), 5), key=lambda tasks: cost[rows, tasks].sum())
+
+    def after():
+        return solve(cost)
+
+    assert np.isclose(cost[rows, before()].sum(), cost[rows, after()].sum())
+
+    return before, after
+
+
+def shifted_predictions(ticks: int, start: float = 900.0) -> list:
+    """A ball prediction for each of a run of ticks, each starting a tick later along the same trajectory.
+
+    The ball swings from goal to goal, so the predictions cross goal lines, and slices are
+    1/60 s apart while predictions are 1/120 s apart, like the game's.
+    """
+    predictions = []
+    for tick in range(ticks):
+        t = start + tick / 120 + np.arange(360) / 60
+        slices = np.zeros((360, SLICE_WIDTH), dtype=np.float32)
+        slices[:, 0] = 1000 * np.sin(t * 0.3)
+        slices[:, 1] = 5500 * np.sin(t * 0.7)
+        slices[:, 2] = 93
+        slices[:, 7] = 5500 * 0.7 * np.cos(t * 0.7)
+        slices[:, 12] = t
+        ball_prediction = BallPrediction()
+        ball_prediction.num_slices = 360
+        prediction_view(ball_prediction)[:] = slices
+        predictions.append(ball_prediction)
+    return predictions
+
+
+def same_goals(a: list, b: list) -> bool:
+    return [(goal.time, goal.team, goal.position[1]) for goal in a] == [(goal.time, goal.team, goal.position[1]) for goal in b]
+
+
+def coarse_goal(ball_prediction: BallPrediction):
+    """First goal, searched every 20 slices and then one by one, the way find_future_goal used to."""
+    for coarse_index in range(0, ball_prediction.num_slices, 20):
+        if abs(ball_prediction.slices[coarse_index].physics.location.y) >= GOAL_THRESHOLD:
+            for j in range(max(0, coarse_index - 20), coarse_index):
+                step = ball_prediction.slices[j]
+                position = step.physics.location
+                if abs(position.y) >= GOAL_THRESHOLD:
+                    vel = step.physics.velocity
+                    return FutureGoal(vec3(position.x, position.y, position.z), vec3(vel.x, vel.y, vel.z), step.game_seconds, int(position.y > 0))
+    return None
+
+
+def bench_goals():
+    """First goal in a new ball prediction every tick."""
+    predictions = shifted_predictions(240)
+    ticks = itertools.cycle(predictions)
+
+    def before():
+        return coarse_goal(next(ticks))
+
+    def after():
+        return find_future_goal(next(ticks))
+
+    # The detector finds the same goals tick after tick as searching each prediction on its own.
+    check = GoalDetector()
+    for ball_prediction in predictions:
+        assert same_goals(check.update(ball_prediction), find_future_goals(ball_prediction))
+
+    return before, after
+
+
+BENCHMARKS = [
+    bench_landing,
+    bench_intercepts,
+    bench_assignment,
+    bench_goals,
+]
+
+
+def run(benchmark, repeats: int = REPEATS):
+    """Times a benchmark and prints the per-call cost before and after."""
+    before, after = benchmark()
+    before_us = timeit.timeit(before, number=repeats) / repeats * 1e6
+    after_us = timeit.timeit(after, number=repeats) / repeats * 1e6
+    print(f"{benchmark.__doc__:<50} {before_us:10.2f} us {after_us:10.2f} us {before_us/after_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    print(f"{'':<50} {'before':>13} {'after':>13} {'speedup':>9}")
+    for benchmark in BENCHMARKS:
+        run(benchmark)
@@ -1,22 +1,29 @@
 from typing import Dict
 from enum import Enum
 
+import numpy as np
+
 from rlbot.agents.hivemind.python_hivemind import PythonHivemind
 from rlbot.utils.structures.bot_input_struct import PlayerInput
 from rlbot.utils.structures.game_data_struct import GameTickPacket
 from rlbot.utils.structures.ball_prediction_struct import BallPrediction
-from rlbot.utils.rendering.rendering_manager import RenderingManager
 
 from rlutilities.linear_algebra import vec2, vec3, dot, norm, normalize, look_at, angle_between
 from rlutilities.mechanics import Drive, AerialTurn
 from rlutilities.simulation import Game
 
 from util.drone import Drone
-from util.general import team_sign, to_player_input
-from util.goal_detector import find_future_goal
-from util.vector_maths import dist, flat
-
-from manoeuvres.recovery import Recovery
+from util.assignment import Assigner
+from util.general import team_sign, copy_controls, reset_controls
+from util.goal_detector import GoalDetector, prediction_view, LOCATION
+from util.intercept import DroneStates, drive_times
+from util.planner import Planner
+from util.profiler import TickProfiler, FRAME_MS
+from util.render import RenderManager
+from util.replay import Recorder
+from util.vector_maths import dist, flat, vec3_to_array
+
+from manoeuvres.recovery import Recovery, landing_pos_and_orientation
 from manoeuvres.half_flip import HalfFlip
 from manoeuvres.aerial import Aerial
 from manoeuvres.slow_to_pos import SlowToPos
@@ -26,10 +33,20 @@ MIDDLE_POS = vec3(0, -5300, 0)
 LEFT_POS = vec3(900, -4900, 0)
 DEFENCE_POSITIONS = [RIGHT_POS, MIDDLE_POS, LEFT_POS]
 IN_FRONT_OF_OWN_GOAL = vec3(0, -5000, 0)
+# Seconds of total drive time a new assignment of defence positions has to save to be taken.
+ROLE_HYSTERESIS = 0.5
 
 
 class Overmind(PythonHivemind):
+    # Debug rendering and logging. Turn off for ranked matches, then rendering costs nothing.
     verbose = True
+    # Most times per second to redraw the debug render groups.
+    debug_render_rate = 20.0
+    tick_budget_ms = FRAME_MS
+    # Path to record game data to for offline replay with util/replay.py, or None.
+    record_replay = None
+    # Worker threads for the planning stage, 0 to plan on the main thread.
+    planner_workers = 2
 
     def initialize_hive(self, packet: GameTickPacket) -> None:
         if self.verbose:
@@ -47,8 +64,8 @@ class Overmind(PythonHivemind):
         self.sign = team_sign(self.team)
 
         # Create Drone objects for each drone.
+        # Any number works: the saver is picked from all of them, and the rest share the defence positions.
         self.drones = [Drone(index) for index in self.drone_indices]
-        assert len(self.drones) == 3, "The Swarm was hardcoded for exactly three drones."
 
         # Create Game object.
         self.game = Game(my_index, self.team)
@@ -56,6 +73,9 @@ class Overmind(PythonHivemind):
         self.update_game(packet)
         self.game.set_mode("soccar")
 
+        # Remembers goal crossings between ticks.
+        self.goal_detector = GoalDetector()
+
         # Initialise all mechanics.
         for drone in self.drones:
             car = self.game.cars[drone.index]
@@ -64,9 +84,32 @@ class Overmind(PythonHivemind):
             drone.aerial = None
             drone.slow_to_pos = None
             drone.aerial_turn = AerialTurn(car)
+            drone.drive = Drive(car)
             drone.car = car
 
+        # Searches for all drones at once on a pool of worker threads.
+        self.planner = Planner(self.planner_workers)
+        # Drone going for the save, kept until the danger has passed.
+        self.saver = None
+        # Drones go to the defence positions they get to soonest altogether.
+        self.defence = Assigner(ROLE_HYSTERESIS)
+
+        # Only sends render groups which changed.
+        self.draw = RenderManager(self.renderer, enabled=self.verbose)
+
+        # Times each phase of get_outputs.
+        self.profiler = TickProfiler(["update", "predict", "plan", "render", "control"], budget_ms=self.tick_budget_ms, logger=self.logger)
+        self.reported = False
+
+        self.recorder = None
+        if self.record_replay:
+            self.recorder = Recorder(self.record_replay, self.field_info, my_index)
+
     def get_outputs(self, packet: GameTickPacket) -> Dict[int, PlayerInput]:
+        self.profiler.start()
+
+        if self.recorder is not None:
+            self.recorder.record(packet, self.get_ball_prediction_struct())
 
         self.update_game(packet)
         dt = self.game.time_delta
@@ -79,52 +122,88 @@ class Overmind(PythonHivemind):
             else:
                 drone.time_on_ground = 0.0
                 drone.time_off_ground += dt
+        self.profiler.lap("update")
 
         # Ball prediction.
         ball_prediction: BallPrediction = self.get_ball_prediction_struct()
-        future_goal = find_future_goal(ball_prediction)
-        needs_saving = False
-        if future_goal is not None:
-            if future_goal.team == self.team:
-                needs_saving = True
+        future_goals = self.goal_detector.update(ball_prediction)
+        future_goal = next((goal for goal in future_goals if goal.team == self.team), None)
+        needs_saving = future_goal is not None
+        self.profiler.lap("predict")
+
+        # Plan for every drone at once. Landings are only needed by the ones recovering.
+        drone_states = DroneStates(
+            np.array([vec3_to_array(drone.car.position) for drone in self.drones]),
+            np.array([vec3_to_array(drone.car.velocity) for drone in self.drones]),
+            np.array([vec3_to_array(drone.car.forward()) for drone in self.drones]),
+            np.array([drone.car.boost for drone in self.drones], dtype=float),
+        )
+        plan = self.planner.plan(
+            drone_states,
+            prediction_view(ball_prediction),
+            self.game.time,
+            landings=any(drone.time_on_ground < 0.2 for drone in self.drones),
+        )
+        self.profiler.lap("plan")
 
-        if self.verbose:
-            self.render_ball_prediction(ball_prediction)
+        self.render_ball_prediction(ball_prediction)
+        self.render_profile()
+        self.profiler.lap("render")
 
-        # Reset controls.
+        # Reset controls. Each drone keeps the same PlayerInput for the whole game.
         for drone in self.drones:
-            drone.controls = PlayerInput()        
-        
-        # Sort drones right to left.
-        self.drones.sort(key=lambda drone: self.sign * drone.car.position[0])
+            reset_controls(drone.controls)
 
         if needs_saving:
-            if self.verbose:
-                self.render_target(future_goal.position)
-
-            going = None
-            for drone in self.drones:
-                if drone.ready:
-                    # TODO Calculate soonest intercept for each drone
-                    pass
-
-            # if still nothing, consider not ready.
+            self.render_target(future_goal.position)
 
+            # The ready drone which gets to the ball first goes.
+            if self.saver is None:
+                going = plan.soonest(np.array([drone.ready for drone in self.drones]))
+                if going is not None:
+                    self.saver = self.drones[going]
+        else:
+            self.saver = None
+
+        # Everyone else covers the defence positions.
+        defenders = [i for i, drone in enumerate(self.drones) if drone is not self.saver]
+        defence_positions = [pos * self.sign for pos in DEFENCE_POSITIONS]
+        costs = drive_times(drone_states[defenders], np.array([vec3_to_array(pos) for pos in defence_positions]))
+        slots = self.defence.assign(costs, [self.drones[i].index for i in defenders])
+        for i, slot in zip(defenders, slots):
+            drone = self.drones[i]
+            # Drones left without a slot wait in front of goal instead of taking someone else's.
+            drone.defence_pos = defence_positions[slot] if slot >= 0 else self.sign * IN_FRONT_OF_OWN_GOAL
 
         # Go back to goal.
         for i, drone in enumerate(self.drones):
             drone.ready = False
-            defence_pos = DEFENCE_POSITIONS[i] * self.sign
+
+            # Drive to the intercept, or the goal if there isn't one anymore.
+            if drone is self.saver:
+                intercepts = plan.intercepts
+                if intercepts.slice[i] >= 0:
+                    drone.drive.target = vec3(*(float(x) for x in intercepts.position[i]))
+                    time_left = max(intercepts.time[i] - self.game.time, 1 / 120)
+                    drone.drive.speed = dist(drone.car.position, drone.drive.target) / time_left
+                else:
+                    drone.drive.target = future_goal.position
+                    drone.drive.speed = 2300
+                drone.drive.step(dt)
+                copy_controls(drone.drive.controls, drone.controls)
+                continue
+
+            defence_pos = drone.defence_pos
             if drone.slow_to_pos is None:
-                drone.slow_to_pos = SlowToPos(drone.car, defence_pos)
+                drone.slow_to_pos = SlowToPos(drone.car, defence_pos, drone.controls)
 
             if dist(drone.car.position, defence_pos) > 200:
                 # Recovery.
                 if drone.time_on_ground < 0.2 and drone.slow_to_pos.half_flip is None:
                     if drone.recovery is None:
                         drone.recovery = Recovery(drone.car)
-                    drone.recovery.step(dt)
-                    drone.controls = to_player_input(drone.recovery.controls)
+                    drone.recovery.step(dt, landing_pos_and_orientation(drone.car, plan.landings, i))
+                    copy_controls(drone.recovery.controls, drone.controls)
 
                 # Go to pos.
                 else:
@@ -133,7 +212,6 @@ class Overmind(PythonHivemind):
                     
                     drone.slow_to_pos.target = defence_pos
                     drone.slow_to_pos.step(dt)
-                    drone.controls = to_player_input(drone.slow_to_pos.controls)
 
             else:
                 # If speed is low, jump and turn.
@@ -143,7 +221,7 @@ class Overmind(PythonHivemind):
 
                     drone.aerial_turn.target = look_at(car_to_look_pos, vec3(0, 0, 1))
                     drone.aerial_turn.step(dt)
-                    drone.controls = to_player_input(drone.aerial_turn.controls)
+                    copy_controls(drone.aerial_turn.controls, drone.controls)
 
                     if angle_between(drone.car.forward(), normalize(car_to_look_pos)) > 0.3:
                         if drone.time_on_ground > 0.2 or (drone.car.jumped and drone.time_off_ground < 0.05):
@@ -156,7 +234,19 @@ class Overmind(PythonHivemind):
                 else:
                     drone.slow_to_pos.target = defence_pos
                     drone.slow_to_pos.step(dt)
-                    drone.controls = to_player_input(drone.slow_to_pos.controls)
+
+        self.profiler.lap("control", label="Overmind")
+        self.profiler.end()
+
+        # Dump the tick profile once the match is over.
+        if packet.game_info.is_match_ended and not self.reported:
+            self.logger.info(self.profiler.report())
+            self.reported = True
+            self.planner.close()
+            if self.recorder is not None:
+                self.recorder.close()
+                self.logger.info(f"Recorded {self.recorder.ticks} ticks.")
+                self.recorder = None
 
         return self.make_drone_controls_dict()
 
@@ -171,13 +261,19 @@ class Overmind(PythonHivemind):
 
 
     def render_ball_prediction(self, ball_prediction: BallPrediction):
-        r: RenderingManager = self.renderer
-        r.begin_rendering(f"{self} - ball prediction")
-        r.draw_polyline_3d([step.physics.location for step in ball_prediction.slices[:ball_prediction.num_slices:20]], r.cyan())
-        r.end_rendering()
+        r: RenderManager = self.draw
+        if r.begin_rendering(f"{self} - ball prediction", rate=self.debug_render_rate, now=self.game.time):
+            r.draw_polyline_3d(prediction_view(ball_prediction)[:, LOCATION], r.cyan())
+            r.end_rendering()
+
+    def render_profile(self):
+        r: RenderManager = self.draw
+        if r.begin_rendering(f"{self} - profile", rate=self.debug_render_rate, now=self.game.time):
+            self.profiler.render(r, 20, 400 + 120 * self.team)
+            r.end_rendering()
 
     def render_target(self, target):
-        r: RenderingManager = self.renderer
-        r.begin_rendering(f"{self} - target {target}")
-        r.draw_rect_3d(target, 10, 10, True, r.red())
-        r.end_rendering()
\ No newline at end of file
+        r: RenderManager = self.draw
+        if r.begin_rendering(f"{self} - target"):
+            r.draw_rect_3d(target, 10, 10, True, r.red())
+            r.end_rendering()
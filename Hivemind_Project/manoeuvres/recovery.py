@@ -1,5 +1,5 @@
 from math import isnan
-from typing import Tuple
+from typing import Optional, Tuple
 
 from rlutilities.linear_algebra import (
     vec3,
@@ -9,22 +9,20 @@ from rlutilities.linear_algebra import (
     look_at,
     angle_between,
     dot,
-    cross,
     euler_to_rotation,
 )
 from rlutilities.mechanics import AerialTurn
-from rlutilities.simulation import Car, Field, sphere
+from rlutilities.simulation import Car
 
 from manoeuvres.manoeuvre import Manoeuvre
-from util.vector_maths import three_vec3_to_mat3, dist
+from util.landing import Landings, predict_landings, landing_orientations
+from util.vector_maths import dist, vec3_to_array, array_to_vec3, array_to_mat3
 
 BOOST_HEIGHT_COMPENSATION = -2000
 BOOST_ANGLE_DIFFERENCE_TOLERANCE = 0.5
 MINIMUM_RECOVERY_TIME = 0.5
 FINISHED_TIME_ON_GROUND = 0.2
-SIMULATION_SPHERE_RADIUS = 40
 SIMULATION_DT = 1 / 60
-GRAVITY = -650
 
 
 class Recovery(Manoeuvre):
@@ -38,14 +36,16 @@ class Recovery(Manoeuvre):
         # RLU Mechanic setup
         self.aerial_turn = AerialTurn(self.car)
 
-    def step(self, dt: float):
+    def step(self, dt: float, landing: Optional[Tuple[vec3, mat3]] = None):
+        """Pass in the landing from landing_pos_and_orientation to share one batched prediction between cars."""
         self.controls.boost = False
 
+        if landing is None:
+            landing = self.find_landing_pos_and_orientation(SIMULATION_DT)
+
         # Prepare for landing.
         if self.about_to_land:
-            _landing_pos, orientation = self.find_landing_pos_and_orientation(
-                SIMULATION_DT
-            )
+            _landing_pos, orientation = landing
 
             self.aerial_turn.target = orientation
             self.aerial_turn.step(dt)
@@ -53,9 +53,7 @@ class Recovery(Manoeuvre):
 
         # Boost down.
         else:
-            landing_pos, _orientation = self.find_landing_pos_and_orientation(
-                SIMULATION_DT
-            )
+            landing_pos, _orientation = landing
             under_landing_pos = landing_pos + vec3(0, 0, BOOST_HEIGHT_COMPENSATION)
             landing_dir = normalize(under_landing_pos - self.car.position)
 
@@ -106,36 +104,14 @@ class Recovery(Manoeuvre):
 
     def find_landing_pos_and_orientation(self, dt, num_points=200) -> Tuple[vec3, mat3]:
         """Simulate the car until it lands and return its final position and desired orientation."""
-        position = vec3(self.car.position)
-        velocity = vec3(self.car.velocity)
-        gravity = vec3(0, 0, GRAVITY)
-
-        for i in range(num_points):
-            velocity += gravity * dt
-            speed = norm(velocity)
-            if speed > 2300:
-                velocity = velocity / speed * 2300
-            position += velocity * dt
-
-            # Ignore first 10 frames because it might be ceiling.
-            if i < 10:
-                continue
-
-            # Check for collisions with field.
-            collision_normal = Field.collide(
-                sphere(position, SIMULATION_SPHERE_RADIUS)
-            ).direction
-            # Break out of simulation when collided.
-            if norm(collision_normal) > 0.0:
-                # Flatten velocity with regards to normal to get forward.
-                forward = normalize(
-                    velocity - dot(velocity, collision_normal) * collision_normal
-                )
-                left = normalize(cross(collision_normal, forward))
-                break
-
-        # If we don't break we return the current orientation.
-        else:
-            return position, self.car.orientation
+        landings = predict_landings(vec3_to_array(self.car.position), vec3_to_array(self.car.velocity), dt, num_points)
+        return landing_pos_and_orientation(self.car, landings, 0)
+
 
-        return position, three_vec3_to_mat3(forward, left, collision_normal)
+def landing_pos_and_orientation(car: Car, landings: Landings, i: int) -> Tuple[vec3, mat3]:
+    """Landing position and desired orientation of the i-th car of a batched prediction."""
+    position = array_to_vec3(landings.position[i])
+    # If it doesn't land we keep the current orientation.
+    if not landings.landed[i]:
+        return position, car.orientation
+    return position, array_to_mat3(landing_orientations(landings)[i])
@@ -8,13 +8,15 @@ from rlutilities.simulation import Car
 from manoeuvres.manoeuvre import Manoeuvre
 from manoeuvres.half_flip import HalfFlip
 from util.vector_maths import dist
-from util.general import clamp, to_player_input
+from util.general import clamp, copy_controls, reset_controls
 
 
 class SlowToPos(Manoeuvre):
 
-    def __init__(self, car: Car, target: vec3):
+    def __init__(self, car: Car, target: vec3, controls: PlayerInput = None):
+        """Writes into controls if given, so the drone's own PlayerInput can be passed in."""
         super().__init__(car)
+        self.controls = controls if controls is not None else PlayerInput()
         self.target = target
         self.half_flip = None
 
@@ -22,7 +24,7 @@ class SlowToPos(Manoeuvre):
 
         if self.half_flip is not None:
             self.half_flip.step(dt)
-            self.controls = to_player_input(self.half_flip.controls)
+            copy_controls(self.half_flip.controls, self.controls)
             if self.half_flip.finished:
                 self.half_flip = None
 
@@ -39,7 +41,7 @@ class SlowToPos(Manoeuvre):
             forward_speed = dot(self.car.velocity, self.car.forward())
 
             # Reset controls.
-            self.controls = PlayerInput()
+            reset_controls(self.controls)
 
             if distance > 100:
                 self.finished = False
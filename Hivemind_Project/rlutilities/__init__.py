@@ -1,5 +1,12 @@
 import sys
-from .rlutilities import mechanics, simulation, linear_algebra
+
+try:
+    from .rlutilities import mechanics, simulation, linear_algebra
+    NATIVE = True
+except ImportError:
+    # The compiled module is Windows only; use the NumPy version anywhere else.
+    from .fallback import mechanics, simulation, linear_algebra
+    NATIVE = False
 
 sys.modules["rlutilities.mechanics"] = mechanics
 sys.modules["rlutilities.simulation"] = simulation
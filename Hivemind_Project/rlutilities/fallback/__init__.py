@@ -0,0 +1,7 @@
+"""Pure Python and NumPy stand-in for the native rlutilities module.
+
+Used automatically where rlutilities.cp37-win_amd64.pyd can't be loaded,
+so the hive can be run, tested and benchmarked on any platform.
+Only what the hive uses is here, and the mechanics are simplified.
+"""
+from . import linear_algebra, simulation, mechanics
@@ -0,0 +1,218 @@
+"""NumPy version of the parts of rlutilities.linear_algebra the hive uses.
+
+Matrices follow the rlutilities convention: the columns of an orientation
+are the forward, left and up directions of the car.
+"""
+from math import acos, cos, sin, sqrt
+from typing import Union
+
+import numpy as np
+
+
+class _Vector:
+    __slots__ = ("_data",)
+    size = 0
+
+    def __init__(self, *args):
+        if len(args) == 1 and isinstance(args[0], _Vector):
+            # Converting between sizes drops or zero-fills the last components.
+            data = np.zeros(self.size)
+            n = min(self.size, args[0].size)
+            data[:n] = args[0]._data[:n]
+        elif len(args) == self.size:
+            data = np.array(args, dtype=float)
+        else:
+            raise TypeError(f"{type(self).__name__} takes {self.size} floats or another vector, got {args}")
+        self._data = data
+
+    @classmethod
+    def _wrap(cls, data: np.ndarray):
+        vector = cls.__new__(cls)
+        vector._data = data
+        return vector
+
+    def __getitem__(self, index: int) -> float:
+        return float(self._data[index])
+
+    def __setitem__(self, index: int, value: float):
+        self._data[index] = value
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return iter(self._data.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._data, dtype=dtype, copy=True) if copy else np.asarray(self._data, dtype=dtype)
+
+    def __add__(self, other):
+        return self._wrap(self._data + other._data)
+
+    def __sub__(self, other):
+        return self._wrap(self._data - other._data)
+
+    def __mul__(self, scale: float):
+        return self._wrap(self._data * scale)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scale: float):
+        return self._wrap(self._data / scale)
+
+    def __neg__(self):
+        return self._wrap(-self._data)
+
+    def __iadd__(self, other):
+        self._data += other._data
+        return self
+
+    def __isub__(self, other):
+        self._data -= other._data
+        return self
+
+    def __imul__(self, scale: float):
+        self._data *= scale
+        return self
+
+    def __itruediv__(self, scale: float):
+        self._data /= scale
+        return self
+
+    def __str__(self) -> str:
+        return "{" + ", ".join(f"{x:f}" for x in self._data) + "}"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(repr(x) for x in self._data.tolist())})"
+
+
+class vec2(_Vector):
+    __slots__ = ()
+    size = 2
+
+
+class vec3(_Vector):
+    __slots__ = ()
+    size = 3
+
+
+class mat3:
+    __slots__ = ("_data",)
+
+    def __init__(self, *args):
+        if len(args) == 1 and isinstance(args[0], mat3):
+            data = args[0]._data.copy()
+        elif len(args) == 9:
+            # Row by row, like the native constructor.
+            data = np.array(args, dtype=float).reshape(3, 3)
+        else:
+            raise TypeError(f"mat3 takes 9 floats or another mat3, got {args}")
+        self._data = data
+
+    @classmethod
+    def _wrap(cls, data: np.ndarray):
+        matrix = cls.__new__(cls)
+        matrix._data = data
+        return matrix
+
+    def __getitem__(self, index) -> float:
+        return float(self._data[index])
+
+    def __setitem__(self, index, value: float):
+        self._data[index] = value
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._data, dtype=dtype, copy=True) if copy else np.asarray(self._data, dtype=dtype)
+
+    def __str__(self) -> str:
+        return "\n".join("{" + ", ".join(f"{x:f}" for x in row) + "}" for row in self._data)
+
+    def __repr__(self) -> str:
+        return f"mat3({', '.join(repr(x) for x in self._data.ravel().tolist())})"
+
+
+Vector = Union[vec2, vec3]
+
+
+def dot(a, b):
+    """Dot product of vectors, or a vector or matrix product when either is a matrix."""
+    result = a._data @ b._data
+    if isinstance(a, mat3) and isinstance(b, mat3):
+        return mat3._wrap(result)
+    if isinstance(a, mat3) or isinstance(b, mat3):
+        return vec3._wrap(result)
+    return float(result)
+
+
+def norm(v: Vector) -> float:
+    return sqrt(v._data @ v._data)
+
+
+def normalize(v: Vector) -> Vector:
+    """Unit vector in the direction of v, or v itself if it is zero."""
+    length = norm(v)
+    return v / length if length > 0 else type(v)._wrap(v._data.copy())
+
+
+def cross(a: vec3, b: vec3) -> vec3:
+    return vec3._wrap(np.cross(a._data, b._data))
+
+
+def angle_between(a, b) -> float:
+    """Angle between two vectors, or of the rotation from one orientation to another."""
+    if isinstance(a, mat3):
+        cos_angle = (np.trace(a._data.T @ b._data) - 1) / 2
+    else:
+        cos_angle = dot(a, b) / max(norm(a) * norm(b), 1e-12)
+    return acos(min(max(cos_angle, -1.0), 1.0))
+
+
+def look_at(direction: vec3, up: vec3 = None) -> mat3:
+    """Orientation facing direction with its roof as close to up as possible."""
+    if up is None:
+        up = vec3(0, 0, 1)
+    forward = normalize(direction)
+    left = normalize(cross(up, forward))
+    up = cross(forward, left)
+    return mat3._wrap(np.column_stack((forward._data, left._data, up._data)))
+
+
+def euler_to_rotation(pitch_yaw_roll: vec3) -> mat3:
+    """Orientation from the pitch, yaw and roll the game uses."""
+    cp, sp = cos(pitch_yaw_roll[0]), sin(pitch_yaw_roll[0])
+    cy, sy = cos(pitch_yaw_roll[1]), sin(pitch_yaw_roll[1])
+    cr, sr = cos(pitch_yaw_roll[2]), sin(pitch_yaw_roll[2])
+    return mat3(
+        cp * cy, cy * sp * sr - cr * sy, -cr * cy * sp - sr * sy,
+        cp * sy, sy * sp * sr + cr * cy, -cr * sy * sp + sr * cy,
+        sp, -cp * sr, cp * cr,
+    )
+
+
+def rotation_to_axis(rotation: mat3) -> vec3:
+    """Axis of a rotation scaled by its angle."""
+    m = rotation._data
+    angle = acos(min(max((np.trace(m) - 1) / 2, -1.0), 1.0))
+    axis = np.array([m[2, 1] - m[1, 2], m[0, 2] - m[2, 0], m[1, 0] - m[0, 1]])
+    length = np.linalg.norm(axis)
+    if length < 1e-9:
+        if angle < 1e-6:
+            return vec3(0, 0, 0)
+        # Half a turn; the axis is the column of (m + I) / 2 which isn't zero.
+        half = (m + np.eye(3)) / 2
+        axis = half[:, np.argmax(np.diag(half))]
+        length = np.linalg.norm(axis)
+    return vec3._wrap(axis * (angle / length))
+
+
+def transpose(matrix: mat3) -> mat3:
+    return mat3._wrap(matrix._data.T.copy())
+
+
+def clip(value: float, minimum: float, maximum: float) -> float:
+    return max(min(value, maximum), minimum)
+
+
+def sgn(value: float) -> float:
+    return float((value > 0) - (value < 0))
+
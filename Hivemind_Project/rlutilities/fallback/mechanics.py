@@ -0,0 +1,144 @@
+"""Simplified versions of the rlutilities mechanics the hive uses.
+
+These produce sensible controls so hive logic can run and be tested without the
+native module, but they are simple controllers rather than the native ones.
+Don't expect them to play the same.
+"""
+from math import atan2, inf
+
+from .linear_algebra import vec2, vec3, mat3, dot, norm, normalize, look_at, transpose, rotation_to_axis, clip
+from .simulation import Car, Input
+
+# Angular acceleration of roll, pitch and yaw at full input, in the car's forward, left, up axes.
+ROLL_TORQUE = -36.07956616966136
+PITCH_TORQUE = -12.14599781908070
+YAW_TORQUE = 8.91962804287785
+
+GRAVITY = vec3(0, 0, -650)
+
+
+class AerialTurn:
+    """Turns the car in the air towards a target orientation with a PD controller."""
+    def __init__(self, car: Car):
+        self.car = car
+        self.target: mat3 = car.orientation
+        self.controls = Input()
+        self.finished = False
+        self.horizon_time = 0.3
+        self.eps_phi = 0.1
+        self.eps_omega = 0.15
+
+    def step(self, dt: float):
+        # Rotation left to do and angular velocity, both in the car's axes.
+        to_target = rotation_to_axis(dot(transpose(self.car.orientation), self.target))
+        omega = dot(self.car.angular_velocity, self.car.orientation)
+
+        # Critically damped for the horizon time.
+        horizon = self.horizon_time
+        alpha = (to_target - omega * horizon) * (2 / horizon ** 2)
+
+        self.controls = Input()
+        self.controls.roll = clip(alpha[0] / ROLL_TORQUE, -1.0, 1.0)
+        self.controls.pitch = clip(alpha[1] / PITCH_TORQUE, -1.0, 1.0)
+        self.controls.yaw = clip(alpha[2] / YAW_TORQUE, -1.0, 1.0)
+
+        self.finished = norm(to_target) < self.eps_phi and norm(omega) < self.eps_omega
+
+
+class Drive:
+    """Steers towards the target while holding a speed."""
+    max_speed = 2300.0
+    max_throttle_speed = 1410.0
+
+    def __init__(self, car: Car):
+        self.car = car
+        self.target = vec3(0, 0, 0)
+        self.speed = self.max_throttle_speed
+        self.reaction_time = 0.04
+        self.controls = Input()
+        self.finished = False
+
+    def step(self, dt: float):
+        local = dot(self.target - self.car.position, self.car.orientation)
+        angle = atan2(local[1], local[0])
+        forward_speed = dot(self.car.velocity, self.car.forward())
+        speed_error = self.speed - forward_speed
+
+        self.controls = Input()
+        self.controls.steer = clip(3.0 * angle, -1.0, 1.0)
+        self.controls.throttle = clip(speed_error / 100, -1.0, 1.0)
+        self.controls.boost = speed_error > 100 and self.speed > self.max_throttle_speed and abs(angle) < 0.3
+
+        self.finished = norm(self.target - self.car.position) < 100
+
+
+class Dodge:
+    """Jumps and then flips in a direction, or just jumps if there is no direction or target."""
+    timeout = 1.5
+
+    def __init__(self, car: Car):
+        self.car = car
+        self.direction: vec2 = None
+        self.target: vec3 = None
+        self.duration: float = None
+        self.delay: float = None
+        self.preorientation: mat3 = None
+        self.controls = Input()
+        self.timer = 0.0
+        self.finished = False
+
+    def step(self, dt: float):
+        duration = self.duration if self.duration is not None else 0.1
+        delay = self.delay if self.delay is not None else duration + 2 / 60
+
+        direction = self.direction
+        if direction is None and self.target is not None:
+            direction = vec2(normalize(self.target - self.car.position))
+
+        self.controls = Input()
+        if self.timer < duration:
+            self.controls.jump = True
+        elif delay <= self.timer < delay + dt and direction is not None:
+            # The dodge direction in the car's axes picks the pitch and yaw.
+            forward = normalize(vec2(self.car.forward()))
+            left = normalize(vec2(self.car.left()))
+            self.controls.jump = True
+            self.controls.pitch = -dot(direction, forward)
+            self.controls.yaw = dot(direction, left)
+
+        self.timer += dt
+        self.finished = self.timer > self.timeout or (self.timer > delay and self.car.on_ground)
+
+
+class Aerial:
+    """Jumps and boosts towards the target, arriving around the arrival time."""
+    boost_accel = 1060.0
+    max_speed = 2300.0
+
+    def __init__(self, car: Car):
+        self.car = car
+        self.target = vec3(0, 0, 0)
+        self.arrival_time = 0.0
+        self.target_orientation: mat3 = None
+        self.up = vec3(0, 0, 1)
+        self.controls = Input()
+        self.finished = False
+        self.turn = AerialTurn(car)
+
+    def step(self, dt: float):
+        time_left = max(self.arrival_time - self.car.time, 1e-3)
+
+        # Acceleration needed to get to the target in time, on top of gravity.
+        drift = self.car.position + self.car.velocity * time_left + GRAVITY * (0.5 * time_left ** 2)
+        needed = (self.target - drift) * (2 / time_left ** 2)
+
+        self.turn.target = look_at(needed, self.up) if norm(needed) > 0 else self.car.orientation
+        self.turn.step(dt)
+        self.controls = self.turn.controls
+        self.controls.jump = self.car.on_ground
+        self.controls.boost = norm(needed) > 0.2 * self.boost_accel and dot(normalize(needed), self.car.forward()) > 0.9
+
+        self.finished = self.car.time >= self.arrival_time or norm(self.target - self.car.position) < 100
+
+    def is_viable(self) -> bool:
+        return self.arrival_time > self.car.time
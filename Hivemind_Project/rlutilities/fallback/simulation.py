@@ -0,0 +1,140 @@
+"""Python version of the parts of rlutilities.simulation the hive uses.
+
+Game only reads the packet; nothing here simulates physics.
+"""
+from .linear_algebra import vec3, mat3, euler_to_rotation
+
+# Same as the native Game.
+MAX_CARS = 8
+
+
+class Input:
+    __slots__ = ("throttle", "steer", "pitch", "yaw", "roll", "jump", "boost", "handbrake")
+
+    def __init__(self):
+        self.throttle = 0.0
+        self.steer = 0.0
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.roll = 0.0
+        self.jump = False
+        self.boost = False
+        self.handbrake = False
+
+
+class Ball:
+    __slots__ = ("position", "velocity", "angular_velocity", "time")
+
+    def __init__(self, other: "Ball" = None):
+        self.position = vec3(other.position) if other else vec3(0, 0, 0)
+        self.velocity = vec3(other.velocity) if other else vec3(0, 0, 0)
+        self.angular_velocity = vec3(other.angular_velocity) if other else vec3(0, 0, 0)
+        self.time = other.time if other else 0.0
+
+
+class Car:
+    __slots__ = (
+        "position", "velocity", "angular_velocity", "orientation", "rotator",
+        "boost", "on_ground", "jumped", "double_jumped", "supersonic",
+        "team", "id", "time", "controls",
+    )
+
+    def __init__(self, other: "Car" = None):
+        self.position = vec3(0, 0, 0)
+        self.velocity = vec3(0, 0, 0)
+        self.angular_velocity = vec3(0, 0, 0)
+        self.orientation = mat3(1, 0, 0, 0, 1, 0, 0, 0, 1)
+        self.rotator = vec3(0, 0, 0)
+        self.boost = 0
+        self.on_ground = False
+        self.jumped = False
+        self.double_jumped = False
+        self.supersonic = False
+        self.team = 0
+        self.id = 0
+        self.time = 0.0
+        self.controls = Input()
+        if other is not None:
+            for name in Car.__slots__:
+                value = getattr(other, name)
+                setattr(self, name, type(value)(value) if isinstance(value, (vec3, mat3)) else value)
+
+    def forward(self) -> vec3:
+        return vec3(self.orientation[0, 0], self.orientation[1, 0], self.orientation[2, 0])
+
+    def left(self) -> vec3:
+        return vec3(self.orientation[0, 1], self.orientation[1, 1], self.orientation[2, 1])
+
+    def up(self) -> vec3:
+        return vec3(self.orientation[0, 2], self.orientation[1, 2], self.orientation[2, 2])
+
+
+def _vec3(vector) -> vec3:
+    return vec3(vector.x, vector.y, vector.z)
+
+
+class Game:
+    """Game state read from the packet. Car objects stay the same between ticks, only their values change."""
+    mode = "soccar"
+
+    def __init__(self, index: int, team: int):
+        self.id = index
+        self.team = team
+        self.ball = Ball()
+        self.cars = [Car() for _ in range(MAX_CARS)]
+        self.num_cars = 0
+        self.time = 0.0
+        self.time_delta = 0.0
+        self.time_remaining = 0.0
+        self.frame = 0
+        self.frame_delta = 0
+        self.kickoff_pause = False
+        self.round_active = False
+        self.match_ended = False
+        self.overtime = False
+
+    @property
+    def my_car(self) -> Car:
+        return self.cars[self.id]
+
+    @staticmethod
+    def set_mode(mode: str):
+        Game.mode = mode
+
+    def read_game_information(self, packet, field_info):
+        info = packet.game_info
+        # The first packet has nothing to measure against.
+        self.time_delta = info.seconds_elapsed - self.time if self.frame > 0 else 0.0
+        self.time = info.seconds_elapsed
+        self.frame_delta = 1 if self.frame > 0 else 0
+        self.frame += 1
+        self.time_remaining = info.game_time_remaining
+        self.kickoff_pause = info.is_kickoff_pause
+        self.round_active = info.is_round_active
+        self.match_ended = info.is_match_ended
+        self.overtime = info.is_overtime
+
+        physics = packet.game_ball.physics
+        self.ball.position = _vec3(physics.location)
+        self.ball.velocity = _vec3(physics.velocity)
+        self.ball.angular_velocity = _vec3(physics.angular_velocity)
+        self.ball.time = self.time
+
+        self.num_cars = min(packet.num_cars, MAX_CARS)
+        for index in range(self.num_cars):
+            info = packet.game_cars[index]
+            car = self.cars[index]
+            physics = info.physics
+            car.position = _vec3(physics.location)
+            car.velocity = _vec3(physics.velocity)
+            car.angular_velocity = _vec3(physics.angular_velocity)
+            car.rotator = vec3(physics.rotation.pitch, physics.rotation.yaw, physics.rotation.roll)
+            car.orientation = euler_to_rotation(car.rotator)
+            car.boost = info.boost
+            car.on_ground = info.has_wheel_contact
+            car.jumped = info.jumped
+            car.double_jumped = info.double_jumped
+            car.supersonic = info.is_super_sonic
+            car.team = info.team
+            car.id = index
+            car.time = self.time
@@ -0,0 +1,113 @@
+"""Optimal assignment of drones to tasks.
+
+Tasks can be anything with a cost per drone: defence slots, intercepts, boost pads.
+The costs go in a (drones, tasks) matrix and the assignment with the lowest total
+cost is found with the Hungarian algorithm, for any number of drones and tasks.
+"""
+from typing import Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+# Stands in for impossible pairings while solving.
+_IMPOSSIBLE = 1e12
+
+
+def solve(cost: np.ndarray) -> np.ndarray:
+    """Minimum total cost assignment for a (drones, tasks) cost matrix.
+
+    Returns the task of each drone, shape (drones,), or -1 for drones left without one
+    because there are more drones than tasks or every task left is impossible (inf).
+    """
+    cost = np.asarray(cost, dtype=float)
+    drones, tasks = cost.shape
+    if drones == 0 or tasks == 0:
+        return np.full(drones, -1)
+
+    # The algorithm needs at least as many columns as rows.
+    if drones > tasks:
+        task_of_drone = np.full(drones, -1)
+        drone_of_task = solve(cost.T)
+        assigned = drone_of_task >= 0
+        task_of_drone[drone_of_task[assigned]] = np.flatnonzero(assigned)
+        return task_of_drone
+
+    a = np.where(np.isfinite(cost), cost, _IMPOSSIBLE)
+
+    # Potentials for rows and columns, and the row matched to each column. Index 0 is a dummy column.
+    u = np.zeros(drones + 1)
+    v = np.zeros(tasks + 1)
+    match = np.zeros(tasks + 1, dtype=int)
+    way = np.zeros(tasks + 1, dtype=int)
+
+    for row in range(1, drones + 1):
+        # Grow an alternating path from this row until it reaches a free column.
+        match[0] = row
+        column = 0
+        min_slack = np.full(tasks + 1, np.inf)
+        used = np.zeros(tasks + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = match[column]
+            slack = a[current_row - 1] - u[current_row] - v[1:]
+            better = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+
+            free = np.flatnonzero(~used[1:]) + 1
+            next_column = free[np.argmin(min_slack[free])]
+            delta = min_slack[next_column]
+            u[match[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+
+            column = next_column
+            if match[column] == 0:
+                break
+
+        # Flip the path.
+        while column != 0:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+
+    task_of_drone = np.full(drones, -1)
+    for column in range(1, tasks + 1):
+        if match[column] != 0:
+            task_of_drone[match[column] - 1] = column - 1
+
+    # Impossible pairings only get made when nothing else was left.
+    impossible = (task_of_drone >= 0) & ~np.isfinite(cost[np.arange(drones), np.maximum(task_of_drone, 0)])
+    task_of_drone[impossible] = -1
+    return task_of_drone
+
+
+class Assigner:
+    """Solves assignments tick after tick without roles flipping back and forth.
+
+    The pairings from last time get a bonus of hysteresis off their cost, so a new
+    assignment is only taken if it is better by more than that in total.
+    Drones and tasks are identified by keys, since their order can change between ticks.
+    """
+
+    def __init__(self, hysteresis: float = 0.0):
+        self.hysteresis = hysteresis
+        self.previous: Dict[Hashable, Hashable] = {}
+
+    def assign(self, cost: np.ndarray, drone_keys: Sequence[Hashable], task_keys: Optional[Sequence[Hashable]] = None) -> np.ndarray:
+        """Task index for each drone, -1 for none. Task keys default to the task indices."""
+        cost = np.array(cost, dtype=float)
+        if task_keys is None:
+            task_keys = range(cost.shape[1])
+        task_index = {key: j for j, key in enumerate(task_keys)}
+
+        for i, key in enumerate(drone_keys):
+            j = task_index.get(self.previous.get(key))
+            if j is not None:
+                cost[i, j] -= self.hysteresis
+
+        task_of_drone = solve(cost)
+        self.previous = {key: task_keys[j] for key, j in zip(drone_keys, task_of_drone) if j >= 0}
+        return task_of_drone
+
+    def reset(self):
+        self.previous = {}
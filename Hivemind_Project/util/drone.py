@@ -12,3 +12,4 @@ class Drone:
         self.time_off_ground = 0.0
         
         self.ready = False
+        self.defence_pos = None
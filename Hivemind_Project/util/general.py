@@ -1,3 +1,5 @@
+import ctypes
+
 from rlbot.utils.structures.bot_input_struct import PlayerInput
 
 def team_sign(team: int):
@@ -6,19 +8,19 @@ def team_sign(team: int):
 def clamp(value, minimum, maximum):
     return max(min(value, maximum), minimum)
 
-def to_player_input(controls) -> PlayerInput:
-    """Convert controls to PlayerInput"""
-    player_input = PlayerInput()
-    player_input.throttle = controls.throttle
-    player_input.steer = controls.steer
-    player_input.pitch = controls.pitch
-    player_input.yaw = controls.yaw
-    player_input.roll = controls.roll
-    player_input.jump = controls.jump
-    player_input.boost = controls.boost
-    player_input.handbrake = controls.handbrake
-    # RLUtilities Input does not have a use_item attribute.
-    if hasattr(controls, "use_item"):
-        player_input.use_item = controls.use_item
+def reset_controls(controls: PlayerInput) -> PlayerInput:
+    """Zero a PlayerInput in place."""
+    ctypes.memset(ctypes.addressof(controls), 0, ctypes.sizeof(controls))
+    return controls
 
-    return player_input
\ No newline at end of file
+def copy_controls(source, target: PlayerInput) -> PlayerInput:
+    """Copy controls onto a PlayerInput in place. use_item is left alone since RLUtilities Input doesn't have it."""
+    target.throttle = source.throttle
+    target.steer = source.steer
+    target.pitch = source.pitch
+    target.yaw = source.yaw
+    target.roll = source.roll
+    target.jump = source.jump
+    target.boost = source.boost
+    target.handbrake = source.handbrake
+    return target
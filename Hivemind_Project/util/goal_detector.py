@@ -1,5 +1,7 @@
-
 from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
 
 from rlbot.utils.structures.ball_prediction_struct import BallPrediction
 
@@ -8,10 +10,12 @@ from rlutilities.linear_algebra import vec3
 # field length(5120) + ball radius(93) = 5213 however that results in false positives
 GOAL_THRESHOLD = 5235
 
-# We will jump this number of frames when looking for a moment where the ball is inside the goal.
-# Big number for efficiency, but not so big that the ball could go in and then back out during that
-# time span. Unit is the number of frames in the ball prediction, and the prediction is at 60 frames per second.
-COARSE_SEARCH_INCREMENT = 20
+# Each slice is physics (location, rotation, velocity, angular velocity) followed by game_seconds, all c_float.
+SLICE_WIDTH = 13
+LOCATION = slice(0, 3)
+VELOCITY = slice(6, 9)
+GAME_SECONDS = 12
+
 
 
 @dataclass
@@ -22,23 +26,59 @@ class FutureGoal:
     team: int
 
 
-def find_future_goal(ball_prediction: BallPrediction):
-    # Do course search.
-    for coarse_index in range(0, ball_prediction.num_slices, COARSE_SEARCH_INCREMENT):
-        step = ball_prediction.slices[coarse_index]
-        position = step.physics.location
-        # If found, do a thorough search.
-        if abs(position.y) >= GOAL_THRESHOLD:
-            go_back = max(0, coarse_index - COARSE_SEARCH_INCREMENT)
-            for j in range(go_back, coarse_index):
-                step = ball_prediction.slices[j]
-                position = step.physics.location
-                if abs(position.y) >= GOAL_THRESHOLD:
-                    vel = step.physics.velocity
-                    return FutureGoal(
-                        vec3(position.x, position.y, position.z),
-                        vec3(vel.x, vel.y, vel.z),
-                        step.game_seconds,
-                        int(position.y > 0),
-                    )
-    return None
+def prediction_view(ball_prediction: BallPrediction) -> np.ndarray:
+    """Numpy view of the valid slices, shape (num_slices, SLICE_WIDTH). Shares memory with the struct."""
+    view = np.frombuffer(ball_prediction.slices, dtype=np.float32).reshape(-1, SLICE_WIDTH)
+    return view[:ball_prediction.num_slices]
+
+
+def goal_crossings(y: np.ndarray) -> np.ndarray:
+    """Indices where the ball goes from outside to inside a goal, plus 0 if it starts inside."""
+    inside = np.abs(y) >= GOAL_THRESHOLD
+    if len(inside) == 0:
+        return np.zeros(0, dtype=int)
+    edges = np.empty(len(inside), dtype=bool)
+    edges[0] = inside[0]
+    np.greater(inside[1:], inside[:-1], out=edges[1:])
+    return np.flatnonzero(edges)
+
+
+def make_future_goal(step: np.ndarray) -> FutureGoal:
+    x, y, z = step[LOCATION]
+    return FutureGoal(vec3(x, y, z), vec3(*step[VELOCITY]), float(step[GAME_SECONDS]), int(y > 0))
+
+
+def find_future_goals(ball_prediction: BallPrediction) -> List[FutureGoal]:
+    """Every goal crossing in the ball prediction, in time order."""
+    view = prediction_view(ball_prediction)
+    return [make_future_goal(view[i]) for i in goal_crossings(view[:, 1])]
+
+
+def find_future_goal(ball_prediction: BallPrediction) -> Optional[FutureGoal]:
+    """The first goal crossing in the ball prediction, or None."""
+    view = prediction_view(ball_prediction)
+    # The first crossing is the first slice inside a goal.
+    inside = np.abs(view[:, 1]) >= GOAL_THRESHOLD
+    first = int(np.argmax(inside)) if len(inside) > 0 else 0
+    return make_future_goal(view[first]) if len(inside) > 0 and inside[first] else None
+
+
+class GoalDetector:
+    """Keeps the goal crossings of the newest ball prediction.
+
+    Every prediction gets searched in full. Carrying crossings over from the
+    last tick was tried, but checking the new prediction still follows the old
+    trajectory cost more than the one vectorised comparison it saved.
+    """
+
+    def __init__(self):
+        self.goals: List[FutureGoal] = []
+
+    def update(self, ball_prediction: BallPrediction) -> List[FutureGoal]:
+        """Updates and returns every goal crossing in the prediction, in time order."""
+        self.goals = find_future_goals(ball_prediction)
+        return self.goals
+
+    @property
+    def first(self) -> Optional[FutureGoal]:
+        return self.goals[0] if self.goals else None
@@ -0,0 +1,107 @@
+"""Soonest intercepts of every drone against the ball prediction.
+
+Every drone is checked against every slice in one pass: a drone can make a slice if,
+after turning to face the ball, it can drive the distance before the ball gets there.
+Drive times come from kinematics, the same acceleration tables Calculator uses.
+The earliest slice each drone can make is then refined to the moment it first can.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from util.goal_detector import LOCATION, GAME_SECONDS
+from util.kinematics import dist_in_time, time_to_dist, max_curvature
+
+# Slowest speed used for the turn estimate, so a stationary car can still turn.
+MIN_TURN_SPEED = 500
+
+# How close the car has to get to the centre of the ball to touch it.
+REACH = 120
+# Slices with the ball higher than this can't be reached by driving.
+MAX_HEIGHT = 250
+
+# Points checked between two slices when refining.
+REFINE_STEPS = 8
+
+
+@dataclass
+class DroneStates:
+    position: np.ndarray  # (n, 3)
+    velocity: np.ndarray  # (n, 3)
+    forward: np.ndarray  # (n, 3)
+    boost: np.ndarray  # (n,)
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def __getitem__(self, index) -> "DroneStates":
+        return DroneStates(self.position[index], self.velocity[index], self.forward[index], self.boost[index])
+
+
+@dataclass
+class Intercepts:
+    slice: np.ndarray  # (n,) Soonest slice each drone can make, -1 if none.
+    time: np.ndarray  # (n,) Game time of the intercept, inf if none.
+    position: np.ndarray  # (n, 3) Ball position at the intercept, nan if none.
+
+    @staticmethod
+    def concatenate(parts) -> "Intercepts":
+        return Intercepts(*(np.concatenate([getattr(part, name) for part in parts]) for name in ("slice", "time", "position")))
+
+
+def _drive_times(drones: DroneStates, targets: np.ndarray):
+    """Turn time and start speed for each drone to drive at each of targets (n, m, 3), shapes (n, m)."""
+    to_targets = targets[..., :2] - drones.position[:, None, :2]
+    distances = np.linalg.norm(to_targets, axis=-1)
+    forward = drones.forward[:, :2]
+    forward = forward / np.maximum(np.linalg.norm(forward, axis=1, keepdims=True), 1e-6)
+    cos_angle = np.einsum("nmi,ni->nm", to_targets, forward) / np.maximum(distances, 1e-6)
+    angles = np.arccos(np.clip(cos_angle, -1, 1))
+
+    speed = np.maximum(np.linalg.norm(drones.velocity, axis=1), MIN_TURN_SPEED)
+    turn_rate = speed * max_curvature(speed)
+    turn_times = angles / turn_rate[:, None]
+
+    forward_speed = np.maximum(np.einsum("ni,ni->n", drones.velocity[:, :2], forward), 0)
+    start_speed = forward_speed[:, None] * np.maximum(cos_angle, 0)
+    return np.maximum(distances - REACH, 0), turn_times, start_speed
+
+
+def can_make(drones: DroneStates, targets: np.ndarray, times: np.ndarray, time: float) -> np.ndarray:
+    """Whether each drone can get to targets (n, m, 3) before times (n, m), shape (n, m)."""
+    distances, turn_times, start_speed = _drive_times(drones, targets)
+    return dist_in_time(np.maximum(times - time - turn_times, 0), start_speed, drones.boost[:, None]) >= distances
+
+
+def drive_times(drones: DroneStates, targets: np.ndarray) -> np.ndarray:
+    """Time each drone takes to turn to and drive to each of targets (m, 3), shape (n, m)."""
+    targets = np.broadcast_to(targets, (len(drones),) + np.shape(targets))
+    distances, turn_times, start_speed = _drive_times(drones, targets)
+    return turn_times + time_to_dist(distances, start_speed, drones.boost[:, None])
+
+
+def find_intercepts(drones: DroneStates, slices: np.ndarray, time: float) -> Intercepts:
+    """Soonest intercept of each drone with the ball prediction from goal_detector.prediction_view."""
+    n = len(drones)
+    locations = slices[:, LOCATION].astype(float)
+    times = slices[:, GAME_SECONDS].astype(float)
+
+    # Coarse: every drone against every slice.
+    reachable = can_make(drones, np.broadcast_to(locations, (n,) + locations.shape), np.broadcast_to(times, (n, len(times))), time)
+    reachable &= locations[:, 2] <= MAX_HEIGHT
+    found = reachable.any(axis=1)
+    first = np.where(found, np.argmax(reachable, axis=1), -1)
+
+    # Fine: check points between the slice before and the first one made, with the ball moving linearly in between.
+    index = np.maximum(first, 0)
+    before = np.maximum(index - 1, 0)
+    fractions = np.arange(1, REFINE_STEPS + 1) / REFINE_STEPS
+    targets = locations[before, None] + (locations[index] - locations[before])[:, None] * fractions[:, None]
+    target_times = times[before, None] + (times[index] - times[before])[:, None] * fractions
+    # The last point is the slice itself, so there is always one made when a slice was found.
+    fraction = fractions[np.argmax(can_make(drones, targets, target_times, time), axis=1)]
+
+    intercept_time = np.where(found, times[before] + (times[index] - times[before]) * fraction, np.inf)
+    position = locations[before] + (locations[index] - locations[before]) * fraction[:, None]
+    position = np.where(found[:, None], position, np.nan)
+    return Intercepts(first, intercept_time, position)
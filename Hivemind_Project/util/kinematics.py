@@ -0,0 +1,112 @@
+"""Drive kinematics from measured acceleration tables.
+
+A copy of Calculator's kinematics, so the hive and Calculator estimate drive times the same way.
+The tables in tables/ hold time, velocity and distance of a car accelerating from rest
+in a straight line, with and without boost. Every query works on scalars or whole arrays at once.
+"""
+import os
+
+import numpy as np
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+# Boost used per second while boosting.
+BOOST_CONSUMPTION = 33.3
+
+# Tightest curvature a car can drive at each speed, sorted by speed. The same table as Calculator's paths.
+CURVATURE_SPEEDS = np.array([0.0, 500, 1000, 1500, 1750, 2300])
+CURVATURES = np.array([0.0069, 0.00396, 0.00235, 0.001375, 0.0011, 0.00088])
+
+
+def load_table(name: str) -> np.ndarray:
+    """Table of shape (n, 3) with time, velocity and distance columns, using a cached .npy copy if it is up to date."""
+    txt_path = os.path.join(TABLE_DIR, name + ".txt")
+    npy_path = os.path.join(TABLE_DIR, name + ".npy")
+    if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(txt_path):
+        return np.load(npy_path)
+
+    table = np.loadtxt(txt_path, delimiter=",")
+    try:
+        np.save(npy_path, table)
+    except OSError:
+        # Read-only install; the text file will just be parsed every time.
+        pass
+    return table
+
+
+def lookup(xp: np.ndarray, fp: np.ndarray, x) -> np.ndarray:
+    """Linearly interpolates fp at x along the increasing column xp, with x clamped to its range."""
+    x = np.clip(x, xp[0], xp[-1])
+    i = np.clip(np.searchsorted(xp, x, side="right"), 1, len(xp) - 1)
+    x0 = xp[i - 1]
+    f0 = fp[i - 1]
+    return f0 + (x - x0) * (fp[i] - f0) / (xp[i] - x0)
+
+
+class AccelerationTable:
+    """Straight line acceleration of a car, starting from any velocity.
+
+    Past the end of the table the car is assumed to keep its top velocity.
+    A car already faster than the top velocity keeps its own velocity.
+    """
+
+    def __init__(self, table: np.ndarray):
+        self.time: np.ndarray = np.ascontiguousarray(table[:, 0])
+        self.vel: np.ndarray = np.ascontiguousarray(table[:, 1])
+        self.dist: np.ndarray = np.ascontiguousarray(table[:, 2])
+        self.top_vel: float = self.vel[-1]
+
+    def _time_and_dist(self, v0):
+        """Time and distance in the table at which velocity v0 is reached."""
+        v0 = np.clip(v0, 0, self.top_vel)
+        return lookup(self.vel, self.time, v0), lookup(self.vel, self.dist, v0)
+
+    def _dist_at_time(self, t):
+        """Distance in the table at absolute table time t."""
+        return lookup(self.time, self.dist, t) + self.top_vel * np.maximum(t - self.time[-1], 0)
+
+    def vel_at_time(self, t, v0=0.0) -> np.ndarray:
+        """Velocity after accelerating for time t from v0."""
+        t0, _ = self._time_and_dist(v0)
+        return np.maximum(lookup(self.time, self.vel, t0 + t), v0)
+
+    def dist_in_time(self, t, v0=0.0) -> np.ndarray:
+        """Distance travelled while accelerating for time t from v0."""
+        t0, d0 = self._time_and_dist(v0)
+        return np.where(v0 > self.top_vel, v0 * t, self._dist_at_time(t0 + t) - d0)
+
+    def time_to_dist(self, d, v0=0.0) -> np.ndarray:
+        """Time needed to travel distance d while accelerating from v0."""
+        t0, d0 = self._time_and_dist(v0)
+        end = d0 + d
+        t = lookup(self.dist, self.time, end) + np.maximum(end - self.dist[-1], 0) / self.top_vel - t0
+        return np.where(v0 > self.top_vel, d / np.maximum(v0, 1.0), t)
+
+
+THROTTLE = AccelerationTable(load_table("acceleration"))
+BOOST = AccelerationTable(load_table("boost_acceleration"))
+
+
+def time_to_dist(d, v0=0.0, boost=100.0) -> np.ndarray:
+    """Time to drive distance d straight from v0, boosting while boost lasts."""
+    boost_time = boost / BOOST_CONSUMPTION
+    boosting = BOOST.time_to_dist(d, v0)
+
+    # If boost runs out, the rest is done on throttle alone.
+    boost_dist = BOOST.dist_in_time(boost_time, v0)
+    boost_vel = BOOST.vel_at_time(boost_time, v0)
+    rest = boost_time + THROTTLE.time_to_dist(np.maximum(d - boost_dist, 0), boost_vel)
+
+    return np.where(boosting <= boost_time, boosting, rest)
+
+
+def dist_in_time(t, v0=0.0, boost=100.0) -> np.ndarray:
+    """Distance driven straight in time t from v0, boosting while boost lasts. Inverse of time_to_dist."""
+    boost_time = np.minimum(boost / BOOST_CONSUMPTION, t)
+    boost_vel = BOOST.vel_at_time(boost_time, v0)
+    return BOOST.dist_in_time(boost_time, v0) + THROTTLE.dist_in_time(t - boost_time, boost_vel)
+
+
+def max_curvature(speed) -> np.ndarray:
+    """Tightest curvature a car can turn at when driving at speed."""
+    return np.interp(speed, CURVATURE_SPEEDS, CURVATURES)
@@ -0,0 +1,110 @@
+"""Batched prediction of where airborne cars will land."""
+from dataclasses import dataclass
+
+import numpy as np
+
+from util.arena import collide_spheres, boxes_inside
+
+GRAVITY = np.array([0.0, 0.0, -650.0])
+MAX_SPEED = 2300
+SPHERE_RADIUS = 40
+DT = 1 / 60
+NUM_STEPS = 200
+# The first steps are ignored because the car might be leaving the ceiling.
+SKIP_STEPS = 10
+# Steps checked together in the coarse search. Each chunk is checked as a whole first,
+# and point by point only if it gets near a surface.
+CHUNK_STEPS = 20
+
+
+@dataclass
+class Landings:
+    position: np.ndarray  # (n, 3) Where each car lands, or where the simulation ended.
+    velocity: np.ndarray  # (n, 3) Velocity when landing.
+    normal: np.ndarray  # (n, 3) Normal of the surface landed on, zero if not landed.
+    time: np.ndarray  # (n,) Time until landing.
+    landed: np.ndarray  # (n,) Whether each car lands within the simulated time.
+
+
+def ballistic_trajectories(position: np.ndarray, velocity: np.ndarray, steps: int, dt: float):
+    """Positions and velocities after each of the next steps for cars of shape (n, 3), shapes (n, steps, 3).
+
+    Until the car reaches the speed cap, velocity is just gravity added up.
+    From then on the speed stays at the cap while gravity turns the velocity down,
+    which makes the dive angle follow the Gudermannian function of time.
+    """
+    n = len(position)
+    cars = np.arange(n)
+    k = np.arange(1, steps + 1)
+    velocities = velocity[:, None, :] + k[:, None] * (GRAVITY * dt)
+
+    # First step at which each car goes over the cap, or steps if it never does.
+    over = np.linalg.norm(velocities, axis=-1) > MAX_SPEED
+    capped_from = np.where(over.any(axis=1), np.argmax(over, axis=1), steps)
+
+    capped = capped_from < steps
+    if np.any(capped):
+        start = velocities[cars[capped], capped_from[capped]]
+        horizontal_speed = np.linalg.norm(start[:, :2], axis=1)
+        heading = np.divide(start[:, :2], horizontal_speed[:, None], out=np.zeros((len(start), 2)), where=horizontal_speed[:, None] > 0)
+        with np.errstate(divide="ignore"):
+            start_angle = np.arcsinh(-start[:, 2] / horizontal_speed)
+
+        time_capped = np.maximum(k - 1 - capped_from[capped, None], 0) * dt
+        dive = np.arctan(np.sinh(start_angle[:, None] - GRAVITY[2] * time_capped / MAX_SPEED))
+        capped_velocities = np.empty((len(start), steps, 3))
+        capped_velocities[..., :2] = heading[:, None, :] * (np.cos(dive) * MAX_SPEED)[..., None]
+        capped_velocities[..., 2] = -np.sin(dive) * MAX_SPEED
+
+        after = k - 1 >= capped_from[capped, None]
+        velocities[capped] = np.where(after[..., None], capped_velocities, velocities[capped])
+
+    positions = position[:, None, :] + np.cumsum(velocities, axis=1) * dt
+    return positions, velocities
+
+
+def predict_landings(position: np.ndarray, velocity: np.ndarray, dt: float = DT, num_steps: int = NUM_STEPS) -> Landings:
+    """Simulates cars of shape (n, 3) falling until they touch the arena, all at once."""
+    position = np.asarray(position, dtype=float).reshape(-1, 3)
+    velocity = np.asarray(velocity, dtype=float).reshape(-1, 3)
+    n = len(position)
+    positions, velocities = ballistic_trajectories(position, velocity, num_steps, dt)
+
+    # Coarse: bounding boxes of each chunk of steps, padded with the last step to a whole number of chunks.
+    num_chunks = -(-num_steps // CHUNK_STEPS)
+    padded = np.concatenate((positions, np.repeat(positions[:, -1:], num_chunks * CHUNK_STEPS - num_steps, axis=1)), axis=1)
+    chunks = padded.reshape(n, num_chunks, CHUNK_STEPS, 3)
+    near = ~boxes_inside(chunks.min(axis=2), chunks.max(axis=2), SPHERE_RADIUS)
+
+    # Fine: only steps in chunks which get near a surface are checked.
+    candidates = np.repeat(near, CHUNK_STEPS, axis=1)[:, :num_steps]
+    candidates[:, :SKIP_STEPS] = False
+    touching = np.zeros((n, num_steps), dtype=bool)
+    normals = np.zeros((n, num_steps, 3))
+    touching[candidates], normals[candidates] = collide_spheres(positions[candidates], SPHERE_RADIUS)
+
+    landed = touching.any(axis=1)
+    # Cars which don't land end up at the last step.
+    first = np.where(landed, np.argmax(touching, axis=1), num_steps - 1)
+    cars = np.arange(n)
+    return Landings(
+        positions[cars, first],
+        velocities[cars, first],
+        normals[cars, first],
+        (first + 1) * dt,
+        landed,
+    )
+
+
+def landing_orientations(landings: Landings) -> np.ndarray:
+    """Orientation to land with, facing along the velocity and with the wheels on the surface.
+
+    Returns matrices of shape (n, 3, 3) with forward, left and up as columns.
+    Cars which don't land get zero matrices.
+    """
+    up = landings.normal
+    forward = landings.velocity - np.sum(landings.velocity * up, axis=1, keepdims=True) * up
+    forward /= np.maximum(np.linalg.norm(forward, axis=1, keepdims=True), 1e-6)
+    left = np.cross(up, forward)
+    left /= np.maximum(np.linalg.norm(left, axis=1, keepdims=True), 1e-6)
+    return np.stack((forward, left, up), axis=2)
@@ -0,0 +1,71 @@
+"""Planning stage of the Overmind.
+
+The expensive per-drone searches of a tick run on a small pool of worker threads
+which lives for the whole game. NumPy releases the GIL for the heavy lifting,
+so the jobs overlap. Drones are split into one chunk per worker, as long as there
+are at least as many drones as workers, and each chunk is searched as a batch.
+Landings run alongside. All candidates are then gathered into one Plan and
+assigned together.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from util.intercept import DroneStates, Intercepts, find_intercepts
+from util.landing import Landings, predict_landings
+
+@dataclass
+class Plan:
+    landings: Optional[Landings]  # Landing of every drone, None if no drone needed one.
+    intercepts: Intercepts  # Soonest intercept of every drone.
+
+    def soonest(self, candidates: np.ndarray) -> Optional[int]:
+        """The drone among candidates (n,) bool that gets to the ball first, or None if none can."""
+        times = np.where(candidates, self.intercepts.time, np.inf)
+        if not np.any(np.isfinite(times)):
+            return None
+        return int(np.argmin(times))
+
+
+class Planner:
+    """Fans the searches of each tick out to a persistent worker pool.
+
+    With no workers everything runs on the calling thread.
+    """
+
+    def __init__(self, workers: int = 2, intercepts: Callable = find_intercepts):
+        self.workers = workers
+        self.intercepts = intercepts
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner") if workers > 0 else None
+
+    def _submit(self, function: Callable, *args) -> Future:
+        if self.pool is not None:
+            return self.pool.submit(function, *args)
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    def plan(self, drones: DroneStates, slices: np.ndarray, time: float, landings: bool = True) -> Plan:
+        """Plans for all drones.
+
+        slices is the ball prediction as from goal_detector.prediction_view, time the current game time.
+        Landings are only predicted if asked for.
+        """
+        n = len(drones)
+        landing_job = self._submit(predict_landings, drones.position, drones.velocity) if landings else None
+
+        if len(slices) > 0:
+            chunks = np.array_split(np.arange(n), max(min(self.workers, n), 1))
+            intercept_jobs = [self._submit(self.intercepts, drones[chunk], slices, time) for chunk in chunks]
+            intercepts = Intercepts.concatenate([job.result() for job in intercept_jobs])
+        else:
+            intercepts = Intercepts(np.full(n, -1), np.full(n, np.inf), np.full((n, 3), np.nan))
+
+        return Plan(landing_job.result() if landing_job is not None else None, intercepts)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
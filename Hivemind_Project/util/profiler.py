@@ -0,0 +1,72 @@
+from time import perf_counter_ns
+from typing import List, Sequence
+
+import numpy as np
+
+# One frame at 120 ticks per second, in milliseconds.
+FRAME_MS = 1000.0 / 120.0
+
+
+class TickProfiler:
+    """Times the phases of each tick and keeps rolling percentiles.
+
+    Phase times (ns) go into a fixed-size ring buffer, one row per tick,
+    with the whole tick in the last column.
+    """
+
+    def __init__(self, phases: Sequence[str], size: int = 1200, budget_ms: float = FRAME_MS, logger=None):
+        self.phases: List[str] = list(phases)
+        self.budget_ms = budget_ms
+        self.logger = logger
+        self.samples = np.zeros((size, len(self.phases) + 1), dtype=np.int64)
+        self.ticks = 0
+        self.overruns = 0
+        self._columns = {phase: i for i, phase in enumerate(self.phases)}
+        self._row = self.samples[0]
+        self._tick_start = 0
+        self._lap_start = 0
+
+    def start(self):
+        self._row = self.samples[self.ticks % len(self.samples)]
+        self._row[:] = 0
+        self._tick_start = self._lap_start = perf_counter_ns()
+
+    def lap(self, phase: str, label: str = None) -> int:
+        """Records the time since the last lap under phase. Laps with a label get logged if over budget."""
+        now = perf_counter_ns()
+        elapsed = now - self._lap_start
+        self._lap_start = now
+        self._row[self._columns[phase]] += elapsed
+
+        if label is not None and elapsed > self.budget_ms * 1e6:
+            self.overruns += 1
+            if self.logger is not None:
+                self.logger.warning(f"{label} {phase} took {elapsed / 1e6:.2f} ms, budget is {self.budget_ms:.2f} ms")
+
+        return elapsed
+
+    def end(self):
+        self._row[-1] = perf_counter_ns() - self._tick_start
+        self.ticks += 1
+
+    def percentiles(self, q: Sequence[float] = (50, 90, 99)) -> np.ndarray:
+        """Percentiles in ms, shape (len(phases) + 1, len(q)). The last row is the whole tick."""
+        recorded = self.samples[:min(self.ticks, len(self.samples))]
+        if len(recorded) == 0:
+            return np.zeros((self.samples.shape[1], len(q)))
+        return np.percentile(recorded, q, axis=0).T / 1e6
+
+    def report(self, q: Sequence[float] = (50, 90, 99)) -> str:
+        header = f"{'phase':<10}" + "".join(f"{f'p{p}':>9}" for p in q)
+        lines = [f"Tick profile over the last {min(self.ticks, len(self.samples))} of {self.ticks} ticks (ms):", header]
+        for name, row in zip(self.phases + ["total"], self.percentiles(q)):
+            lines.append(f"{name:<10}" + "".join(f"{t:9.3f}" for t in row))
+        lines.append(f"{self.overruns} laps over the {self.budget_ms:.2f} ms budget.")
+        return "\n".join(lines)
+
+    def render(self, r, x: int, y: int, q: Sequence[float] = (50, 99)):
+        """Draws the percentiles. Call between begin_rendering and end_rendering."""
+        for i, (name, row) in enumerate(zip(self.phases + ["total"], self.percentiles(q))):
+            times = " ".join(f"p{p} {t:.2f}" for p, t in zip(q, row))
+            colour = r.red() if row[-1] > self.budget_ms else r.white()
+            r.draw_string_2d(x, y + 20 * i, 1, 1, f"{name}: {times}", colour)
@@ -0,0 +1,171 @@
+from time import perf_counter
+from typing import Dict, List
+
+import numpy as np
+
+# Radians the path has to turn by before another point of a polyline is kept.
+DECIMATE_ANGLE = 0.1
+
+# Positions are rounded to this many uu when comparing frames.
+TOLERANCE = 1.0
+
+DEFAULT_GROUP = "default"
+
+
+def as_points(vectors) -> np.ndarray:
+    """Anything the renderer takes as a list of vectors, as an array of shape (n, 3)."""
+    if isinstance(vectors, np.ndarray):
+        return vectors.reshape(-1, vectors.shape[-1])[:, :3].astype(float)
+    return np.array([
+        [v[0], v[1], v[2] if len(v) > 2 else 0.0] if hasattr(v, "__getitem__") else [v.x, v.y, v.z]
+        for v in vectors
+    ], dtype=float).reshape(-1, 3)
+
+
+def decimate(points: np.ndarray, angle: float = DECIMATE_ANGLE) -> np.ndarray:
+    """Drops the points of a polyline which barely change its direction.
+
+    Straight stretches collapse to their ends, while bends keep a point every
+    time the direction has turned by another angle. Both ends are always kept.
+    """
+    if len(points) <= 2:
+        return points
+    segments = points[1:] - points[:-1]
+    lengths = np.sqrt(np.einsum("ij,ij->i", segments, segments))
+    directions = segments / np.maximum(lengths, 1e-6)[:, np.newaxis]
+    cos = np.einsum("ij,ij->i", directions[:-1], directions[1:])
+    # Points which don't move don't turn.
+    still = lengths <= 1e-6
+    if np.any(still):
+        cos[still[:-1] | still[1:]] = 1.0
+    turn = np.arccos(np.clip(cos, -1.0, 1.0))
+
+    # Keeps each point where the total turn so far passes another multiple of angle.
+    steps = np.floor(np.cumsum(turn) / angle)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1] = steps[0] > 0
+    keep[2:-1] = steps[1:] > steps[:-1]
+    return points[keep]
+
+
+def _round(points: np.ndarray) -> bytes:
+    return np.round(points / TOLERANCE).astype(np.int32).tobytes()
+
+
+class RenderManager:
+    """Records drawing into render groups and only sends the groups which changed.
+
+    The game keeps showing a group until it gets sent again, so an unchanged
+    group costs nothing but the recording. Debug groups can be throttled to a
+    rate, and polylines are decimated by curvature. Has the same drawing methods
+    as the RenderingManager it wraps; colours come from the wrapped renderer.
+    When disabled, begin_rendering returns False straight away.
+
+        if r.begin_rendering("prediction", rate=20):
+            r.draw_polyline_3d(path, r.pink())
+            r.end_rendering()
+    """
+
+    def __init__(self, renderer, enabled: bool = True):
+        self.renderer = renderer
+        self.enabled = enabled
+        self.sent = 0
+        self.unchanged = 0
+        self.throttled = 0
+        self._group = None
+        self._commands: List[tuple] = []
+        self._key: List[tuple] = []
+        self._last: Dict[str, tuple] = {}
+        self._drawn_at: Dict[str, float] = {}
+
+    def __getattr__(self, name):
+        # Colours and anything else not recorded come from the renderer.
+        return getattr(self.renderer, name)
+
+    def begin_rendering(self, group: str = DEFAULT_GROUP, rate: float = None, now: float = None) -> bool:
+        """Starts recording a group. Returns False if it shouldn't be drawn, in which case skip end_rendering too.
+
+        With a rate, the group is drawn at most that many times per second of now, which defaults to the clock.
+        """
+        self._group = None
+        if not self.enabled:
+            return False
+        if rate is not None:
+            now = perf_counter() if now is None else now
+            if now - self._drawn_at.get(group, -np.inf) < 1.0 / rate:
+                self.throttled += 1
+                return False
+            self._drawn_at[group] = now
+        self._group = group
+        self._commands = []
+        self._key = []
+        return True
+
+    def end_rendering(self):
+        """Sends the recorded group if it changed since it was last sent."""
+        group = self._group
+        if group is None:
+            return
+        self._group = None
+        key = tuple(self._key)
+        if self._last.get(group) == key:
+            self.unchanged += 1
+            return
+
+        r = self.renderer
+        r.begin_rendering(group)
+        for draw, args in self._commands:
+            draw(*args)
+        r.end_rendering()
+        self._last[group] = key
+        self.sent += 1
+
+    def clear(self, group: str = DEFAULT_GROUP):
+        self._last.pop(group, None)
+        self._drawn_at.pop(group, None)
+        self.renderer.clear_screen(group)
+
+    def _record(self, draw, args: tuple, key: tuple):
+        self._commands.append((draw, args))
+        self._key.append(key)
+        return self
+
+    def draw_line_3d(self, vec1, vec2, color):
+        if self._group is None:
+            return self
+        points = as_points([vec1, vec2])
+        return self._record(self.renderer.draw_line_3d, (points[0], points[1], color), ("line", _round(points), bytes(color)))
+
+    def draw_polyline_3d(self, vectors, color):
+        if self._group is None:
+            return self
+        points = decimate(as_points(vectors))
+        if len(points) < 2:
+            return self
+        return self._record(self.renderer.draw_polyline_3d, (points, color), ("polyline", _round(points), bytes(color)))
+
+    def draw_rect_2d(self, x, y, width, height, filled, color):
+        if self._group is None:
+            return self
+        args = (x, y, width, height, filled, color)
+        return self._record(self.renderer.draw_rect_2d, args, ("rect_2d",) + args[:-1] + (bytes(color),))
+
+    def draw_rect_3d(self, vec, width, height, filled, color, centered=False):
+        if self._group is None:
+            return self
+        point = as_points([vec])[0]
+        args = (point, width, height, filled, color, centered)
+        return self._record(self.renderer.draw_rect_3d, args, ("rect_3d", _round(point), width, height, filled, bytes(color), centered))
+
+    def draw_string_2d(self, x, y, scale_x, scale_y, text, color):
+        if self._group is None:
+            return self
+        args = (x, y, scale_x, scale_y, text, color)
+        return self._record(self.renderer.draw_string_2d, args, ("string_2d",) + args[:-1] + (bytes(color),))
+
+    def draw_string_3d(self, vec, scale_x, scale_y, text, color):
+        if self._group is None:
+            return self
+        point = as_points([vec])[0]
+        args = (point, scale_x, scale_y, text, color)
+        return self._record(self.renderer.draw_string_3d, args, ("string_3d", _round(point), scale_x, scale_y, text, bytes(color)))
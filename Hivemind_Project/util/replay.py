@@ -0,0 +1,160 @@
+"""Recording and offline replay of game data for the Overmind.
+
+Uses the same recording format as Calculator/replay.py: a gzipped stream of
+raw ctypes structs with a header, the field info once, then the packet and
+ball prediction of every tick.
+
+Run with `python -m util.replay <recording> --drones 0 1 2` from the project folder.
+"""
+
+import argparse
+import ctypes
+import gzip
+import queue
+import struct
+import threading
+from time import perf_counter_ns
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from rlbot.utils.rendering.rendering_manager import DummyRenderer, RenderingManager
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+from rlbot.utils.structures.bot_input_struct import PlayerInput
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+
+MAGIC = b"RLREPLAY"
+VERSION = 1
+
+# Magic, version, recording bot's index, and the sizes of the three structs.
+HEADER = struct.Struct("<8sIiIII")
+STRUCT_SIZES = (ctypes.sizeof(FieldInfoPacket), ctypes.sizeof(GameTickPacket), ctypes.sizeof(BallPrediction))
+
+# Controller fields saved for regression checks, in this order.
+CONTROLS = ["throttle", "steer", "pitch", "yaw", "roll", "jump", "boost", "handbrake", "use_item"]
+
+
+class Recorder:
+    """Writes the field info once and then the packet and ball prediction of every tick."""
+
+    def __init__(self, path: str, field_info: FieldInfoPacket, index: int = -1):
+        self.file = gzip.open(path, "wb", compresslevel=1)
+        self.ticks = 0
+        self.file.write(HEADER.pack(MAGIC, VERSION, index, *STRUCT_SIZES))
+        self.file.write(field_info)
+
+    def record(self, packet: GameTickPacket, ball_prediction: BallPrediction):
+        self.file.write(packet)
+        self.file.write(ball_prediction)
+        self.ticks += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Recording:
+    """Reads a recording back, refilling the same packet and ball prediction structs every tick."""
+
+    def __init__(self, path: str):
+        self.file = gzip.open(path, "rb")
+        magic, version, self.index, *sizes = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording.")
+        if tuple(sizes) != STRUCT_SIZES:
+            raise ValueError(f"{path} was recorded with different struct sizes {tuple(sizes)}, expected {STRUCT_SIZES}.")
+
+        self.field_info = FieldInfoPacket()
+        self.packet = GameTickPacket()
+        self.ball_prediction = BallPrediction()
+        self.file.readinto(self.field_info)
+
+    def __iter__(self) -> Iterator[GameTickPacket]:
+        packet_size = ctypes.sizeof(self.packet)
+        while self.file.readinto(self.packet) == packet_size:
+            self.file.readinto(self.ball_prediction)
+            yield self.packet
+        self.file.close()
+
+
+def controls_to_array(controls: PlayerInput) -> np.ndarray:
+    return np.array([float(getattr(controls, name)) for name in CONTROLS])
+
+
+def make_hive(recording: Recording, drone_indices: List[int]):
+    """Creates an Overmind that gets its game data from the recording instead of the game."""
+    from hive import Overmind
+
+    hive = Overmind(queue.Queue(), threading.Event(), {"name": "Replay Overmind"})
+    hive.drone_indices = set(drone_indices)
+    hive._field_info = recording.field_info
+    hive.get_ball_prediction_struct = lambda: recording.ball_prediction
+    hive.team = recording.packet.game_cars[drone_indices[0]].team
+    hive.renderer = DummyRenderer(RenderingManager())
+    hive.initialize_hive(recording.packet)
+    return hive
+
+
+def replay(path: str, drone_indices: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Feeds a recording to the Overmind and times every get_outputs.
+
+    Returns latencies in ns of shape (ticks,) and controls of shape (ticks, drones, len(CONTROLS)).
+    """
+    recording = Recording(path)
+    hive = None
+    latencies = []
+    controls = []
+
+    for packet in recording:
+        # The cars are only known after the first packet.
+        if hive is None:
+            if drone_indices is None:
+                team = packet.game_cars[recording.index].team
+                drone_indices = [i for i in range(packet.num_cars) if packet.game_cars[i].team == team]
+            hive = make_hive(recording, drone_indices)
+
+        start = perf_counter_ns()
+        outputs: Dict[int, PlayerInput] = hive.get_outputs(packet)
+        latencies.append(perf_counter_ns() - start)
+        controls.append([controls_to_array(outputs[index]) for index in drone_indices])
+
+    return np.array(latencies, dtype=np.int64), np.array(controls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a recording through the Overmind without the game.")
+    parser.add_argument("recording", help="Path to the recording.")
+    parser.add_argument("--drones", type=int, nargs="+", help="Drone indices. Defaults to the recording bot's team.")
+    parser.add_argument("--save", help="Save the controls to this .npy file.")
+    parser.add_argument("--check", help="Compare the controls against this .npy file.")
+    args = parser.parse_args()
+
+    latencies, controls = replay(args.recording, args.drones)
+    if len(latencies) == 0:
+        print("The recording has no ticks.")
+        return
+
+    p50, p90, p99 = np.percentile(latencies, (50, 90, 99)) / 1e6
+    print(f"{len(latencies)} ticks, {controls.shape[1]} drones")
+    print(f"{len(latencies) / (latencies.sum() / 1e9):.0f} ticks/s")
+    print(f"get_outputs latency (ms): p50 {p50:.3f}  p90 {p90:.3f}  p99 {p99:.3f}  max {latencies.max() / 1e6:.3f}")
+
+    if args.save:
+        np.save(args.save, controls)
+    if args.check:
+        expected = np.load(args.check)
+        if expected.shape != controls.shape:
+            raise SystemExit(f"Controls have shape {controls.shape}, expected {expected.shape}.")
+        mismatches = np.any(~np.isclose(controls, expected), axis=(1, 2))
+        if np.any(mismatches):
+            raise SystemExit(f"Controls differ on {np.count_nonzero(mismatches)} ticks, first on tick {np.argmax(mismatches)}.")
+        print("Controls match.")
+
+
+if __name__ == "__main__":
+    main()
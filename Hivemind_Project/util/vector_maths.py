@@ -1,3 +1,5 @@
+import numpy as np
+
 from rlutilities.linear_algebra import vec3, mat3, norm
 
 def three_vec3_to_mat3(f: vec3, l: vec3, u: vec3) -> mat3:
@@ -9,4 +11,13 @@ def dist(a, b):
     return norm(a - b)
 
 def flat(a: vec3):
-    return a - vec3(0, 0, a[2])
\ No newline at end of file
+    return a - vec3(0, 0, a[2])
+
+def vec3_to_array(v: vec3) -> np.ndarray:
+    return np.array([v[0], v[1], v[2]])
+
+def array_to_vec3(a: np.ndarray) -> vec3:
+    return vec3(float(a[0]), float(a[1]), float(a[2]))
+
+def array_to_mat3(m: np.ndarray) -> mat3:
+    return mat3(*(float(x) for x in m.ravel()))
@@ -0,0 +1,163 @@
+"""Analytic model of the soccar arena for batches of points.
+
+The field is an octagonal prism: floor, ceiling, side walls, back walls and
+the 45 degree corner bevels, with the edges where the walls meet the floor and
+ceiling rounded off. The goals are boxes sticking out of the back walls.
+
+Everything works on points of shape (..., 3) and gives the signed distance to the
+nearest surface, positive inside the arena, and the normal of that surface pointing
+into the arena.
+"""
+import numpy as np
+
+CEILING_HEIGHT = 2044
+SIDE_WALL_X = 4096
+BACK_WALL_Y = 5120
+# The corner bevels are the planes |x| + |y| = CORNER_OFFSET.
+CORNER_OFFSET = 8064
+# Radius of the curves between the walls and the floor or ceiling.
+CURVE_RADIUS = 256
+
+GOAL_HALF_WIDTH = 892.755
+GOAL_HEIGHT = 642.775
+GOAL_DEPTH = 880
+# The goal boxes reach this far into the field so the goal mouth is open.
+GOAL_OVERLAP = 1000
+
+_DIAGONAL = 1 / np.sqrt(2)
+
+# Inward facing unit normal and offset of each wall, so that dot(normal, point) + offset
+# is the distance of the point from the wall, positive inside the arena.
+WALL_NORMALS = np.array([
+    [-1, 0, 0],                     # side wall +x
+    [1, 0, 0],                      # side wall -x
+    [0, -1, 0],                     # back wall +y
+    [0, 1, 0],                      # back wall -y
+    [-_DIAGONAL, -_DIAGONAL, 0],    # corner +x +y
+    [_DIAGONAL, -_DIAGONAL, 0],     # corner -x +y
+    [-_DIAGONAL, _DIAGONAL, 0],     # corner +x -y
+    [_DIAGONAL, _DIAGONAL, 0],      # corner -x -y
+])
+WALL_OFFSETS = np.array([
+    SIDE_WALL_X,
+    SIDE_WALL_X,
+    BACK_WALL_Y,
+    BACK_WALL_Y,
+    CORNER_OFFSET * _DIAGONAL,
+    CORNER_OFFSET * _DIAGONAL,
+    CORNER_OFFSET * _DIAGONAL,
+    CORNER_OFFSET * _DIAGONAL,
+])
+
+# Floor and ceiling followed by the walls, for the flat parts of the field.
+PLANE_NORMALS = np.concatenate(([[0, 0, 1], [0, 0, -1]], WALL_NORMALS))
+PLANE_OFFSETS = np.concatenate(([0, CEILING_HEIGHT], WALL_OFFSETS))
+
+# Planes of the goal boxes: floor, crossbar, posts, back of the net and the open mouth.
+GOAL_NORMALS = np.array([
+    [0, 0, 1],
+    [0, 0, -1],
+    [-1, 0, 0],
+    [1, 0, 0],
+    [0, -1, 0],
+    [0, 1, 0],
+])
+GOAL_OFFSETS = np.array([
+    0,
+    GOAL_HEIGHT,
+    GOAL_HALF_WIDTH,
+    GOAL_HALF_WIDTH,
+    BACK_WALL_Y + GOAL_DEPTH,
+    -(BACK_WALL_Y - GOAL_OVERLAP),
+])
+
+
+def _nearest_plane(points: np.ndarray, normals: np.ndarray, offsets: np.ndarray):
+    """Distance to and normal of the nearest of some planes, for points inside all of them."""
+    distances = points @ normals.T + offsets
+    nearest = np.argmin(distances, axis=-1)
+    return np.take_along_axis(distances, nearest[..., None], axis=-1)[..., 0], normals[nearest]
+
+
+def _field(points: np.ndarray):
+    """Distance and normal of the field without the goals."""
+    wall_distance, wall_normal = _nearest_plane(points, WALL_NORMALS, WALL_OFFSETS)
+    z = points[..., 2]
+    floor_distance = z
+    ceiling_distance = CEILING_HEIGHT - z
+    near_floor = floor_distance <= ceiling_distance
+    height = np.where(near_floor, floor_distance, ceiling_distance)
+    up = np.zeros(points.shape)
+    up[..., 2] = np.where(near_floor, 1, -1)
+
+    # Flat parts: whichever of the nearest wall and floor or ceiling is closer.
+    on_wall = wall_distance < height
+    distance = np.where(on_wall, wall_distance, height)
+    normal = np.where(on_wall[..., None], wall_normal, up)
+
+    # Curves: distance from a circle around the edge, in the plane of the wall and floor normals.
+    curved = (wall_distance < CURVE_RADIUS) & (height < CURVE_RADIUS)
+    if np.any(curved):
+        to_centre = (CURVE_RADIUS - wall_distance[curved])[:, None] * wall_normal[curved] + (CURVE_RADIUS - height[curved])[:, None] * up[curved]
+        length = np.linalg.norm(to_centre, axis=-1)
+        distance[curved] = CURVE_RADIUS - length
+        normal[curved] = to_centre / np.maximum(length, 1e-6)[:, None]
+
+    return distance, normal
+
+
+def _goals(points: np.ndarray):
+    """Distance and normal of the goal boxes, each side mirrored onto the positive y goal."""
+    mirror = np.where(points[..., 1:2] < 0, [1, -1, 1], [1, 1, 1])
+    distance, normal = _nearest_plane(points * mirror, GOAL_NORMALS, GOAL_OFFSETS)
+    return distance, normal * mirror
+
+
+def surface_distance(points: np.ndarray) -> np.ndarray:
+    """Signed distance from each point to the nearest surface, shape (...). Positive inside the arena."""
+    return np.maximum(_field(points)[0], _goals(points)[0])
+
+
+def surface_normal(points: np.ndarray) -> np.ndarray:
+    """Normal of the nearest surface to each point, shape (..., 3). Points into the arena."""
+    return surface(points)[1]
+
+
+def surface(points: np.ndarray):
+    """Signed distance to the nearest surface and its normal for each point.
+
+    The goals are joined onto the field by taking whichever is further from
+    its surface, which is exact apart from right next to the goal posts and crossbar.
+    """
+    points = np.asarray(points, dtype=float)
+    field_distance, field_normal = _field(points)
+    goal_distance, goal_normal = _goals(points)
+    in_goal = goal_distance > field_distance
+    return np.where(in_goal, goal_distance, field_distance), np.where(in_goal[..., None], goal_normal, field_normal)
+
+
+def collide_spheres(points: np.ndarray, radius: float):
+    """Sphere against arena contact for a batch of sphere centres of shape (..., 3).
+
+    Returns whether each sphere touches the arena and the contact normal,
+    which points into the arena and is zero where there is no contact.
+    """
+    distance, normal = surface(points)
+    touching = distance < radius
+    return touching, np.where(touching[..., None], normal, 0.0)
+
+
+def boxes_inside(lower: np.ndarray, upper: np.ndarray, margin: float) -> np.ndarray:
+    """Whether axis aligned boxes of shape (..., 3) are certainly further than margin from every surface.
+
+    Conservative: the boxes are checked against the flat field, with the margin
+    grown to cover the curves. Boxes reaching into the goals count as not inside.
+    """
+    # A point this far from both a wall and the floor is still margin away from the curve between them.
+    margin = max(margin, CURVE_RADIUS - (CURVE_RADIUS - margin) * _DIAGONAL)
+
+    # The field is convex, so a box is inside if its furthest corner from each plane is.
+    # For each plane that corner is picked per axis by the sign of the normal.
+    furthest = np.where(PLANE_NORMALS > 0, lower[..., None, :], upper[..., None, :])
+    distances = np.einsum("...pi,pi->...p", furthest, PLANE_NORMALS) + PLANE_OFFSETS
+    return np.all(distances >= margin, axis=-1)
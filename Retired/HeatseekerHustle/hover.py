@@ -2,6 +2,11 @@ from rlutilities.simulation import Game, Input, Car
 from rlutilities.linear_algebra import vec3, look_at, norm
 from rlutilities.mechanics import AerialTurn
 
+from arena import surface
+
+# How far the hover target is kept from walls, floor, ceiling and goal.
+HOVER_CLEARANCE = 120
+
 
 def normalized(v):
     return v / norm(v)
@@ -9,6 +14,13 @@ def normalized(v):
 def direction(a, b):
     return normalized(b - a)
 
+def clear_of_surfaces(target: vec3, clearance: float) -> vec3:
+    """Pushes a target away from the nearest arena surface until it is at least clearance away."""
+    distance, normal = surface([target[0], target[1], target[2]])
+    if distance >= clearance:
+        return target
+    return target + vec3(*(float(x) for x in normal)) * float(clearance - distance)
+
 
 class Hover:
     def __init__(self, car: Car, info: Game):
@@ -21,10 +33,11 @@ class Hover:
         self.jump = False
 
     def step(self, dt):
-        delta_target = self.target - self.car.position
+        target = clear_of_surfaces(self.target, HOVER_CLEARANCE)
+        delta_target = target - self.car.position
 
         if norm(delta_target) > 500:
-            delta_target = direction(self.car.position, self.target) * 500
+            delta_target = direction(self.car.position, target) * 500
 
         target_direction = delta_target - self.car.velocity + vec3(0, 0, 500)
 
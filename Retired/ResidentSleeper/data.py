@@ -1,6 +1,6 @@
 '''Rocket League data processing.'''
 
-from utils import np, Car, Ball, BoostPad, a3l, a3r, a3v, orient_matrix, turn_r
+from utils import np, Car, Ball, BoostPad, a3l, a3r, a3v, orient_matrices, turn_r
 
 def setup(self, packet, field_info):
     """Sets up the variables and classes for the agent.
@@ -31,6 +31,9 @@ def setup(self, packet, field_info):
             self.teammates.append(Car(index, car.team, car.name))
         else:
             self.opponents.append(Car(index, car.team, car.name))
+
+    # Orientation matrices of every car get worked out into here each tick.
+    self.orient_ms = np.empty((1 + len(self.teammates) + len(self.opponents), 3, 3))
     
     # Creates a Ball object.
     self.ball = Ball()
@@ -75,14 +78,13 @@ def process(self, packet):
     self.player.d_jumped = packet.game_cars[self.player.index].double_jumped
     self.player.boost    = packet.game_cars[self.player.index].boost
         # Calculated:
-    self.player.orient_m = orient_matrix(self.player.rot)
     self.player.turn_r   = turn_r(self.player.vel)
 
     # Processing teammates.
     for teammate in self.teammates:
         # From packet:
         teammate.pos        = a3v(packet.game_cars[teammate.index].physics.location)
-        # teammate.rot        = a3r(packet.game_cars[teammate.index].physics.rotation)
+        teammate.rot        = a3r(packet.game_cars[teammate.index].physics.rotation)
         # teammate.vel        = a3v(packet.game_cars[teammate.index].physics.velocity)
         # teammate.ang_vel    = a3v(packet.game_cars[teammate.index].physics.angular_velocity)
         # teammate.dead       = packet.game_cars[teammate.index].is_demolished
@@ -92,7 +94,6 @@ def process(self, packet):
         # teammate.d_jumped   = packet.game_cars[teammate.index].double_jumped
         # teammate.boost      = packet.game_cars[teammate.index].boost
         # Calculated:
-        #teammate.orient_m   = orient_matrix(teammate.rot)
         #teammate.turn_r     = turn_r(teammate.vel)
 
     # Processing opponents.
@@ -109,9 +110,14 @@ def process(self, packet):
         #opponent.d_jumped   = packet.game_cars[opponent.index].double_jumped
         #opponent.boost      = packet.game_cars[opponent.index].boost
         # Calculated:
-        #opponent.orient_m   = orient_matrix(opponent.rot)
         #opponent.turn_r     = turn_r(opponent.vel)
 
+    # Orientation matrices of every car in one go.
+    cars = [self.player] + self.teammates + self.opponents
+    orient_matrices(np.array([car.rot for car in cars]), out=self.orient_ms)
+    for car, orient_m in zip(cars, self.orient_ms):
+        car.orient_m = orient_m
+
     # Processing Ball data.
     self.ball.pos       = a3v(packet.game_ball.physics.location)
     self.ball.rot       = a3r(packet.game_ball.physics.rotation)
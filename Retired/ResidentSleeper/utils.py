@@ -270,6 +270,44 @@ def orient_matrix(R : np.ndarray) -> np.ndarray:
     return A
 
 
+def orient_matrices(R : np.ndarray, out : np.ndarray = None) -> np.ndarray:
+    """Converts many Euler angles to orientation matrices in one go.
+
+    Arguments:
+        R {np.ndarray} -- Pitch, yaw, and roll of shape (n, 3).
+
+    Keyword Arguments:
+        out {np.ndarray} -- Array of shape (n, 3, 3) to write into. (default: {None})
+
+    Returns:
+        np.ndarray -- Orientation matrices of shape (n, 3, 3).
+    """
+    if out is None:
+        out = np.empty((len(R), 3, 3))
+
+    C = np.cos(R)
+    S = np.sin(R)
+    CP, CY, CR = C[:, 0], C[:, 1], C[:, 2]
+    SP, SY, SR = S[:, 0], S[:, 1], S[:, 2]
+
+    # front direction
+    out[:, 0, 0] = CP * CY
+    out[:, 1, 0] = CP * SY
+    out[:, 2, 0] = SP
+
+    # right direction (should be left but for some reason it is weird)
+    out[:, 0, 1] = CY * SP * SR - CR * SY
+    out[:, 1, 1] = SY * SP * SR + CR * CY
+    out[:, 2, 1] = -CP * SR
+
+    # up direction
+    out[:, 0, 2] = -CR * CY * SP - SR * SY
+    out[:, 1, 2] = -CR * SY * SP + SR * CY
+    out[:, 2, 2] = CP * CR
+
+    return out
+
+
 def local(A : np.ndarray, p0 : np.ndarray, p1 : np.ndarray) -> np.ndarray:
     """Transforms world coordinates into local coordinates.
     
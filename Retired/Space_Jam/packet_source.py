@@ -0,0 +1,187 @@
+'''Waiting for new game tick packets without busy polling.'''
+
+import asyncio
+import time
+from time import perf_counter
+
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+# Ticks come at 120 per second, but can be anywhere between these.
+MIN_TICK_INTERVAL = 1.0 / 240.0
+MAX_TICK_INTERVAL = 1.0 / 30.0
+
+# How long the core waits for a fresh packet before handing back control.
+FRESH_TIMEOUT_MS = 20
+
+# Longest a thread waiting for a fresh packet keeps going, so the event loop
+# can cancel the wait and shut down when ticks stop coming.
+THREAD_WAIT = 0.1
+
+# When polling, sleep until this long before the next tick is expected, then poll in small steps.
+POLL_MARGIN = 0.0005
+POLL_STEP = 0.0002
+
+# Weight of each new tick in the running average of the tick interval.
+INTERVAL_SMOOTHING = 0.05
+# A packet found this soon after a poll which found nothing must have only just arrived.
+PRECISE_WINDOW = 2 * POLL_STEP
+
+# -----------------------------------------------------------
+
+class PacketSource:
+    """Hands out each new GameTickPacket once, as soon as it arrives.
+
+    Where the core supports it, waits on fresh_live_data_packet, which blocks
+    until the next packet instead of spinning. Otherwise it polls
+    update_live_data_packet, sleeping through most of the expected time until
+    the next tick based on the observed tick interval, and backing off further
+    when ticks stop coming, like when the game is paused.
+
+    The tick interval comes from the game time in the packets, and the time of
+    each tick is only taken from the clock when a poll found nothing just before.
+    Otherwise the tick could have come at any time while asleep, so it is
+    assumed to have come when expected. That keeps late wake-ups from pushing
+    the next ones later and later.
+
+    The same packet struct is updated in place every tick.
+
+    Usage:
+        packet = source.wait()              # Blocking.
+        async for packet in source: ...     # Async iterator.
+        source.run(callback, quit_event)    # Callback for every packet.
+
+    Attributes:
+        interface {GameInterface} -- Where packets come from.
+        packet {GameTickPacket} -- The packet which gets updated.
+        key {int} -- Identifies this reader to the core, usually a bot index.
+        fresh {bool} -- Whether the core can wait for fresh packets.
+        tick_interval {float} -- Running average of the time between ticks, in seconds.
+        ticks {int} -- Number of new packets handed out.
+        polls {int} -- Number of times the packet was read from the game.
+    """
+    __slots__ = [
+        'interface',
+        'packet',
+        'key',
+        'fresh',
+        'tick_interval',
+        'ticks',
+        'polls',
+        '_last_time',
+        '_last_tick_at',
+        '_missed_at'
+    ]
+
+    def __init__(self, interface, packet: GameTickPacket = None, key: int = 0, fresh: bool = None):
+        self.interface = interface
+        self.packet: GameTickPacket = packet if packet is not None else GameTickPacket()
+        self.key: int = key
+        self.fresh: bool = hasattr(interface, 'fresh_live_data_packet') if fresh is None else fresh
+        self.tick_interval: float = 1.0 / 120.0
+        self.ticks: int = 0
+        self.polls: int = 0
+        self._last_time: float = self.packet.game_info.seconds_elapsed
+        self._last_tick_at: float = perf_counter()
+        self._missed_at: float = self._last_tick_at
+
+    def _read(self) -> bool:
+        """Reads the packet from the game once. Returns whether it is a new one."""
+        self.polls += 1
+        if self.fresh:
+            try:
+                self.interface.fresh_live_data_packet(self.packet, FRESH_TIMEOUT_MS, self.key)
+            except (AttributeError, OSError):
+                # The core is too old for fresh packets, so poll from now on.
+                self.fresh = False
+                self.interface.update_live_data_packet(self.packet)
+        else:
+            self.interface.update_live_data_packet(self.packet)
+
+        now = perf_counter()
+        game_time = self.packet.game_info.seconds_elapsed
+        if game_time == self._last_time:
+            self._missed_at = now
+            return False
+
+        if now - self._missed_at <= PRECISE_WINDOW:
+            tick_at = now
+        else:
+            tick_at = max(self._missed_at, min(now, self._last_tick_at + self.tick_interval))
+
+        interval = min(max(game_time - self._last_time, MIN_TICK_INTERVAL), MAX_TICK_INTERVAL)
+        self.tick_interval += (interval - self.tick_interval) * INTERVAL_SMOOTHING
+        self._last_time = game_time
+        self._last_tick_at = tick_at
+        self.ticks += 1
+        return True
+
+    def _sleep_time(self) -> float:
+        """How long to sleep before polling again."""
+        if self.fresh:
+            # The core did the waiting.
+            return 0.0
+        now = perf_counter()
+        expected = self._last_tick_at + self.tick_interval
+        if now < expected - POLL_MARGIN:
+            return expected - POLL_MARGIN - now
+        # Late, so back off the longer it has been.
+        return min(max(POLL_STEP, (now - expected) / 4), MAX_TICK_INTERVAL)
+
+    def wait(self, timeout: float = None) -> GameTickPacket:
+        """Blocks until the next new packet.
+
+        Keyword Arguments:
+            timeout {float} -- Seconds to wait at most, or None to wait forever. (default: {None})
+
+        Returns:
+            GameTickPacket -- The updated packet, or None on timeout.
+        """
+        deadline = None if timeout is None else perf_counter() + timeout
+        while not self._read():
+            sleep = self._sleep_time()
+            if deadline is not None:
+                left = deadline - perf_counter()
+                if left <= 0:
+                    return None
+                sleep = min(sleep, left)
+            if sleep > 0:
+                time.sleep(sleep)
+        return self.packet
+
+    async def wait_async(self) -> GameTickPacket:
+        """Waits for the next new packet without blocking the event loop.
+
+        Returns:
+            GameTickPacket -- The updated packet.
+        """
+        if self.fresh:
+            # The fresh packet call blocks in the core, so it goes on a thread.
+            # The thread gives up every so often, so cancelling doesn't leave it waiting forever.
+            loop = asyncio.get_running_loop()
+            packet = None
+            while packet is None:
+                packet = await loop.run_in_executor(None, self.wait, THREAD_WAIT)
+            return packet
+        while not self._read():
+            await asyncio.sleep(self._sleep_time())
+        return self.packet
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> GameTickPacket:
+        return await self.wait_async()
+
+    def run(self, callback, quit_event=None):
+        """Calls back with every new packet until quit_event is set.
+
+        Arguments:
+            callback {function} -- Called with the packet every tick.
+
+        Keyword Arguments:
+            quit_event {Event} -- Stops the loop once set, or None to run forever. (default: {None})
+        """
+        while quit_event is None or not quit_event.is_set():
+            packet = self.wait(timeout=0.1)
+            if packet is not None:
+                callback(packet)
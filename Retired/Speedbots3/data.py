@@ -1,6 +1,6 @@
 '''Rocket League data processing.'''
 
-from utils import Car, Ball, BoostPad, Drone, a3l, a3r, a3v, orient_matrix, turn_r
+from utils import np, Car, Ball, BoostPad, Drone, a3l, a3r, a3v, orient_matrices, turn_r
 
 
 def setup(s, p, fi, indices):
@@ -38,6 +38,9 @@ def setup(s, p, fi, indices):
             else:
                 s.opponents.append(Car(index))
     
+    # Orientation matrices of every car get worked out into here each tick.
+    s.orient_ms = np.empty((0, 3, 3))
+
     # Creates a Ball object.
     s.ball = Ball()
 
@@ -50,6 +53,16 @@ def setup(s, p, fi, indices):
         pad_obj = BoostPad(i, a3v(pad.location))
         pad_type.append(pad_obj)
 
+def add_drone(s, index):
+    """Adds a drone which joined after setup, taking it out of the teammates.
+
+    Arguments:
+        s {BotHelperProcess (self)} -- The hivemind bot helper process.
+        index {int} -- Index of the new drone.
+    """
+    s.teammates = [car for car in s.teammates if car.index != index]
+    s.drones.append(Drone(index))
+
 def process(s, p):
     """Processes the gametick packet.
 
@@ -67,7 +80,6 @@ def process(s, p):
         drone.on_g      = p.game_cars[drone.index].has_wheel_contact
         drone.sonic     = p.game_cars[drone.index].is_super_sonic
         drone.boost     = p.game_cars[drone.index].boost
-        drone.orient_m  = orient_matrix(drone.rot)
         drone.turn_r    = turn_r(drone.vel)
     
     # Processing teammates.
@@ -79,7 +91,6 @@ def process(s, p):
         teammate.on_g      = p.game_cars[teammate.index].has_wheel_contact
         teammate.sonic     = p.game_cars[teammate.index].is_super_sonic
         teammate.boost     = p.game_cars[teammate.index].boost
-        teammate.orient_m  = orient_matrix(teammate.rot)
         teammate.turn_r    = turn_r(teammate.vel)
 
     # Processing opponents.
@@ -91,9 +102,16 @@ def process(s, p):
         opponent.on_g      = p.game_cars[opponent.index].has_wheel_contact
         opponent.sonic     = p.game_cars[opponent.index].is_super_sonic
         opponent.boost     = p.game_cars[opponent.index].boost
-        opponent.orient_m  = orient_matrix(opponent.rot)
         opponent.turn_r    = turn_r(opponent.vel)
 
+    # Orientation matrices of every car in one go.
+    cars = s.drones + s.teammates + s.opponents
+    if len(s.orient_ms) != len(cars):
+        s.orient_ms = np.empty((len(cars), 3, 3))
+    orient_matrices(np.array([car.rot for car in cars]), out=s.orient_ms)
+    for car, orient_m in zip(cars, s.orient_ms):
+        car.orient_m = orient_m
+
     # Processing Ball data.
     s.ball.pos      = a3v(p.game_ball.physics.location)
     s.ball.vel      = a3v(p.game_ball.physics.velocity)
@@ -2,22 +2,22 @@
 
 '''Hey TGD, this is just the shell to make the thing run; the bots do nothing. - Will'''
 
-import queue
-import time
-
-from rlbot.botmanager.agent_metadata import AgentMetadata
 from rlbot.botmanager.bot_helper_process import BotHelperProcess
-from rlbot.utils import rate_limiter
 from rlbot.utils.logging_utils import get_logger
 from rlbot.utils.structures.bot_input_struct import PlayerInput
 from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
 from rlbot.utils.structures.ball_prediction_struct import BallPrediction
 from rlbot.utils.structures.game_interface import GameInterface
 
-from utils import a3v
+from render import RenderManager, prediction_path
+from runtime import Handshake, HivemindRuntime
 import data
 import brain
 
+# Debug rendering, and the most times per second to redraw it.
+RENDER = True
+DEBUG_RENDER_RATE = 20.0
+
 class Hivemind(BotHelperProcess):
 
     def __init__(self, agent_metadata_queue, quit_event, options):
@@ -26,17 +26,6 @@ class Hivemind(BotHelperProcess):
         self.game_interface = GameInterface(self.logger)
         self.running_indices = set()
 
-    def try_receive_agent_metadata(self):
-        while True:  # will exit on queue.Empty
-            try:
-                single_agent_metadata: AgentMetadata = self.metadata_queue.get(timeout=0.1)
-                self.running_indices.add(single_agent_metadata.index)
-            except queue.Empty:
-                return
-            except Exception as ex:
-                self.logger.error(ex)
-
-
     def start(self):
         """Runs once, sets up the hivemind and its agents."""
         # Prints stuff into the console.
@@ -47,19 +36,19 @@ class Hivemind(BotHelperProcess):
         # Loads game interface.
         self.game_interface.load_interface()
 
-        # Wait a moment for all agents to have a chance to start up and send metadata.
-        time.sleep(1)
-        self.try_receive_agent_metadata()
+        # Waits until every drone on the team has sent its metadata, or the deadline.
+        handshake = Handshake(self.game_interface, self.metadata_queue, self.quit_event)
+        self.running_indices = handshake.wait()
+        self.started_ns = handshake.started_ns
+        if handshake.missing:
+            self.logger.warning(f"Starting without drones {sorted(handshake.missing)}")
         
         # Runs the game loop where the hivemind will spend the rest of its time.
         self.game_loop()
 
             
     def game_loop(self):
-        """The main game loop. This is where your hivemind code goes."""
-
-        # Setting up rate limiter.
-        rate_limit = rate_limiter.RateLimiter(120)
+        """Sets up data and runs the hivemind until the quit event is set."""
 
         # Setting up data.
         field_info = FieldInfoPacket()
@@ -69,42 +58,57 @@ class Hivemind(BotHelperProcess):
 
         data.setup(self, packet, field_info, self.running_indices)
 
-        self.ball.predict = BallPrediction()
-
-        # MAIN LOOP:
-        while True:
-            # Updating the game packet from the game.
-            self.game_interface.update_live_data_packet(packet)
-    
-            # Processing packet.
-            data.process(self, packet)
+        # Only sends render groups which changed. Set RENDER to False to not render at all.
+        self.draw = RenderManager(self.game_interface.renderer, RENDER)
+        self.roles = []
 
-            # Ball prediction.           
-            self.game_interface.update_ball_prediction(self.ball.predict)
+        # Each stage of a tick runs as its own coroutine; rendering never holds up inputs.
+        self.runtime = HivemindRuntime(
+            self.game_interface, self.metadata_queue, self.quit_event,
+            plan=self.plan, render=self.draw_debug, on_drone=self.add_drone,
+            key=min(self.running_indices), logger=self.logger,
+            started_ns=self.started_ns)
+        self.runtime.run()
 
-            brain.think(self)
 
-            for drone in self.drones:
-                drone.ctrl = PlayerInput()
-                if drone.role is not None:
-                    drone.role.execute(self, drone)
-                self.game_interface.update_player_input(drone.ctrl, drone.index)
+    def add_drone(self, index):
+        """Adds a drone which reported in after startup."""
+        if index not in self.running_indices:
+            self.running_indices.add(index)
+            data.add_drone(self, index)
+            self.logger.info(f"Drone {index} joined late")
 
-            self.draw_debug()
 
-            # Rate limit sleep.
-            rate_limit.acquire()
+    def plan(self, packet, ball_prediction):
+        """Works out the controls for every drone. Returns them by index."""
+        # Processing packet.
+        data.process(self, packet)
+        self.ball.predict = ball_prediction
 
-
-    def draw_debug(self):
-        self.game_interface.renderer.begin_rendering()
-        path = [a3v(step.physics.location) for step in self.ball.predict.slices]
-        self.game_interface.renderer.draw_polyline_3d(path, self.game_interface.renderer.pink())
+        brain.think(self)
 
         for drone in self.drones:
+            drone.ctrl = PlayerInput()
             if drone.role is not None:
-                self.game_interface.renderer.draw_string_3d(drone.pos, 1, 1, drone.role.name, self.game_interface.renderer.white())
-        self.game_interface.renderer.end_rendering()
+                drone.role.execute(self, drone)
+
+        # Rendering runs on another thread while the next tick is planned, so it gets copies.
+        self.roles = [(drone.pos.copy(), drone.role.name) for drone in self.drones if drone.role is not None]
+
+        return {drone.index: drone.ctrl for drone in self.drones}
+
+
+    def draw_debug(self, packet, ball_prediction):
+        """Draws on the render thread. Only reads its arguments and copies plan made."""
+        r = self.draw
+        if r.begin_rendering('prediction', rate=DEBUG_RENDER_RATE, now=packet.game_info.seconds_elapsed):
+            r.draw_polyline_3d(prediction_path(ball_prediction), r.pink())
+            r.end_rendering()
+
+        if r.begin_rendering('roles', rate=DEBUG_RENDER_RATE, now=packet.game_info.seconds_elapsed):
+            for pos, role in self.roles:
+                r.draw_string_3d(pos, 1, 1, role, r.white())
+            r.end_rendering()
 
 """
 ball_prediction_struct = {
@@ -0,0 +1,366 @@
+'''Asyncio runtime for hiveminds.'''
+
+import asyncio
+import ctypes
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter_ns
+
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+from packet_source import PacketSource
+
+# Seconds between checks of the metadata queue and the quit event.
+METADATA_INTERVAL = 0.1
+QUIT_INTERVAL = 0.1
+
+# Seconds to wait at most at startup for every expected drone to report in.
+STARTUP_DEADLINE = 5.0
+# Seconds between checks while waiting at startup.
+STARTUP_INTERVAL = 0.01
+
+# Weight of each new sample in the running average of a stage's latency.
+LATENCY_SMOOTHING = 0.05
+
+STAGES = ['ingest', 'plan', 'dispatch', 'render', 'tick']
+
+# -----------------------------------------------------------
+
+def copy(dst, src):
+    """Copies a ctypes struct into another of the same type."""
+    ctypes.memmove(ctypes.addressof(dst), ctypes.addressof(src), ctypes.sizeof(dst))
+
+
+def base_name(name: str) -> str:
+    """Name of a car without the ' (2)' the game adds to copies of a bot."""
+    return re.sub(r' \(\d+\)$', '', name)
+
+
+def expected_drones(packet: GameTickPacket, index: int) -> set:
+    """Guesses which cars are drones of the same hivemind as the car at index.
+
+    Arguments:
+        packet {GameTickPacket} -- A packet with the cars in the match.
+        index {int} -- Index of a drone.
+
+    Returns:
+        set -- Indices of the bots on the same team with the same name, ignoring copy numbers.
+    """
+    car = packet.game_cars[index]
+    name = base_name(car.name)
+    return {
+        i for i in range(packet.num_cars)
+        if packet.game_cars[i].is_bot and packet.game_cars[i].team == car.team and base_name(packet.game_cars[i].name) == name
+    }
+
+
+class Handshake:
+    """Waits at startup until every expected drone has sent its AgentMetadata.
+
+    Drones expected are the bots on the first drone's team with the same name,
+    read from the packet once it has the cars, unless a count is given,
+    like from the match config. Startup goes ahead once they have all reported
+    in or the deadline has passed, as long as there is at least one drone.
+    Drones which are later than that can be added by the runtime.
+
+    Attributes:
+        interface {GameInterface} -- Where packets come from.
+        metadata_queue {Queue} -- Where drones send their AgentMetadata.
+        quit_event {Event} -- Stops waiting once set.
+        count {int} -- Number of drones expected, or None to work it out from the packet.
+        deadline {float} -- Seconds to wait at most for the expected drones.
+        indices {set} -- Indices of the drones which reported in.
+        expected {set} -- Indices of the drones expected. Empty until known.
+        started_ns {int} -- perf_counter_ns when the hivemind started.
+        ready_ns {int} -- perf_counter_ns when the handshake finished.
+    """
+
+    def __init__(self, interface, metadata_queue, quit_event=None, count: int = None, deadline: float = STARTUP_DEADLINE):
+        self.interface = interface
+        self.metadata_queue = metadata_queue
+        self.quit_event = quit_event
+        self.count: int = count
+        self.deadline: float = deadline
+        self.indices: set = set()
+        self.expected: set = set()
+        self.started_ns: int = perf_counter_ns()
+        self.ready_ns: int = None
+        self._packet: GameTickPacket = GameTickPacket()
+
+    @property
+    def ready_ms(self) -> float:
+        """Time the handshake took in ms."""
+        return None if self.ready_ns is None else (self.ready_ns - self.started_ns) / 1E6
+
+    @property
+    def missing(self) -> set:
+        """Indices of the drones expected which haven't reported in."""
+        return self.expected - self.indices
+
+    def _complete(self) -> bool:
+        """Whether every expected drone has reported in."""
+        if len(self.indices) == 0:
+            return False
+        if self.count is not None:
+            return len(self.indices) >= self.count
+        if not self.expected:
+            # The packet might not have the cars in it yet.
+            self.interface.update_live_data_packet(self._packet)
+            if self._packet.num_cars <= max(self.indices):
+                return False
+            self.expected = expected_drones(self._packet, min(self.indices))
+        return self.expected <= self.indices
+
+    def wait(self) -> set:
+        """Blocks until every expected drone has reported in, or the deadline.
+
+        Returns:
+            set -- Indices of the drones which reported in.
+        """
+        deadline_ns = self.started_ns + int(self.deadline * 1E9)
+        while self.quit_event is None or not self.quit_event.is_set():
+            if self._complete() or (self.indices and perf_counter_ns() >= deadline_ns):
+                break
+            try:
+                self.indices.add(self.metadata_queue.get(timeout=STARTUP_INTERVAL).index)
+            except queue.Empty:
+                pass
+        self.ready_ns = perf_counter_ns()
+        return self.indices
+
+
+class Slot:
+    """Hands the newest item from one stage to the next.
+
+    Items never queue up. If the next stage hasn't taken the last item yet,
+    it gets replaced and counted as dropped, so a slow stage only ever sees
+    the latest tick and never holds up the stage before it.
+
+    Attributes:
+        item -- The newest item.
+        dropped {int} -- Number of items replaced before being taken.
+    """
+    __slots__ = [
+        'item',
+        'dropped',
+        '_event'
+    ]
+
+    def __init__(self):
+        self.item = None
+        self.dropped: int = 0
+        self._event = asyncio.Event()
+
+    def put(self, item):
+        if self._event.is_set():
+            self.dropped += 1
+        self.item = item
+        self._event.set()
+
+    async def get(self):
+        await self._event.wait()
+        self._event.clear()
+        return self.item
+
+
+class StageStats:
+    """Latency counters for one stage.
+
+    Attributes:
+        name {str} -- Name of the stage.
+        count {int} -- Number of times the stage ran.
+        last_ms {float} -- Latest latency in ms.
+        mean_ms {float} -- Running average latency in ms.
+        max_ms {float} -- Highest latency so far in ms.
+        dropped {int} -- Number of ticks the stage skipped because it was behind.
+    """
+    __slots__ = [
+        'name',
+        'count',
+        'last_ms',
+        'mean_ms',
+        'max_ms',
+        'dropped'
+    ]
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.count: int = 0
+        self.last_ms: float = 0.0
+        self.mean_ms: float = 0.0
+        self.max_ms: float = 0.0
+        self.dropped: int = 0
+
+    def record(self, start_ns: int, end_ns: int):
+        """Records one run of the stage from start_ns to end_ns, from perf_counter_ns."""
+        ms = (end_ns - start_ns) / 1E6
+        self.last_ms = ms
+        self.mean_ms = ms if self.count == 0 else self.mean_ms + (ms - self.mean_ms) * LATENCY_SMOOTHING
+        self.max_ms = max(self.max_ms, ms)
+        self.count += 1
+
+    def __str__(self) -> str:
+        return f'{self.name:<10} {self.count:>7} {self.last_ms:8.3f} {self.mean_ms:8.3f} {self.max_ms:8.3f} {self.dropped:>7}'
+
+
+class HivemindRuntime:
+    """Runs a hivemind as separate asyncio coroutines for each stage.
+
+    Stages:
+        metadata -- Takes AgentMetadata off the queue as drones report in late.
+        ingest -- Waits for each new packet and updates the ball prediction.
+        plan -- Works out the controls of every drone from the newest packet.
+        dispatch -- Sends the controls to the drones.
+        render -- Draws debug rendering for the newest dispatched tick, on its own thread.
+
+    Stages hand over through Slots, so each one works on the newest tick and
+    drops the ones it was too slow for. Rendering runs behind dispatch and
+    off the event loop, so slow rendering or logging never delays inputs.
+    The 'tick' counter times a packet from arrival to its inputs being sent,
+    and first_input_ms is the time from startup to the first inputs being sent.
+
+    Hooks:
+        plan(packet, ball_prediction) -> Dict[int, PlayerInput] -- Controls for each drone index.
+        render(packet, ball_prediction) -- Optional. Gets its own copy of the packet. Runs while the next
+            tick is planned, so it must not read anything plan changes; have plan leave it a copy instead.
+        on_drone(index) -- Optional. Called for every drone which reports in after startup.
+
+    Attributes:
+        interface {GameInterface} -- The game interface.
+        metadata_queue {Queue} -- Where drones send their AgentMetadata.
+        quit_event {Event} -- Stops the runtime once set.
+        packet {GameTickPacket} -- Newest packet, which plan reads.
+        ball_prediction {BallPrediction} -- Newest ball prediction.
+        source {PacketSource} -- Where packets come from.
+        stats {dict} -- StageStats for each of STAGES.
+        logger {Logger} -- Where errors in hooks get logged.
+        started_ns {int} -- perf_counter_ns when the hivemind started.
+        first_input_ms {float} -- Time from starting to the first inputs being sent, None until then.
+    """
+
+    def __init__(self, interface, metadata_queue, quit_event, plan, render=None, on_drone=None, key: int = 0, logger=None, started_ns: int = None):
+        self.interface = interface
+        self.metadata_queue = metadata_queue
+        self.quit_event = quit_event
+        self.plan = plan
+        self.render = render
+        self.on_drone = on_drone
+        self.logger = logger
+
+        self.packet: GameTickPacket = GameTickPacket()
+        self.ball_prediction: BallPrediction = BallPrediction()
+        self.source: PacketSource = PacketSource(interface, key=key)
+        self.stats: dict = {name: StageStats(name) for name in STAGES}
+        self.started_ns: int = perf_counter_ns() if started_ns is None else started_ns
+        self.first_input_ms: float = None
+
+        # Rendering gets its own copies, since it runs while the next tick comes in.
+        self._render_packet: GameTickPacket = GameTickPacket()
+        self._render_prediction: BallPrediction = BallPrediction()
+        self._render_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='render')
+
+    def run(self):
+        """Runs the hivemind until the quit event is set."""
+        try:
+            asyncio.run(self._main())
+        finally:
+            self._render_pool.shutdown(wait=False)
+
+    def report(self) -> str:
+        """Latency of each stage as a table."""
+        lines = [f'{"stage":<10} {"count":>7} {"last ms":>8} {"mean ms":>8} {"max ms":>8} {"dropped":>7}']
+        lines += [str(stats) for stats in self.stats.values()]
+        if self.first_input_ms is not None:
+            lines.append(f'first input after {self.first_input_ms:.1f} ms')
+        return '\n'.join(lines)
+
+    def _error(self, stage: str):
+        if self.logger is not None:
+            self.logger.exception(f'Error in {stage}.')
+
+    async def _main(self):
+        self._to_plan = Slot()
+        self._to_dispatch = Slot()
+        self._to_render = Slot()
+
+        tasks = [asyncio.ensure_future(stage()) for stage in (self._metadata, self._ingest, self._planning, self._dispatch, self._rendering)]
+        try:
+            while not self.quit_event.is_set():
+                await asyncio.sleep(QUIT_INTERVAL)
+                # Stop if a stage died.
+                for task in tasks:
+                    if task.done():
+                        task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # STAGES:
+
+    async def _metadata(self):
+        while True:
+            try:
+                while True:
+                    metadata = self.metadata_queue.get_nowait()
+                    if self.on_drone is not None:
+                        self.on_drone(metadata.index)
+            except queue.Empty:
+                pass
+            await asyncio.sleep(METADATA_INTERVAL)
+
+    async def _ingest(self):
+        async for packet in self.source:
+            arrived = perf_counter_ns()
+            # The source fills its own packet, maybe on another thread, so stages get a copy.
+            copy(self.packet, packet)
+            self.interface.update_ball_prediction(self.ball_prediction)
+            self.stats['ingest'].record(arrived, perf_counter_ns())
+            self._to_plan.put(arrived)
+            self.stats['plan'].dropped = self._to_plan.dropped
+
+    async def _planning(self):
+        while True:
+            arrived = await self._to_plan.get()
+            start = perf_counter_ns()
+            try:
+                controls = self.plan(self.packet, self.ball_prediction)
+            except Exception:
+                self._error('plan')
+                continue
+            self.stats['plan'].record(start, perf_counter_ns())
+            self._to_dispatch.put((arrived, controls))
+            self.stats['dispatch'].dropped = self._to_dispatch.dropped
+
+    async def _dispatch(self):
+        while True:
+            arrived, controls = await self._to_dispatch.get()
+            start = perf_counter_ns()
+            for index, ctrl in controls.items():
+                self.interface.update_player_input(ctrl, index)
+            end = perf_counter_ns()
+            self.stats['dispatch'].record(start, end)
+            self.stats['tick'].record(arrived, end)
+            if self.first_input_ms is None:
+                self.first_input_ms = (end - self.started_ns) / 1E6
+                if self.logger is not None:
+                    self.logger.info(f'First input after {self.first_input_ms:.1f} ms.')
+            if self.render is not None:
+                self._to_render.put(arrived)
+                self.stats['render'].dropped = self._to_render.dropped
+
+    async def _rendering(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._to_render.get()
+            copy(self._render_packet, self.packet)
+            copy(self._render_prediction, self.ball_prediction)
+            start = perf_counter_ns()
+            try:
+                await loop.run_in_executor(self._render_pool, self.render, self._render_packet, self._render_prediction)
+            except Exception:
+                self._error('render')
+                continue
+            self.stats['render'].record(start, perf_counter_ns())
@@ -1,6 +1,20 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+import telemetry
+
+# For telemetry recorded by data_collect_bot.py
+'''
+# Each run is memory mapped, so only the parts we plot get read from disk.
+for run in telemetry.load_all('data/telemetry/*.tel'):
+    # Position of the car over time.
+    pos = run['car'][:, 0]
+    plt.plot(pos[:, 0], pos[:, 1])
+
+# Showing plotted paths.
+plt.show()
+'''
+
 # For drift
 '''
 for test in range(0,330):
@@ -2,8 +2,15 @@ from rlbot.agents.base_agent import BaseAgent, SimpleControllerState
 from rlbot.utils.structures.game_data_struct import GameTickPacket
 from rlbot.utils.game_state_util import GameState, BallState, CarState, Physics, Vector3, Rotator
 
+import os
+import time
+
 import numpy as np
 from utils import Car, a3l, a3r, a3v, orient_matrix
+from telemetry import TelemetryRecorder
+
+# Telemetry files go here, one per run.
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data', 'telemetry')
 
 
 class DataCollectionBot(BaseAgent):
@@ -12,6 +19,10 @@ class DataCollectionBot(BaseAgent):
         self.car = Car(self.index, self.team, self.name)
         self.last_time = 0.0
 
+        os.makedirs(DATA_DIR, exist_ok=True)
+        path = os.path.join(DATA_DIR, f'run_{time.strftime("%Y%m%d_%H%M%S")}_{self.index}.tel')
+        self.recorder = TelemetryRecorder(path, self.index)
+
     def process(self, packet: GameTickPacket):
         # Processing game info.
         self.game_time = packet.game_info.seconds_elapsed
@@ -27,4 +38,11 @@ class DataCollectionBot(BaseAgent):
         self.car.orient_m = orient_matrix(self.car.rot)
 
     def get_output(self, packet: GameTickPacket) -> SimpleControllerState:
-        return SimpleControllerState()
+        self.process(packet)
+        ctrl = SimpleControllerState()
+        self.recorder.record(packet, ctrl)
+        return ctrl
+
+    def retire(self):
+        self.recorder.close()
+
@@ -0,0 +1,181 @@
+'''Binary telemetry recording and loading.
+
+A telemetry file is a short header followed by fixed-size records,
+one per tick, holding the car, ball and controller state.
+Files are written and read through memory maps, so long runs
+never have to fit in RAM.
+'''
+
+import ctypes
+import glob
+import os
+
+import numpy as np
+
+from rlbot.agents.base_agent import SimpleControllerState
+from rlbot.utils.structures.game_data_struct import GameTickPacket, PlayerInfo
+
+MAGIC = b'TBTELEM1'
+
+# Records are written in chunks of this many ticks (10 seconds at 120Hz).
+CHUNK_SIZE = 1200
+
+# Location, rotation, velocity and angular velocity, all c_float.
+PHYSICS_FORMAT = (np.float32, (4, 3))
+
+# Controller fields in the order they are stored.
+CONTROLS = ['throttle', 'steer', 'pitch', 'yaw', 'roll', 'jump', 'boost', 'handbrake']
+
+RECORD_DTYPE = np.dtype([
+    ('time',        np.float32),
+    ('car',         PHYSICS_FORMAT),
+    ('boost',       np.int32),
+    ('wheel_c',     np.bool_),
+    ('ball',        PHYSICS_FORMAT),
+    ('ctrl',        np.float32, (len(CONTROLS),))
+])
+
+# Header is the magic followed by the record size, so old files can be told apart.
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('itemsize', np.uint64)])
+
+# Numpy view of the parts of a car in the packet that get recorded.
+CAR_DTYPE = np.dtype({
+    'names'     : ['physics', 'has_wheel_contact', 'boost'],
+    'formats'   : [PHYSICS_FORMAT, np.bool_, np.int32],
+    'offsets'   : [PlayerInfo.physics.offset, PlayerInfo.has_wheel_contact.offset, PlayerInfo.boost.offset],
+    'itemsize'  : ctypes.sizeof(PlayerInfo)
+})
+
+# -----------------------------------------------------------
+
+# RECORDING:
+
+class TelemetryRecorder:
+    """Appends one record per tick to a telemetry file.
+
+    The file grows a chunk at a time and only the current chunk is mapped.
+    Nothing is allocated per tick; each record is written in place.
+
+    Attributes:
+        path {str} -- Path to the telemetry file.
+        index {int} -- Index of the recorded car.
+        ticks {int} -- Number of records written.
+    """
+    __slots__ = [
+        'path',
+        'index',
+        'ticks',
+        'chunk_size',
+        '_chunk',
+        '_chunk_start',
+        '_packet',
+        '_cars',
+        '_ball'
+    ]
+
+    def __init__(self, path : str, index : int, chunk_size : int = CHUNK_SIZE):
+        self.path       : str           = path
+        self.index      : int           = index
+        self.ticks      : int           = 0
+        self.chunk_size : int           = chunk_size
+        self._chunk     : np.memmap     = None
+        self._chunk_start : int         = 0
+        self._packet    : GameTickPacket = None
+        self._cars      : np.ndarray    = None
+        self._ball      : np.ndarray    = None
+
+        header = np.array([(MAGIC, RECORD_DTYPE.itemsize)], dtype=HEADER_DTYPE)
+        with open(path, 'wb') as f:
+            header.tofile(f)
+        self._map_chunk()
+
+    def _map_chunk(self):
+        """Grows the file by a chunk and maps the new chunk."""
+        self._chunk_start = self.ticks
+        offset = HEADER_DTYPE.itemsize + self.ticks * RECORD_DTYPE.itemsize
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset + self.chunk_size * RECORD_DTYPE.itemsize)
+        self._chunk = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r+', offset=offset, shape=(self.chunk_size,))
+
+    def record(self, packet : GameTickPacket, ctrl : SimpleControllerState):
+        """Writes the state of this tick.
+
+        Arguments:
+            packet {GameTickPacket} -- Information about the game.
+            ctrl {SimpleControllerState} -- The controls sent this tick.
+        """
+        # Views into the packet only need remaking if we get a new packet.
+        if packet is not self._packet:
+            self._packet = packet
+            self._cars = np.frombuffer(packet.game_cars, dtype=CAR_DTYPE)
+            self._ball = np.frombuffer(packet.game_ball.physics, dtype=np.float32).reshape(4, 3)
+
+        if self.ticks - self._chunk_start == self.chunk_size:
+            self.flush()
+            self._map_chunk()
+
+        car = self._cars[self.index]
+        record = self._chunk[self.ticks - self._chunk_start]
+        record['time']      = packet.game_info.seconds_elapsed
+        record['car']       = car['physics']
+        record['boost']     = car['boost']
+        record['wheel_c']   = car['has_wheel_contact']
+        record['ball']      = self._ball
+        controls = record['ctrl']
+        for i, name in enumerate(CONTROLS):
+            controls[i] = getattr(ctrl, name)
+
+        self.ticks += 1
+
+    def flush(self):
+        """Writes the current chunk to disk."""
+        self._chunk.flush()
+
+    def close(self):
+        """Flushes and cuts off the unused part of the last chunk."""
+        if self._chunk is None:
+            return
+        self.flush()
+        self._chunk = None
+        with open(self.path, 'r+b') as f:
+            f.truncate(HEADER_DTYPE.itemsize + self.ticks * RECORD_DTYPE.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# -----------------------------------------------------------
+
+# LOADING:
+
+def load(path : str) -> np.memmap:
+    """Memory maps a telemetry file.
+
+    Arguments:
+        path {str} -- Path to the telemetry file.
+
+    Returns:
+        np.memmap -- Read-only records of RECORD_DTYPE, one per tick.
+    """
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC or header['itemsize'][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f'{path} is not a telemetry file of this version.')
+
+    # An empty memmap is not allowed, so empty files get an empty array instead.
+    if os.path.getsize(path) == HEADER_DTYPE.itemsize:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize)
+
+
+def load_all(pattern : str) -> list:
+    """Memory maps every telemetry file matching a glob pattern.
+
+    Arguments:
+        pattern {str} -- Glob pattern, e.g. 'data/drift/*.tel'.
+
+    Returns:
+        list -- Memory mapped records of each file, sorted by path.
+    """
+    return [load(path) for path in sorted(glob.glob(pattern))]